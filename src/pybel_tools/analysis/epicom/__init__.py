@@ -14,8 +14,11 @@ This algorithm has multiple steps:
 """
 
 from .algorithm import multi_run_epicom, run_epicom
+from .chunked import iterate_chunked_epicom_scores, run_epicom_chunked
 
 __all__ = [
     'run_epicom',
     'multi_run_epicom',
+    'run_epicom_chunked',
+    'iterate_chunked_epicom_scores',
 ]
@@ -2,14 +2,19 @@
 
 """An implementation of a drug-target-based mechanism enrichment strategy."""
 
+import gzip
 import itertools as itt
+import json
 import logging
 import os
+from datetime import datetime
+from functools import lru_cache
 from typing import Iterable, List, Mapping, Optional, TextIO, Tuple, Union
 
 from tqdm import tqdm
 
 from pybel import BELGraph
+from pybel.config import PYBEL_HOME
 from pybel.dsl import Gene
 from pybel.struct.grouping import get_subgraphs_by_annotation
 from pybel.struct.summary import get_annotation_values
@@ -18,10 +23,20 @@ from ..neurommsig import get_neurommsig_score, neurommsig_graph_preprocessor
 __all__ = [
     'run_epicom',
     'get_drug_scores',
+    'get_drug_target_interactions',
+    'get_preprocessed_drug_target_interactions',
+    'read_dti_snapshot',
+    'write_dti_snapshot',
 ]
 
 logger = logging.getLogger(__name__)
 
+#: The version of the format written by :func:`write_dti_snapshot`
+DTI_SNAPSHOT_VERSION = 1
+
+#: The default location of the drug-target interaction snapshot
+DEFAULT_DTI_SNAPSHOT_PATH = os.path.join(PYBEL_HOME, 'epicom', 'drug_target_interactions.json.gz')
+
 
 def run_epicom(graph: BELGraph, directory: str, annotation: str = 'Subgraph') -> None:
     """Run EpiCom reloaded on the given graph stratifying with the given annotation.
@@ -32,7 +47,7 @@ def run_epicom(graph: BELGraph, directory: str, annotation: str = 'Subgraph') ->
     """
     os.makedirs(directory, exist_ok=True)
 
-    dtis = _preprocess_dtis(_get_drug_target_interactions())
+    dtis = get_preprocessed_drug_target_interactions()
 
     drugs = list(dtis)
     subgraphs = get_annotation_values(graph, annotation=annotation)
@@ -76,7 +91,7 @@ def get_drug_scores(
     subgraphs = get_subgraphs_by_annotation(graph, annotation='Subgraph', sentinel='UNDEFINED')
 
     logger.info('running subgraphs x drugs for %s', graph)
-    it = itt.product(sorted(subgraphs), sorted(dtis))
+    it = itt.product(sorted(subgraphs, key=str), sorted(dtis))
     it = tqdm(it, total=len(subgraphs) * len(dtis), desc='Calculating scores')
 
     def get_score(s: str, d: str) -> Optional[float]:
@@ -111,8 +126,110 @@ def _preprocess_dtis(dtis: Mapping[str, List[str]]) -> Mapping[str, List[Gene]]:
     }
 
 
+def get_drug_target_interactions(path: Optional[str] = None, manager=None) -> Mapping[str, List[str]]:
+    """Get a mapping from drugs to their list of HGNC gene symbols from a local snapshot.
+
+    The snapshot is only read once per process, unless it changes on disk. If it doesn't exist yet, the interactions
+    are loaded from :mod:`bio2bel_drugbank` and written to it, so later calls don't need the database or network.
+
+    :param path: The path to the snapshot. Defaults to :data:`DEFAULT_DTI_SNAPSHOT_PATH`.
+    :param manager: A :mod:`bio2bel_drugbank` manager to use if the snapshot doesn't exist
+    :return: A dictionary of {drug name: list of HGNC gene symbols}. Treat it as read-only since it's shared.
+    """
+    path = _ensure_dti_snapshot(path=path, manager=manager)
+    return _load_dti_snapshot(path, os.path.getmtime(path))
+
+
+def get_preprocessed_drug_target_interactions(path: Optional[str] = None, manager=None) -> Mapping[str, List[Gene]]:
+    """Get a mapping from drugs to their list of target genes from a local snapshot.
+
+    This works like :func:`get_drug_target_interactions`, but the genes are also only built once per process.
+
+    :param path: The path to the snapshot. Defaults to :data:`DEFAULT_DTI_SNAPSHOT_PATH`.
+    :param manager: A :mod:`bio2bel_drugbank` manager to use if the snapshot doesn't exist
+    :return: A dictionary of {drug name: list of genes}. Treat it as read-only since it's shared.
+    """
+    path = _ensure_dti_snapshot(path=path, manager=manager)
+    return _load_preprocessed_dti_snapshot(path, os.path.getmtime(path))
+
+
+def _ensure_dti_snapshot(path: Optional[str] = None, manager=None) -> str:
+    path = path or DEFAULT_DTI_SNAPSHOT_PATH
+    if not os.path.exists(path):
+        logger.info('writing drug-target interaction snapshot to %s', path)
+        write_dti_snapshot(_get_drug_target_interactions(manager=manager), path)
+    return path
+
+
+@lru_cache(maxsize=None)
+def _load_dti_snapshot(path: str, _mtime: float) -> Mapping[str, List[str]]:
+    return read_dti_snapshot(path)
+
+
+@lru_cache(maxsize=None)
+def _load_preprocessed_dti_snapshot(path: str, mtime: float) -> Mapping[str, List[Gene]]:
+    return _preprocess_dtis(_load_dti_snapshot(path, mtime))
+
+
+def write_dti_snapshot(dtis: Mapping[str, Iterable[str]], path: str) -> None:
+    """Write a mapping from drugs to their HGNC gene symbols as a versioned JSON snapshot.
+
+    :param dtis: A dictionary of {drug name: HGNC gene symbols}
+    :param path: The path to write to. Is compressed with gzip if it ends with ``.gz``.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    data = {
+        'version': DTI_SNAPSHOT_VERSION,
+        'created': datetime.now().isoformat(),
+        'drugs': {
+            drug: sorted(set(targets))
+            for drug, targets in sorted(dtis.items())
+        },
+    }
+
+    # Write to a temporary file in the same directory then move it into place, so an interrupted write doesn't leave
+    # a truncated snapshot behind. Each process uses its own temporary file in case several write at once.
+    temporary_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with _open_snapshot(temporary_path, 'wt', compress=path.endswith('.gz')) as file:
+            json.dump(data, file)
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+
+def read_dti_snapshot(path: str) -> Mapping[str, List[str]]:
+    """Read a snapshot written with :func:`write_dti_snapshot`.
+
+    :param path: The path to the snapshot
+    :return: A dictionary of {drug name: list of HGNC gene symbols}
+    :raises ValueError: If the snapshot was written with a different version of the format
+    """
+    with _open_snapshot(path, 'rt') as file:
+        data = json.load(file)
+
+    version = data.get('version')
+    if version != DTI_SNAPSHOT_VERSION:
+        raise ValueError(f'{path} has snapshot version {version}. Expected {DTI_SNAPSHOT_VERSION}')
+
+    return data['drugs']
+
+
+def _open_snapshot(path: str, mode: str, compress: Optional[bool] = None) -> TextIO:
+    if compress is None:
+        compress = path.endswith('.gz')
+    if compress:
+        return gzip.open(path, mode)
+    return open(path, mode[0])
+
+
 def _multi_run_helper(graphs: Iterable[BELGraph]) -> Iterable[Tuple[str, str, str, float]]:
-    dtis = _preprocess_dtis(_get_drug_target_interactions())
+    dtis = get_preprocessed_drug_target_interactions()
 
     for graph in graphs:
         for drug, subgraph_name, score in get_drug_scores(graph, dtis):
@@ -4,44 +4,160 @@
 
 import logging
 import time
-from typing import Optional
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from sqlalchemy import func
 
 import pybel
-from .algorithm import get_drug_scores
+from pybel.dsl import Gene
+from pybel.manager.models import Namespace, NamespaceEntry, Network, edge_annotation, network_edge
+from .algorithm import get_drug_scores, get_preprocessed_drug_target_interactions
 from .models import Score
 
 logger = logging.getLogger(__name__)
 
 NEUROMMSIG_DEFAULT_URL = 'https://arty.scai.fraunhofer.de/artifactory/bel/annotation/neurommsig/neurommsig-1.0.3.belanno'
 
+#: The keyword of the namespace in which drugs are looked up
+DRUG_NAMESPACE_KEYWORD = 'drugbank'
 
-def get_networks_using_annotation(manager: pybel.Manager, annotation: str):
-    """
+#: The default number of scores inserted per statement
+BATCH_SIZE = 10_000
 
-    :param pybel.manager.Manager manager:
-    :param str annotation:
-    :return: list[pybel.manager.models.Network]
-    """
-    raise NotImplementedError
+#: The default number of scores inserted between commits
+COMMIT_INTERVAL = 100_000
 
+#: The maximum number of values bound in a single IN clause, which keeps below SQLite's variable limit
+_MAX_IN_CLAUSE = 900
 
-def get_drug_model(manager: pybel.Manager, name: str):
-    """
 
-    :param pybel.manager.Manager manager:
-    :param str name:
-    :return: pybel.manager.models.NamespaceEntry
-    """
-    raise NotImplementedError
+def get_networks_using_annotation(manager: pybel.Manager, annotation: Namespace) -> List[Network]:
+    """Get all networks that have at least one edge annotated with an entry from the given annotation.
 
-
-def build_database(manager: pybel.Manager, annotation_url: Optional[str] = None) -> None:
+    :param manager: A PyBEL manager
+    :param annotation: The namespace model of the annotation
+    """
+    return (
+        manager.session.query(Network)
+        .join(network_edge, network_edge.c.network_id == Network.id)
+        .join(edge_annotation, edge_annotation.c.edge_id == network_edge.c.edge_id)
+        .join(NamespaceEntry, NamespaceEntry.id == edge_annotation.c.name_id)
+        .filter(NamespaceEntry.namespace_id == annotation.id)
+        .distinct()
+        .all()
+    )
+
+
+def get_drug_model(
+    manager: pybel.Manager,
+    name: str,
+    namespace_keyword: Optional[str] = None,
+) -> Optional[NamespaceEntry]:
+    """Get the namespace entry for the given drug.
+
+    :param manager: A PyBEL manager
+    :param name: The name of the drug
+    :param namespace_keyword: The keyword of the drug namespace. Defaults to :data:`DRUG_NAMESPACE_KEYWORD`.
+    """
+    return (
+        manager.session.query(NamespaceEntry)
+        .join(Namespace)
+        .filter(_build_namespace_keyword_filter(namespace_keyword), NamespaceEntry.name == name)
+        .first()
+    )
+
+
+def get_drug_model_ids(
+    manager: pybel.Manager,
+    names: Iterable[str],
+    namespace_keyword: Optional[str] = None,
+) -> Mapping[str, int]:
+    """Get a dictionary from drug names to the identifiers of their entries, in as few queries as possible.
+
+    :param manager: A PyBEL manager
+    :param names: The names of drugs
+    :param namespace_keyword: The keyword of the drug namespace. Defaults to :data:`DRUG_NAMESPACE_KEYWORD`.
+    :return: A dictionary of {drug name: namespace entry identifier}. Drugs that couldn't be found are left out.
+    """
+    return _get_entry_ids(
+        manager,
+        names,
+        manager.session.query(NamespaceEntry.name, NamespaceEntry.id).join(Namespace).filter(
+            _build_namespace_keyword_filter(namespace_keyword),
+        ),
+    )
+
+
+def get_annotation_entry_ids(
+    manager: pybel.Manager,
+    annotation: Namespace,
+    names: Iterable[str],
+) -> Mapping[str, int]:
+    """Get a dictionary from annotation values to the identifiers of their entries, in as few queries as possible.
+
+    :param manager: A PyBEL manager
+    :param annotation: The namespace model of the annotation
+    :param names: The annotation values
+    :return: A dictionary of {annotation value: namespace entry identifier}. Values that couldn't be found are
+     left out.
+    """
+    return _get_entry_ids(
+        manager,
+        names,
+        manager.session.query(NamespaceEntry.name, NamespaceEntry.id).filter(
+            NamespaceEntry.namespace_id == annotation.id,
+        ),
+    )
+
+
+def _build_namespace_keyword_filter(namespace_keyword: Optional[str] = None):
+    namespace_keyword = namespace_keyword or DRUG_NAMESPACE_KEYWORD
+    return func.lower(Namespace.keyword) == namespace_keyword.lower()
+
+
+def _get_entry_ids(manager: pybel.Manager, names: Iterable[str], query) -> Mapping[str, int]:
+    names = sorted(set(names))
+    rv = {}
+    for start in range(0, len(names), _MAX_IN_CLAUSE):
+        rv.update(query.filter(NamespaceEntry.name.in_(names[start:start + _MAX_IN_CLAUSE])).all())
+    return rv
+
+
+def _get_annotation_value_name(value: Any) -> str:
+    """Get the name of an annotation value, which might be a string or an entity."""
+    if isinstance(value, str):
+        return value
+    return value.name or value.identifier
+
+
+def build_database(
+    manager: pybel.Manager,
+    annotation_url: Optional[str] = None,
+    dtis: Optional[Mapping[str, List[Gene]]] = None,
+    drug_namespace_keyword: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    commit_interval: Optional[int] = None,
+) -> None:
     """Build a database of scores for NeuroMMSig annotated graphs.
 
     1. Get all networks that use the Subgraph annotation
     2. run on each
+
+    :param manager: A PyBEL manager
+    :param annotation_url: The URL of the annotation used to stratify the graphs. Defaults to
+     :data:`NEUROMMSIG_DEFAULT_URL`.
+    :param dtis: A dictionary from {drug name: list of target genes}. If none, loads them with
+     :func:`pybel_tools.analysis.epicom.algorithm.get_preprocessed_drug_target_interactions`.
+    :param drug_namespace_keyword: The keyword of the drug namespace. Defaults to :data:`DRUG_NAMESPACE_KEYWORD`.
+    :param batch_size: The number of scores inserted per statement. Defaults to :data:`BATCH_SIZE`.
+    :param commit_interval: The number of scores inserted between commits. Defaults to :data:`COMMIT_INTERVAL`.
+
+    Drugs and annotation values are looked up with one query per network and cached, then the scores are written
+    with bulk inserts that bypass the ORM. Scores whose drug or annotation value isn't in the database are skipped.
     """
     annotation_url = annotation_url or NEUROMMSIG_DEFAULT_URL
+    batch_size = batch_size or BATCH_SIZE
+    commit_interval = commit_interval or COMMIT_INTERVAL
 
     annotation = manager.get_namespace_by_url(annotation_url)
 
@@ -50,27 +166,64 @@ def build_database(manager: pybel.Manager, annotation_url: Optional[str] = None)
 
     networks = get_networks_using_annotation(manager, annotation)
 
-    dtis = ...
+    if dtis is None:
+        dtis = get_preprocessed_drug_target_interactions()
 
-    for network in networks:
-        graph = network.as_bel()
+    drug_to_id = get_drug_model_ids(manager, dtis, namespace_keyword=drug_namespace_keyword)
+    if len(drug_to_id) < len(dtis):
+        logger.warning('could not find %d/%d drugs', len(dtis) - len(drug_to_id), len(dtis))
 
-        scores = get_drug_scores(graph, dtis)
+    subgraph_to_id: Dict[str, int] = {}
+    insert = Score.__table__.insert()
 
-        for (drug_name, subgraph_name), score in scores.items():
-            drug_model = get_drug_model(manager, drug_name)
-            subgraph_model = manager.get_annotation_entry(annotation_url, subgraph_name)
+    t = time.time()
+    rows = []
+    number_inserted = 0
+    number_uncommitted = 0
+    number_skipped = 0
 
-            score_model = Score(
-                network=network,
-                annotation=subgraph_model,
-                drug=drug_model,
-                score=score
-            )
+    for network in networks:
+        graph = network.as_bel()
 
-            manager.session.add(score_model)
+        scores = list(get_drug_scores(graph, dtis))
+
+        missing_subgraphs = {
+            _get_annotation_value_name(subgraph_name)
+            for _, subgraph_name, _ in scores
+        }.difference(subgraph_to_id)
+        subgraph_to_id.update(get_annotation_entry_ids(manager, annotation, missing_subgraphs))
+
+        for drug_name, subgraph_name, score in scores:
+            drug_id = drug_to_id.get(drug_name)
+            subgraph_id = subgraph_to_id.get(_get_annotation_value_name(subgraph_name))
+            if drug_id is None or subgraph_id is None:
+                number_skipped += 1
+                continue
+
+            rows.append(dict(
+                network_id=network.id,
+                annotation_id=subgraph_id,
+                drug_id=drug_id,
+                score=score,
+            ))
+
+            if len(rows) >= batch_size:
+                manager.session.execute(insert, rows)
+                number_inserted += len(rows)
+                number_uncommitted += len(rows)
+                rows = []
+
+            if number_uncommitted >= commit_interval:
+                manager.session.commit()
+                number_uncommitted = 0
+
+    if rows:
+        manager.session.execute(insert, rows)
+        number_inserted += len(rows)
 
-    t = time.time()
     logger.info('committing scores')
     manager.session.commit()
-    logger.info('committed scores in %.2f seconds', time.time() - t)
+    logger.info('inserted %d scores in %.2f seconds', number_inserted, time.time() - t)
+
+    if number_skipped:
+        logger.warning('skipped %d scores with unknown drugs or annotation values', number_skipped)
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+
+"""A resumable EpiCom runner that writes its results in chunks.
+
+The (sub-graph, drug) space is partitioned into chunks with a fixed number of pairs. Each chunk's scores are written
+to its own gzipped TSV file, which is only moved into place once the whole chunk has been calculated. If a run is
+interrupted, calling :func:`run_epicom_chunked` again with the same arguments skips the finished chunks.
+"""
+
+import gzip
+import json
+import logging
+import math
+import multiprocessing
+import os
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from tqdm import tqdm
+
+from pybel import BELGraph
+from pybel.dsl import Gene
+from pybel.struct.grouping import get_subgraphs_by_annotation
+from pybel.utils import hash_dump
+from .algorithm import get_preprocessed_drug_target_interactions
+from ..neurommsig import get_neurommsig_score, get_preprocessed_neurommsig_graph
+from ...utils import hash_graph
+
+__all__ = [
+    'run_epicom_chunked',
+    'iterate_chunked_epicom_scores',
+]
+
+logger = logging.getLogger(__name__)
+
+#: The default number of (sub-graph, drug) pairs in each chunk
+CHUNK_SIZE = 5000
+
+MANIFEST_NAME = 'manifest.json'
+SUBGRAPHS_NAME = 'subgraphs.tsv'
+DRUGS_NAME = 'drugs.tsv'
+CHUNKS_DIRECTORY_NAME = 'chunks'
+
+#: The state shared with each worker process by :func:`_init_worker`
+_worker_state: Dict[str, Any] = {}
+
+
+def run_epicom_chunked(
+    graph: BELGraph,
+    directory: str,
+    dtis: Optional[Mapping[str, List[Gene]]] = None,
+    annotation: str = 'Subgraph',
+    chunk_size: Optional[int] = None,
+    preprocess_graph: bool = True,
+    n_jobs: Optional[int] = None,
+    use_tqdm: bool = True,
+) -> None:
+    """Run EpiCom on the given graph, writing the scores for each chunk of (sub-graph, drug) pairs to its own file.
+
+    :param graph: A BEL graph
+    :param directory: The location to output the results. If it contains the results of an interrupted run with the
+     same arguments, only the missing chunks are calculated.
+    :param dtis: A dictionary from {drug name: list of target genes}. If none, loads them with
+     :func:`pybel_tools.analysis.epicom.algorithm.get_preprocessed_drug_target_interactions`.
+    :param annotation: The annotation to use to stratify the graph into sub-graphs.
+    :param chunk_size: The number of (sub-graph, drug) pairs in each chunk. Defaults to :data:`CHUNK_SIZE`.
+    :param preprocess_graph: If true, preprocess the graph with
+     :func:`pybel_tools.analysis.neurommsig.get_preprocessed_neurommsig_graph`.
+    :param n_jobs: The number of worker processes used to calculate chunks. If none or 1, calculates in the
+     current process. If -1, uses all cores.
+    :param use_tqdm: If true, show a progress bar
+    :raises ValueError: If the directory contains the results of a run with different arguments
+
+    The directory will contain:
+
+    1. ``subgraphs.tsv`` and ``drugs.tsv`` mapping the identifiers used in the chunks to names
+    2. ``manifest.json`` describing the run, which is used to check that resumed runs are compatible
+    3. ``chunks/chunk_*.tsv.gz`` with the non-zero scores as (sub-graph identifier, drug identifier, score)
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+
+    if dtis is None:
+        dtis = get_preprocessed_drug_target_interactions()
+
+    manifest = {
+        'graph': hash_graph(graph),
+        'annotation': annotation,
+        'preprocess_graph': preprocess_graph,
+        'chunk_size': chunk_size,
+        'drugs': _hash_dtis(dtis),
+    }
+
+    if preprocess_graph:
+        logger.info('preprocessing %s', graph)
+        graph = get_preprocessed_neurommsig_graph(graph)
+
+    logger.info('stratifying %s', graph)
+    subgraphs = get_subgraphs_by_annotation(graph, annotation=annotation, sentinel='UNDEFINED')
+
+    subgraph_names = sorted(subgraphs, key=str)
+    drug_names = sorted(dtis)
+    number_chunks = math.ceil(len(subgraph_names) * len(drug_names) / chunk_size)
+
+    _prepare_directory(directory, manifest, subgraph_names, drug_names)
+
+    pending = [
+        chunk
+        for chunk in range(number_chunks)
+        if not os.path.exists(_get_chunk_path(directory, chunk))
+    ]
+    logger.info('%d/%d chunks remaining for %s', len(pending), number_chunks, graph)
+    if not pending:
+        return
+
+    state = dict(
+        directory=directory,
+        chunk_size=chunk_size,
+        subgraphs=subgraphs,
+        subgraph_names=subgraph_names,
+        dtis=dtis,
+        drug_names=drug_names,
+    )
+
+    if n_jobs is None or n_jobs == 1 or len(pending) == 1:
+        it = (_write_chunk(chunk, **state) for chunk in pending)
+        if use_tqdm:
+            it = tqdm(it, total=len(pending), desc='Calculating chunks')
+        for _ in it:
+            pass
+        return
+
+    processes = None if n_jobs < 1 else min(n_jobs, len(pending))
+    with multiprocessing.Pool(processes=processes, initializer=_init_worker, initargs=(state,)) as pool:
+        it = pool.imap_unordered(_write_worker_chunk, pending)
+        if use_tqdm:
+            it = tqdm(it, total=len(pending), desc='Calculating chunks')
+        for _ in it:
+            pass
+
+
+def iterate_chunked_epicom_scores(directory: str) -> Iterable[Tuple[str, str, float]]:
+    """Iterate over the (sub-graph name, drug name, score) triples written by :func:`run_epicom_chunked`.
+
+    :param directory: The output directory of :func:`run_epicom_chunked`
+    :raises ValueError: If any of the chunks haven't been calculated yet
+    """
+    with open(os.path.join(directory, MANIFEST_NAME)) as file:
+        manifest = json.load(file)
+
+    subgraph_names = _read_names(os.path.join(directory, SUBGRAPHS_NAME))
+    drug_names = _read_names(os.path.join(directory, DRUGS_NAME))
+    number_chunks = math.ceil(len(subgraph_names) * len(drug_names) / manifest['chunk_size'])
+
+    missing = [
+        chunk
+        for chunk in range(number_chunks)
+        if not os.path.exists(_get_chunk_path(directory, chunk))
+    ]
+    if missing:
+        raise ValueError(f'{len(missing)}/{number_chunks} chunks have not been calculated in {directory}')
+
+    for chunk in range(number_chunks):
+        with gzip.open(_get_chunk_path(directory, chunk), 'rt') as file:
+            for line in file:
+                subgraph_id, drug_id, score = line.strip().split('\t')
+                yield subgraph_names[int(subgraph_id)], drug_names[int(drug_id)], float(score)
+
+
+def _prepare_directory(
+    directory: str,
+    manifest: Mapping[str, Any],
+    subgraph_names: Sequence,
+    drug_names: Sequence[str],
+) -> None:
+    os.makedirs(os.path.join(directory, CHUNKS_DIRECTORY_NAME), exist_ok=True)
+
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as file:
+            previous_manifest = json.load(file)
+        if previous_manifest != manifest:
+            raise ValueError(f'{directory} contains the results of a run with different arguments')
+        return
+
+    _write_names(os.path.join(directory, SUBGRAPHS_NAME), subgraph_names)
+    _write_names(os.path.join(directory, DRUGS_NAME), drug_names)
+
+    # The manifest is written last, so its presence means the directory has been completely prepared
+    with open(manifest_path, 'w') as file:
+        json.dump(manifest, file, indent=2)
+
+
+def _write_names(path: str, names: Sequence) -> None:
+    with open(path, 'w') as file:
+        print('id', 'name', sep='\t', file=file)
+        for i, name in enumerate(names):
+            print(i, name, sep='\t', file=file)
+
+
+def _read_names(path: str) -> List[str]:
+    with open(path) as file:
+        next(file)  # skip header
+        return [
+            line.rstrip('\n').split('\t', 1)[1]
+            for line in file
+        ]
+
+
+def _hash_dtis(dtis: Mapping[str, List[Gene]]) -> str:
+    return hash_dump({
+        drug: sorted(gene.as_bel() for gene in genes)
+        for drug, genes in dtis.items()
+    })
+
+
+def _get_chunk_path(directory: str, chunk: int) -> str:
+    return os.path.join(directory, CHUNKS_DIRECTORY_NAME, f'chunk_{chunk:06d}.tsv.gz')
+
+
+def _init_worker(state: Mapping[str, Any]) -> None:
+    _worker_state.update(state)
+
+
+def _write_worker_chunk(chunk: int) -> int:
+    return _write_chunk(chunk, **_worker_state)
+
+
+def _write_chunk(
+    chunk: int,
+    directory: str,
+    chunk_size: int,
+    subgraphs: Mapping[Any, BELGraph],
+    subgraph_names: Sequence,
+    dtis: Mapping[str, List[Gene]],
+    drug_names: Sequence[str],
+) -> int:
+    """Calculate the scores for the given chunk then move its file into place."""
+    path = _get_chunk_path(directory, chunk)
+    temporary_path = f'{path}.tmp'
+
+    start = chunk * chunk_size
+    stop = min(start + chunk_size, len(subgraph_names) * len(drug_names))
+
+    with gzip.open(temporary_path, 'wt') as file:
+        for i in range(start, stop):
+            subgraph_id, drug_id = divmod(i, len(drug_names))
+            score = get_neurommsig_score(subgraphs[subgraph_names[subgraph_id]], dtis[drug_names[drug_id]])
+
+            if score is None or score == 0.0:
+                continue
+
+            print(subgraph_id, drug_id, score, sep='\t', file=file)
+
+    os.replace(temporary_path, path)
+    return chunk
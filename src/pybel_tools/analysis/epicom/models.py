@@ -21,9 +21,9 @@ class Score(Base):
     network = relationship(Network)
 
     annotation_id = Column(Integer, ForeignKey(f'{NamespaceEntry.__tablename__}.id'))
-    annotation = relationship(NamespaceEntry)
+    annotation = relationship(NamespaceEntry, foreign_keys=[annotation_id])
 
     drug_id = Column(Integer, ForeignKey(f'{NamespaceEntry.__tablename__}.id'))
-    drug = relationship(NamespaceEntry)
+    drug = relationship(NamespaceEntry, foreign_keys=[drug_id])
 
     score = Column(Float, nullable=False, unique=False, index=True)
@@ -2,25 +2,37 @@
 
 """This module contains functions to compare generated sub-graphs to canonical sub-graphs."""
 
-from typing import Any, Mapping
+from typing import Any, Hashable, Mapping, Optional, Set
 
 from pybel import BELGraph
 from pybel.struct import get_subgraphs_by_annotation
 from ..generation import generate_bioprocess_mechanisms
+from ..minhash import MINHASH_PERMUTATIONS, MinHashLSH
 from ..utils import tanimoto_set_similarity
 
 __all__ = [
     'compare',
+    'compare_node_sets',
 ]
 
 
-def compare(graph: BELGraph, annotation: str = 'Subgraph') -> Mapping[str, Mapping[str, float]]:
+def compare(
+    graph: BELGraph,
+    annotation: str = 'Subgraph',
+    threshold: Optional[float] = None,
+    seed: Optional[int] = None,
+) -> Mapping[str, Mapping[str, float]]:
     """Compare generated mechanisms to actual ones.
 
     1. Generates candidate mechanisms for each biological process
     2. Gets sub-graphs for all NeuroMMSig signatures
     3. Make tanimoto similarity comparison for all sets
 
+    :param graph: A BEL graph
+    :param annotation: The annotation whose values' sub-graphs are the canonical mechanisms
+    :param threshold: If given, only find the candidate mechanisms at least this similar to each canonical one, using
+     MinHash signatures to avoid comparing every pair. See :func:`compare_node_sets`.
+    :param seed: The seed for the MinHash signatures
     :return: A dictionary table comparing the canonical subgraphs to generated ones
     """
     canonical_mechanisms = get_subgraphs_by_annotation(graph, annotation)
@@ -29,12 +41,42 @@ def compare(graph: BELGraph, annotation: str = 'Subgraph') -> Mapping[str, Mappi
     candidate_mechanisms = generate_bioprocess_mechanisms(graph)
     candidate_nodes = _transform_graph_dict_to_node_dict(candidate_mechanisms)
 
-    return {
-        canonical_name: {
-            candidate_bp: tanimoto_set_similarity(candidate_nodes, canonical_nodes)
-            for candidate_bp, candidate_graph in candidate_nodes.items()
+    return compare_node_sets(canonical_nodes, candidate_nodes, threshold=threshold, seed=seed)
+
+
+def compare_node_sets(
+    canonical_nodes: Mapping[Hashable, Set],
+    candidate_nodes: Mapping[Hashable, Set],
+    threshold: Optional[float] = None,
+    number_permutations: int = MINHASH_PERMUTATIONS,
+    seed: Optional[int] = None,
+) -> Mapping[Hashable, Mapping[Hashable, float]]:
+    """Calculate the tanimoto similarity of the nodes in each canonical mechanism to those in each candidate.
+
+    :param canonical_nodes: A dictionary of {canonical mechanism: set of nodes}
+    :param candidate_nodes: A dictionary of {candidate mechanism: set of nodes}
+    :param threshold: If given, the candidates are indexed with :class:`pybel_tools.minhash.MinHashLSH` and only the
+     ones at least this similar to each canonical mechanism are kept. A few of them might be missed.
+    :param number_permutations: The number of hash functions in the MinHash signatures
+    :param seed: The seed for the MinHash signatures
+    :return: A dictionary of {canonical mechanism: {candidate mechanism: similarity}}
+    """
+    if threshold is None:
+        return {
+            canonical_name: {
+                candidate_name: tanimoto_set_similarity(candidate_set, canonical_set)
+                for candidate_name, candidate_set in candidate_nodes.items()
+            }
+            for canonical_name, canonical_set in canonical_nodes.items()
         }
-        for canonical_name, canonical_graph in canonical_nodes.items()
+
+    index = MinHashLSH(threshold=threshold, number_permutations=number_permutations, seed=seed)
+    for candidate_name, candidate_set in candidate_nodes.items():
+        index.add(candidate_name, candidate_set)
+
+    return {
+        canonical_name: index.search(canonical_set)
+        for canonical_name, canonical_set in canonical_nodes.items()
     }
 
 
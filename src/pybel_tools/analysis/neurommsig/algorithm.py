@@ -7,11 +7,13 @@
     <https://doi.org/10.1093/bioinformatics/btx399>`_. Bioinformatics, 33(22), 3679–3681.
 """
 
-import itertools as itt
 import logging
-from collections import Counter
-from typing import List, Mapping, Optional
+import multiprocessing
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Hashable, List, Mapping, Optional, Tuple, TypeVar
 
+import numpy as np
+from scipy import sparse
 from tqdm import tqdm
 
 from pybel import BELGraph, Pipeline
@@ -21,22 +23,67 @@ from pybel.struct import (
     collapse_all_variants, collapse_to_genes, enrich_protein_and_rna_origins, get_nodes_by_function,
     get_subgraphs_by_annotation,
 )
-from ...utils import calculate_betweenness_centality
+from ...utils import calculate_betweenness_centality, hash_graph
 
 __all__ = [
     'get_neurommsig_scores',
     'get_neurommsig_score',
     'neurommsig_graph_preprocessor',
+    'get_preprocessed_neurommsig_graph',
+    'clear_preprocessed_neurommsig_graph_cache',
+    'neurommsig_topology',
+    'neurommsig_topology_batch',
 ]
 
 logger = logging.getLogger(__name__)
 
+X = TypeVar('X', bound=Hashable)
+
 neurommsig_graph_preprocessor = Pipeline.from_functions([
     enrich_protein_and_rna_origins,
     collapse_to_genes,
     collapse_all_variants,
 ])
 
+#: The number of preprocessed graphs kept by :func:`get_preprocessed_neurommsig_graph`
+PREPROCESSED_CACHE_SIZE = 8
+
+_preprocessed_cache: 'OrderedDict[str, BELGraph]' = OrderedDict()
+
+#: The strata, genes, and keyword arguments shared with each worker process by :func:`_init_worker`
+_worker_state: Dict[str, Any] = {}
+
+
+def get_preprocessed_neurommsig_graph(graph: BELGraph, use_cache: bool = True) -> BELGraph:
+    """Run :data:`neurommsig_graph_preprocessor` on the graph, reusing previous results for identical graphs.
+
+    The results are keyed by :func:`pybel_tools.utils.hash_graph`, so modifying the graph afterwards
+    invalidates its entry. Only the :data:`PREPROCESSED_CACHE_SIZE` most recently used graphs are kept.
+
+    :param graph: A BEL graph
+    :param use_cache: If false, always preprocess the graph and don't store the result.
+    :return: The preprocessed graph. Treat it as read-only since it's shared between calls.
+    """
+    if not use_cache:
+        return neurommsig_graph_preprocessor.run(graph)
+
+    key = hash_graph(graph)
+    rv = _preprocessed_cache.get(key)
+    if rv is not None:
+        _preprocessed_cache.move_to_end(key)
+        return rv
+
+    rv = _preprocessed_cache[key] = neurommsig_graph_preprocessor.run(graph)
+    while len(_preprocessed_cache) > PREPROCESSED_CACHE_SIZE:
+        _preprocessed_cache.popitem(last=False)
+
+    return rv
+
+
+def clear_preprocessed_neurommsig_graph_cache() -> None:
+    """Clear the cache used by :func:`get_preprocessed_neurommsig_graph`."""
+    _preprocessed_cache.clear()
+
 
 def get_neurommsig_scores(
     graph: BELGraph,
@@ -47,6 +94,8 @@ def get_neurommsig_scores(
     top_percent: Optional[float] = None,
     topology_weight: Optional[float] = None,
     preprocess: bool = False,
+    use_preprocess_cache: bool = True,
+    n_jobs: Optional[int] = None,
     use_tqdm: bool = False,
     tqdm_kwargs: Optional[Mapping] = None,
 ) -> Optional[Mapping[str, float]]:
@@ -63,6 +112,10 @@ def get_neurommsig_scores(
     :param topology_weight: The relative weight of the topolgical analysis core from
      :py:func:`neurommsig_topology`. Defaults to 1.0.
     :param preprocess: If true, preprocess the graph.
+    :param use_preprocess_cache: If true, reuse the preprocessed graph from previous calls on the same graph with
+     :func:`get_preprocessed_neurommsig_graph`.
+    :param n_jobs: The number of worker processes used to score the strata. If none or 1, scores in the
+     current process. If -1, uses all cores.
     :return: A dictionary from {annotation value: NeuroMMSig composite score}
 
     Pre-processing steps:
@@ -72,7 +125,7 @@ def get_neurommsig_scores(
     3. Collapse variants to genes with :func:``
     """
     if preprocess:
-        graph = neurommsig_graph_preprocessor.run(graph)
+        graph = get_preprocessed_neurommsig_graph(graph, use_cache=use_preprocess_cache)
 
     if all(isinstance(gene, str) for gene in genes):
         genes = [Gene('HGNC', gene) for gene in genes]
@@ -90,6 +143,7 @@ def get_neurommsig_scores(
         hub_weight=hub_weight,
         top_percent=top_percent,
         topology_weight=topology_weight,
+        n_jobs=n_jobs,
         use_tqdm=use_tqdm,
         tqdm_kwargs=tqdm_kwargs,
     )
@@ -102,6 +156,7 @@ def get_neurommsig_scores_prestratified(
     hub_weight: Optional[float] = None,
     top_percent: Optional[float] = None,
     topology_weight: Optional[float] = None,
+    n_jobs: Optional[int] = None,
     use_tqdm: bool = False,
     tqdm_kwargs: Optional[Mapping] = None,
 ) -> Mapping[str, float]:
@@ -116,6 +171,8 @@ def get_neurommsig_scores_prestratified(
     :param top_percent: The percentage of top genes to use as hubs. Defaults to 5% (0.05).
     :param topology_weight: The relative weight of the topolgical analysis core from
      :py:func:`neurommsig_topology`. Defaults to 1.0.
+    :param n_jobs: The number of worker processes used to score the strata. If none or 1, scores in the
+     current process. If -1, uses all cores.
     :param use_tqdm: If true, show a progress bar
     :return: A dictionary from {annotation value: NeuroMMSig composite score}
 
@@ -124,23 +181,58 @@ def get_neurommsig_scores_prestratified(
     1. Infer the central dogma with :func:``
     2. Collapse all proteins, RNAs and miRNAs to genes with :func:``
     3. Collapse variants to genes with :func:``
+
+    When running with several jobs, the strata are handed to each worker once when it starts instead of being
+    pickled with every task. With the default ``fork`` start method on Linux, the workers share the parent's
+    memory and the strata are never copied at all.
     """
-    it = subgraphs.items()
-    if use_tqdm:
-        it = tqdm(it, **(tqdm_kwargs or {}))
+    score_kwargs = dict(
+        ora_weight=ora_weight,
+        hub_weight=hub_weight,
+        top_percent=top_percent,
+        topology_weight=topology_weight,
+    )
+
+    if n_jobs is None or n_jobs == 1 or len(subgraphs) <= 1:
+        it = subgraphs.items()
+        if use_tqdm:
+            it = tqdm(it, **(tqdm_kwargs or {}))
+        return {
+            name: get_neurommsig_score(graph=subgraph, genes=genes, **score_kwargs)
+            for name, subgraph in it
+        }
+
+    processes = None if n_jobs < 1 else min(n_jobs, len(subgraphs))
+    with multiprocessing.Pool(
+        processes=processes,
+        initializer=_init_worker,
+        initargs=(subgraphs, list(genes), score_kwargs),
+    ) as pool:
+        it = pool.imap_unordered(_score_worker_subgraph, subgraphs)
+        if use_tqdm:
+            it = tqdm(it, total=len(subgraphs), **(tqdm_kwargs or {}))
+        results = dict(it)
+
+    # keep the same order as the sequential version
     return {
-        name: get_neurommsig_score(
-            graph=subgraph,
-            genes=genes,
-            ora_weight=ora_weight,
-            hub_weight=hub_weight,
-            top_percent=top_percent,
-            topology_weight=topology_weight,
-        )
-        for name, subgraph in it
+        name: results[name]
+        for name in subgraphs
     }
 
 
+def _init_worker(subgraphs: Mapping[str, BELGraph], genes: List[Gene], score_kwargs: Mapping[str, Any]) -> None:
+    _worker_state.update(subgraphs=subgraphs, genes=genes, score_kwargs=score_kwargs)
+
+
+def _score_worker_subgraph(name: str) -> Tuple[str, float]:
+    score = get_neurommsig_score(
+        graph=_worker_state['subgraphs'][name],
+        genes=_worker_state['genes'],
+        **_worker_state['score_kwargs'],
+    )
+    return name, score
+
+
 def get_neurommsig_score(
     graph: BELGraph,
     genes: List[Gene],
@@ -234,6 +326,9 @@ def neurommsig_topology(graph: BELGraph, nodes: List[BaseEntity]) -> float:
     .. math::
 
          \frac{\sum_i^n N_G[i]}{n*(n-1)}
+
+    Only the edges of the sub-graph induced on the given nodes are visited, so this scales with the
+    neighborhoods of the given nodes rather than with the square of their number.
     """
     nodes = list(nodes)
     number_nodes = len(nodes)
@@ -242,10 +337,77 @@ def neurommsig_topology(graph: BELGraph, nodes: List[BaseEntity]) -> float:
         # log.debug('')
         return 0.0
 
-    unnormalized_sum = sum(
-        u in graph[v]
-        for u, v in itt.product(nodes, repeat=2)
-        if v in graph and u != v
-    )
+    multiplicities = Counter(node for node in nodes if node in graph)
+
+    unnormalized_sum = 0
+    for v, v_count in multiplicities.items():
+        successors = graph.adj[v]
+        if len(successors) < len(multiplicities):
+            candidates = (u for u in successors if u in multiplicities)
+        else:
+            candidates = (u for u in multiplicities if u in successors)
+        unnormalized_sum += v_count * sum(multiplicities[u] for u in candidates if u != v)
 
     return unnormalized_sum / (number_nodes * (number_nodes - 1.0))
+
+
+def neurommsig_topology_batch(graph: BELGraph, nodes_dict: Mapping[X, List[BaseEntity]]) -> Mapping[X, float]:
+    """Calculate the node neighbor score from :func:`neurommsig_topology` for many lists of nodes at once.
+
+    The graph is compiled to a sparse adjacency matrix once, then the induced edge counts for all lists are
+    calculated with a single sparse matrix product.
+
+    :param graph: A BEL graph
+    :param nodes_dict: A dictionary from {key: list of nodes}
+    :return: A dictionary from {key: node neighbor score}
+    """
+    keys = list(nodes_dict)
+    if not keys:
+        return {}
+
+    node_to_id, adjacency = _get_adjacency_matrix(graph)
+
+    rows, columns = [], []
+    sizes = np.zeros(len(keys))
+    for row, key in enumerate(keys):
+        nodes = list(nodes_dict[key])
+        sizes[row] = len(nodes)
+        for node in nodes:
+            node_id = node_to_id.get(node)
+            if node_id is not None:
+                rows.append(row)
+                columns.append(node_id)
+
+    # Duplicate entries are summed, which keeps the multiplicity of repeated nodes
+    incidence = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, columns)),
+        shape=(len(keys), len(node_to_id)),
+    )
+    unnormalized_sums = np.asarray((incidence @ adjacency).multiply(incidence).sum(axis=1)).ravel()
+
+    return {
+        key: (
+            0.0
+            if number_nodes <= 1 else
+            unnormalized_sum / (number_nodes * (number_nodes - 1.0))
+        )
+        for key, number_nodes, unnormalized_sum in zip(keys, sizes, unnormalized_sums)
+    }
+
+
+def _get_adjacency_matrix(graph: BELGraph) -> Tuple[Mapping[BaseEntity, int], sparse.csr_matrix]:
+    """Build a binary adjacency matrix from targets to sources, without self-loops."""
+    node_to_id = {node: i for i, node in enumerate(graph)}
+
+    rows, columns = [], []
+    for v, successors in graph.adj.items():
+        for u in successors:
+            if u != v:
+                rows.append(node_to_id[v])
+                columns.append(node_to_id[u])
+
+    adjacency = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, columns)),
+        shape=(len(node_to_id), len(node_to_id)),
+    )
+    return node_to_id, adjacency
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+
+"""An inverted index from annotation values to the edges and nodes of the sub-graphs they induce.
+
+Functions that group a graph's edges or nodes by an annotation, like
+:func:`pybel_tools.selection.group_nodes_by_annotation` and :func:`pybel_tools.summary.count_annotation_values`,
+answer from the index attached to the graph with :func:`attach_annotation_index` instead of scanning every edge.
+"""
+
+import logging
+import typing
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Mapping, Optional, Set, Tuple, Union
+from weakref import WeakKeyDictionary
+
+from pybel import BELGraph
+from pybel.constants import ANNOTATIONS
+from pybel.dsl import BaseEntity
+from pybel.language import Entity
+from pybel.struct.filters.edge_predicates import edge_has_annotation
+from pybel.typing import EdgeData
+from .typing import NodePair
+
+__all__ = [
+    'AnnotationIndex',
+    'attach_annotation_index',
+    'get_annotation_index',
+    'detach_annotation_index',
+    'get_current_annotation_index',
+    'iterate_annotated_edges',
+    'ensure_annotation_value',
+]
+
+logger = logging.getLogger(__name__)
+
+#: An edge's source, target, and key
+EdgeKey = Tuple[BaseEntity, BaseEntity, str]
+
+_attached_indexes: 'WeakKeyDictionary[BELGraph, AnnotationIndex]' = WeakKeyDictionary()
+
+
+def attach_annotation_index(graph: BELGraph) -> 'AnnotationIndex':
+    """Build an annotation index for the graph and attach it, so the functions grouping by annotations answer from it.
+
+    Since BEL graphs don't emit events, edges added to or removed from the graph afterwards have to be passed to
+    :meth:`AnnotationIndex.add_edge` and :meth:`AnnotationIndex.remove_edge`, and the groupings are only right as
+    long as they are. A graph whose number of edges no longer matches the index is noticed, and the functions log a
+    warning and scan it instead, but a replaced edge or annotations changed in place aren't. Attach a new index after
+    such edits.
+
+    >>> from pybel.examples import sialic_acid_graph
+    >>> from pybel_tools.selection import group_nodes_by_annotation
+    >>> index = attach_annotation_index(sialic_acid_graph)
+    >>> groups = group_nodes_by_annotation(sialic_acid_graph, 'Species')  # answered from the index
+    >>> detach_annotation_index(sialic_acid_graph)
+    """
+    rv = _attached_indexes[graph] = AnnotationIndex.from_graph(graph)
+    return rv
+
+
+def get_annotation_index(graph: BELGraph) -> Optional['AnnotationIndex']:
+    """Get the annotation index attached to the graph, if there is one."""
+    return _attached_indexes.get(graph)
+
+
+def detach_annotation_index(graph: BELGraph) -> None:
+    """Remove the annotation index attached to the graph, if there is one."""
+    _attached_indexes.pop(graph, None)
+
+
+def get_current_annotation_index(graph: BELGraph) -> Optional['AnnotationIndex']:
+    """Get the annotation index attached to the graph, unless its number of edges shows it's out of date."""
+    index = _attached_indexes.get(graph)
+    if index is None:
+        return None
+    if index.number_edges != graph.number_of_edges():
+        logger.warning('the annotation index attached to %s is out of date. scanning its edges instead', graph)
+        return None
+    return index
+
+
+def iterate_annotated_edges(
+    graph: BELGraph,
+    annotation: str,
+) -> Iterable[Tuple[Entity, BaseEntity, BaseEntity, str, EdgeData]]:
+    """Iterate over the value, source, target, key, and data of each edge for each of its values of the annotation.
+
+    Answers from the annotation index attached to the graph, if there is one.
+    """
+    index = get_current_annotation_index(graph)
+    if index is not None:
+        return index.iterate_edges(annotation)
+
+    return (
+        (value, u, v, key, data)
+        for u, v, key, data in graph.edges(keys=True, data=True)
+        if edge_has_annotation(data, annotation)
+        for value in data[ANNOTATIONS][annotation]
+    )
+
+
+def ensure_annotation_value(annotation: str, value: Union[str, Entity]) -> Entity:
+    """Get the annotation value as it's stored in edges' data dictionaries."""
+    if isinstance(value, str):
+        return Entity(namespace=annotation, identifier=value)
+    return value
+
+
+class AnnotationIndex:
+    """Inverted maps from each value of each annotation to the edges with it and the nodes in those edges.
+
+    It's built in one pass over the edges with :meth:`from_graph`. Afterwards, grouping the graph by an annotation
+    only looks at the edges that have it.
+    """
+
+    def __init__(self) -> None:
+        """Build an empty index. Use :meth:`from_graph` to index an existing graph."""
+        #: The data dictionary of each indexed edge
+        self._edge_data: Dict[EdgeKey, EdgeData] = {}
+        #: The edges with each value of each annotation
+        self._edges: Dict[str, Dict[Entity, Set[EdgeKey]]] = defaultdict(lambda: defaultdict(set))
+        #: The number of edges each node is in, for each value of each annotation
+        self._nodes: Dict[str, Dict[Entity, typing.Counter[BaseEntity]]] = defaultdict(lambda: defaultdict(Counter))
+
+    @classmethod
+    def from_graph(cls, graph: BELGraph) -> 'AnnotationIndex':
+        """Build an index of all edges in the graph."""
+        rv = cls()
+        for u, v, key, data in graph.edges(keys=True, data=True):
+            rv.add_edge(u, v, key, data)
+        return rv
+
+    @property
+    def number_edges(self) -> int:
+        """Get the number of indexed edges, including the ones without annotations."""
+        return len(self._edge_data)
+
+    def add_edge(self, u: BaseEntity, v: BaseEntity, key: str, data: EdgeData) -> None:
+        """Update the index after an edge is added to the graph."""
+        self._edge_data[u, v, key] = data
+        for annotation, values in data.get(ANNOTATIONS, {}).items():
+            for value in values:
+                self._edges[annotation][value].add((u, v, key))
+                nodes = self._nodes[annotation][value]
+                nodes[u] += 1
+                nodes[v] += 1
+
+    def remove_edge(self, u: BaseEntity, v: BaseEntity, key: str) -> None:
+        """Update the index after an edge is removed from the graph.
+
+        :raises KeyError: If there's no such edge in the index
+        """
+        data = self._edge_data.pop((u, v, key))
+        for annotation, values in data.get(ANNOTATIONS, {}).items():
+            for value in values:
+                edges = self._edges[annotation][value]
+                edges.discard((u, v, key))
+                nodes = self._nodes[annotation][value]
+                for node in (u, v):
+                    nodes[node] -= 1
+                    if nodes[node] <= 0:
+                        del nodes[node]
+                if not edges:
+                    del self._edges[annotation][value]
+                    del self._nodes[annotation][value]
+            if not self._edges[annotation]:
+                del self._edges[annotation]
+                del self._nodes[annotation]
+
+    def get_annotations(self) -> Set[str]:
+        """Get the annotations used in the indexed edges."""
+        return set(self._edges)
+
+    def get_values(self, annotation: str) -> Set[Entity]:
+        """Get the values of the annotation used in the indexed edges."""
+        return set(self._edges.get(annotation, ()))
+
+    def get_edges(self, annotation: str, value: Union[str, Entity]) -> Set[EdgeKey]:
+        """Get the (source, target, key) triples of the edges with the given annotation value."""
+        value = ensure_annotation_value(annotation, value)
+        return set(self._edges.get(annotation, {}).get(value, ()))
+
+    def get_nodes(self, annotation: str, value: Union[str, Entity]) -> Set[BaseEntity]:
+        """Get the nodes in the edges with the given annotation value."""
+        value = ensure_annotation_value(annotation, value)
+        return set(self._nodes.get(annotation, {}).get(value, ()))
+
+    def iterate_edges(self, annotation: str) -> Iterable[Tuple[Entity, BaseEntity, BaseEntity, str, EdgeData]]:
+        """Iterate over the value, source, target, key, and data of the edges with each value of the annotation."""
+        for value, edges in self._edges.get(annotation, {}).items():
+            for u, v, key in edges:
+                yield value, u, v, key, self._edge_data[u, v, key]
+
+    def iterate_value_edges(
+        self,
+        annotation: str,
+        value: Union[str, Entity],
+    ) -> Iterable[Tuple[BaseEntity, BaseEntity, str, EdgeData]]:
+        """Iterate over the source, target, key, and data of the edges with the given annotation value."""
+        value = ensure_annotation_value(annotation, value)
+        for u, v, key in self._edges.get(annotation, {}).get(value, ()):
+            yield u, v, key, self._edge_data[u, v, key]
+
+    def group_nodes(self, annotation: str) -> Mapping[Entity, Set[BaseEntity]]:
+        """Group the nodes in the edges with each value of the annotation."""
+        return {
+            value: set(nodes)
+            for value, nodes in self._nodes.get(annotation, {}).items()
+        }
+
+    def group_node_pairs(self, annotation: str) -> Mapping[Entity, Set[NodePair]]:
+        """Group the (source, target) pairs of the edges with each value of the annotation."""
+        return {
+            value: {(u, v) for u, v, _ in edges}
+            for value, edges in self._edges.get(annotation, {}).items()
+        }
+
+    def count_values(self, annotation: str) -> typing.Counter[Entity]:
+        """Count the number of edges with each value of the annotation."""
+        return Counter({
+            value: len(edges)
+            for value, edges in self._edges.get(annotation, {}).items()
+        })
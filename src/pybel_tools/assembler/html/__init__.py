@@ -2,10 +2,18 @@
 
 """Generate summary pages of BEL graphs in HTML."""
 
-from .assembler import to_html, to_html_file, to_html_path
+from .assembler import (
+    clear_summary_cache, get_summary, get_summary_key, precompute_summaries, to_html, to_html_file, to_html_path,
+    to_sidecar_json_file,
+)
 
 __all__ = [
+    'get_summary',
+    'get_summary_key',
+    'clear_summary_cache',
+    'precompute_summaries',
     'to_html',
     'to_html_file',
     'to_html_path',
+    'to_sidecar_json_file',
 ]
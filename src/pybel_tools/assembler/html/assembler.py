@@ -4,19 +4,37 @@
 
 from __future__ import annotations
 
+import hashlib
+import itertools as itt
+import json
 import logging
-from typing import Optional, TextIO, Tuple
+import multiprocessing
+import os
+import pickle
+import sys
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Iterable, Mapping, Optional, TextIO, Tuple
 
+from tqdm import tqdm
+
+import pybel
 from pybel import BELGraph
+from pybel.constants import CITATION
 from pybel.dsl import BaseEntity
 from pybel.io.jinja_utils import build_template_renderer
 from ...summary import BELGraphSummary
-from ...utils import prepare_c3, prepare_c3_time_series
+from ...utils import hash_graph, prepare_c3, prepare_c3_time_series
 
 __all__ = [
     'to_html',
     'to_html_file',
     'to_html_path',
+    'to_sidecar_json_file',
+    'get_summary',
+    'get_summary_key',
+    'clear_summary_cache',
+    'precompute_summaries',
     'prepare_c3',
 ]
 
@@ -30,20 +48,92 @@ render_template.environment.globals.update(
     prepare_c3_time_series=prepare_c3_time_series,
 )
 
+#: The default maximum number of rows in the statement and warning tables
+MAX_TABLE_ROWS = 1000
+
+#: The number of summaries kept in memory by :func:`get_summary`
+SUMMARY_CACHE_SIZE = 128
+
+#: Increment this when the fields of :class:`BELGraphSummary` or the keys from :func:`get_summary_key` change so old
+#: files in cache directories are ignored
+SUMMARY_CACHE_VERSION = 2
+
+#: The file extensions of serialized graphs read by :func:`precompute_summaries`. BEL scripts are skipped since they
+#: have to be compiled first.
+PRECOMPUTE_EXTENSIONS = (
+    '.bel.nodelink.json',
+    '.bel.nodelink.json.gz',
+    '.bel.pickle',
+    '.bel.pickle.gz',
+    '.bel.gpickle',
+    '.bel.gpickle.gz',
+    '.bel.pkl',
+    '.bel.pkl.gz',
+)
+
+_summary_cache: 'OrderedDict[str, BELGraphSummary]' = OrderedDict()
+
+
+def to_html_path(
+    graph: BELGraph,
+    path: str,
+    cache_directory: Optional[str] = None,
+    max_rows: Optional[int] = MAX_TABLE_ROWS,
+) -> None:
+    """Write the graph as HTML to a file at the given path.
+
+    If any of the tables are truncated, all of their rows are written to a JSON file with the same name as the
+    HTML file (e.g., ``summary.json`` next to ``summary.html``), which the page links to.
+
+    :param graph: A BEL graph
+    :param path: The path to the HTML file
+    :param cache_directory: An optional directory of summaries, like one filled by :func:`precompute_summaries`
+    :param max_rows: The maximum number of rows in the statement and warning tables. If none, show all rows.
+    """
+    sidecar_name = None
+    if _is_truncated(graph, max_rows):
+        sidecar_path = f'{os.path.splitext(path)[0]}.json'
+        with open(sidecar_path, 'w') as file:
+            to_sidecar_json_file(graph, file)
+        sidecar_name = os.path.basename(sidecar_path)
 
-def to_html_path(graph: BELGraph, path: str) -> None:
-    """Write the graph as HTML to a file at the given path."""
     with open(path, 'w') as file:
-        to_html_file(graph, file)
+        to_html_file(graph, file, cache_directory=cache_directory, max_rows=max_rows, sidecar_name=sidecar_name)
+
+
+def to_html_file(
+    graph: BELGraph,
+    file: Optional[TextIO] = None,
+    cache_directory: Optional[str] = None,
+    max_rows: Optional[int] = MAX_TABLE_ROWS,
+    sidecar_name: Optional[str] = None,
+) -> None:
+    """Write the graph as HTML to a file.
 
+    The page is streamed to the file as it's rendered, so the whole document is never held in memory.
 
-def to_html_file(graph: BELGraph, file: Optional[TextIO] = None) -> None:
-    """Write the graph as HTML to a file."""
-    html = to_html(graph)
-    print(html, file=file)
+    :param graph: A BEL graph
+    :param file: A writable file or file-like. Defaults to stdout.
+    :param cache_directory: An optional directory of summaries, like one filled by :func:`precompute_summaries`
+    :param max_rows: The maximum number of rows in the statement and warning tables. If none, show all rows.
+    :param sidecar_name: The location of the file written by :func:`to_sidecar_json_file`, relative to the page,
+     which is linked to if any tables are truncated
+    """
+    if file is None:
+        file = sys.stdout
+
+    summary = get_summary(graph, cache_directory=cache_directory)
+    template = render_template.environment.get_template('index.html')
+    template.stream(_get_template_context(graph, summary, max_rows, sidecar_name)).dump(file)
+    print(file=file)
 
 
-def to_html(graph: BELGraph) -> str:
+def to_html(
+    graph: BELGraph,
+    cache_directory: Optional[str] = None,
+    use_cache: bool = True,
+    max_rows: Optional[int] = MAX_TABLE_ROWS,
+) -> str:
     """Render the graph as an HTML string.
 
     Common usage may involve writing to a file like:
@@ -51,22 +141,236 @@ def to_html(graph: BELGraph) -> str:
     >>> from pybel.examples import sialic_acid_graph
     >>> with open('html_output.html', 'w') as file:
     ...     print(to_html(sialic_acid_graph), file=file)
+
+    For big graphs, use :func:`to_html_path` or :func:`to_html_file` instead, which stream the page to the file.
+
+    :param graph: A BEL graph
+    :param cache_directory: An optional directory of summaries, like one filled by :func:`precompute_summaries`
+    :param use_cache: If false, always summarize the graph. See :func:`get_summary`.
+    :param max_rows: The maximum number of rows in the statement and warning tables. If none, show all rows.
     """
-    summary = BELGraphSummary.from_graph(graph)
+    summary = get_summary(graph, cache_directory=cache_directory, use_cache=use_cache)
+    return render_template('index.html', **_get_template_context(graph, summary, max_rows))
 
+
+def to_sidecar_json_file(graph: BELGraph, file: TextIO) -> None:
+    """Write all rows of the statement and warning tables as JSON, one row at a time.
+
+    The result is an object with the keys ``statements`` and ``warnings``, each a list of objects with the columns
+    of the corresponding table on the HTML page.
+    """
+    print('{"statements": ', end='', file=file)
+    _dump_json_list(
+        (
+            dict(citation=curie, bel=bel)
+            for curie, bel in _iterate_statements(graph)
+        ),
+        file,
+    )
+    print(', "warnings": ', end='', file=file)
+    _dump_json_list(
+        (
+            dict(path=path, line_number=exc.line_number, line=exc.line, message=str(exc))
+            for path, exc, _ in graph.warnings
+        ),
+        file,
+    )
+    print('}', file=file)
+
+
+def _dump_json_list(items: Iterable[Any], file: TextIO) -> None:
+    print('[', end='', file=file)
+    for i, item in enumerate(items):
+        if i:
+            print(', ', end='', file=file)
+        json.dump(item, file)
+    print(']', end='', file=file)
+
+
+def _get_template_context(
+    graph: BELGraph,
+    summary: BELGraphSummary,
+    max_rows: Optional[int],
+    sidecar_name: Optional[str] = None,
+) -> Mapping[str, Any]:
+    """Get the variables for the template. The table rows are generators, so they're only built while rendering."""
     confidence_data = [
         (label, summary.confidence_count.get(label, 0))
         for label in CONFIDENCES
     ]
 
-    return render_template(
-        'index.html',
+    return dict(
         graph=graph,
         summary=summary,
         confidence_data=confidence_data,
+        max_rows=max_rows,
+        sidecar_name=sidecar_name,
+        number_statements=_count_statements(graph),
+        statements=itt.islice(_iterate_statements(graph), max_rows),
+        warnings=itt.islice(graph.warnings, max_rows),
     )
 
 
+def _is_truncated(graph: BELGraph, max_rows: Optional[int]) -> bool:
+    return max_rows is not None and max(_count_statements(graph), len(graph.warnings)) > max_rows
+
+
+def _count_statements(graph: BELGraph) -> int:
+    return sum(
+        1
+        for _, _, data in graph.edges(data=True)
+        if data.get(CITATION)
+    )
+
+
+def _iterate_statements(graph: BELGraph) -> Iterable[Tuple[str, str]]:
+    """Iterate over the reference and BEL of each edge with a citation."""
+    for u, v, data in graph.edges(data=True):
+        citation = data.get(CITATION)
+        if citation:
+            yield citation.curie, graph.edge_to_bel(u, v, data)
+
+
+def get_summary(
+    graph: BELGraph,
+    cache_directory: Optional[str] = None,
+    use_cache: bool = True,
+) -> BELGraphSummary:
+    """Get the summary rendered by :func:`to_html`, reusing previous results for identical graphs.
+
+    The results are keyed by :func:`get_summary_key`, so modifying the graph afterwards invalidates its entry.
+    The :data:`SUMMARY_CACHE_SIZE` most recently used summaries are kept in memory.
+    If a cache directory is given, summaries are also looked up there and written there after being calculated.
+
+    :param graph: A BEL graph
+    :param cache_directory: An optional directory of summaries. They're stored as pickles, so only use directories
+     you trust.
+    :param use_cache: If false, always summarize the graph and don't store the result.
+    :return: The summary. Treat it as read-only since it's shared between calls.
+    """
+    if not use_cache:
+        return _summarize(graph)
+
+    key = get_summary_key(graph)
+    rv = _summary_cache.get(key)
+    if rv is not None:
+        _summary_cache.move_to_end(key)
+        return rv
+
+    if cache_directory is None:
+        rv = _summarize(graph)
+    else:
+        rv = _get_or_write_summary(graph, key, cache_directory)
+
+    _summary_cache[key] = rv
+    while len(_summary_cache) > SUMMARY_CACHE_SIZE:
+        _summary_cache.popitem(last=False)
+
+    return rv
+
+
+def get_summary_key(graph: BELGraph) -> str:
+    """Calculate the key of the graph's summary in the caches used by :func:`get_summary`.
+
+    Besides the nodes and edges hashed by :func:`pybel_tools.utils.hash_graph`, it covers the warnings and the
+    defined namespaces and annotations, since the summary reports errors and unused namespaces and annotations.
+    """
+    data = [
+        hash_graph(graph),
+        sorted(graph.defined_namespace_keywords),
+        sorted(graph.defined_annotation_keywords),
+        {
+            annotation: sorted(values, key=str)
+            for annotation, values in graph.annotation_list.items()
+        },
+        [
+            (path, exc.__class__.__name__, exc.line_number, exc.position, exc.line, str(exc), context)
+            for path, exc, context in graph.warnings
+        ],
+    ]
+    return hashlib.md5(  # noqa: S303
+        json.dumps(data, sort_keys=True, default=str).encode('utf-8'),
+    ).hexdigest()
+
+
+def clear_summary_cache() -> None:
+    """Clear the in-memory cache used by :func:`get_summary`. Cache directories aren't affected."""
+    _summary_cache.clear()
+
+
+def precompute_summaries(
+    directory: str,
+    cache_directory: str,
+    n_jobs: Optional[int] = None,
+    use_tqdm: bool = False,
+) -> Mapping[str, str]:
+    """Summarize each graph in a directory and store the results in the cache directory.
+
+    Graphs whose summaries are already in the cache directory aren't summarized again, so this can be run again
+    after some of the graphs change. Afterwards, pass the same cache directory to :func:`to_html`.
+
+    :param directory: A directory of graphs with any of the extensions in :data:`PRECOMPUTE_EXTENSIONS`
+    :param cache_directory: The directory in which summaries are stored
+    :param n_jobs: The number of processes to use. If none or 1, run in this process. If -1, use all cores.
+    :param use_tqdm: If true, show a progress bar
+    :return: A dictionary from the path of each graph to the key of its summary from :func:`get_summary_key`
+    """
+    paths = [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.endswith(PRECOMPUTE_EXTENSIONS)
+    ]
+    os.makedirs(cache_directory, exist_ok=True)
+
+    if n_jobs is None or n_jobs == 1 or len(paths) <= 1:
+        it = (_precompute_summary(path, cache_directory) for path in paths)
+        if use_tqdm:
+            it = tqdm(it, total=len(paths), desc='Summarizing graphs')
+        return dict(it)
+
+    processes = None if n_jobs < 1 else min(n_jobs, len(paths))
+    with multiprocessing.Pool(processes=processes) as pool:
+        it = pool.imap(partial(_precompute_summary, cache_directory=cache_directory), paths)
+        if use_tqdm:
+            it = tqdm(it, total=len(paths), desc='Summarizing graphs')
+        return dict(it)
+
+
+def _precompute_summary(path: str, cache_directory: str) -> Tuple[str, str]:
+    graph = pybel.load(path)
+    key = get_summary_key(graph)
+    _get_or_write_summary(graph, key, cache_directory)
+    return path, key
+
+
+def _summarize(graph: BELGraph) -> BELGraphSummary:
+    # The template only shows the number of unstable motifs, so they're counted without building each set
+    return BELGraphSummary.from_graph(graph, materialize_stability=False)
+
+
+def _get_summary_path(cache_directory: str, key: str) -> str:
+    return os.path.join(cache_directory, f'{key}.v{SUMMARY_CACHE_VERSION}.summary.pickle')
+
+
+def _get_or_write_summary(graph: BELGraph, key: str, cache_directory: str) -> BELGraphSummary:
+    """Read the graph's summary from the cache directory, or calculate it then move its file into place."""
+    path = _get_summary_path(cache_directory, key)
+    if os.path.exists(path):
+        with open(path, 'rb') as file:
+            return pickle.load(file)  # noqa: S301
+
+    rv = _summarize(graph)
+
+    # Several processes might write the same summary, so each uses its own temporary file
+    os.makedirs(cache_directory, exist_ok=True)
+    temporary_path = f'{path}.{os.getpid()}.tmp'
+    with open(temporary_path, 'wb') as file:
+        pickle.dump(rv, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, path)
+
+    return rv
+
+
 # def get_network_summary_dict(graph: BELGraph) -> Mapping:
 #     """Create a summary dictionary."""
 #     summary = BELGraphSummary.from_graph(graph)
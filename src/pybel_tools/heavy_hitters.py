@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+"""Approximate counts of the most common items in a stream, in bounded memory, with the Space-Saving algorithm.
+
+At most a fixed number of items are counted. When a new item arrives and the summary is full, it replaces the item
+with the smallest count and inherits that count, which is remembered as its possible error. Each count is therefore
+an upper bound of the item's true count, and is too large by at most the number of items seen divided by the capacity.
+Every item seen more often than that is guaranteed to be in the summary.
+"""
+
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+__all__ = [
+    'SpaceSaving',
+]
+
+
+class SpaceSaving:
+    """A summary of the most common items in a stream.
+
+    >>> summary = SpaceSaving(capacity=2)
+    >>> summary.update('aabac')
+    >>> summary.most_common()
+    [('a', 3), ('c', 2)]
+    >>> summary.get_error('c')
+    1
+    """
+
+    def __init__(self, capacity: int) -> None:
+        """Build an empty summary.
+
+        :param capacity: The largest number of items to count
+        :raises ValueError: If the capacity isn't positive
+        """
+        if capacity < 1:
+            raise ValueError(f'capacity must be positive: {capacity}')
+
+        self.capacity = capacity
+        #: The number of items seen
+        self.total = 0
+
+        self._counts: Dict[Hashable, int] = {}
+        self._errors: Dict[Hashable, int] = {}
+        #: The items with each count, so the one with the smallest count is found without a pass over all of them
+        self._buckets: Dict[int, Dict[Hashable, None]] = defaultdict(dict)
+        self._min_count = 0
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self._counts)
+
+    def __contains__(self, item: Hashable) -> bool:  # noqa: D105
+        return item in self._counts
+
+    def add(self, item: Hashable) -> None:
+        """Count an item."""
+        self.total += 1
+
+        count = self._counts.get(item)
+        if count is not None:
+            self._move(item, count)
+            return
+
+        if len(self._counts) < self.capacity:
+            self._counts[item] = 1
+            self._errors[item] = 0
+            self._buckets[1][item] = None
+            self._min_count = 1
+            return
+
+        # Replace one of the items with the smallest count
+        bucket = self._buckets[self._min_count]
+        evicted = next(iter(bucket))
+        del self._counts[evicted]
+        del self._errors[evicted]
+        del bucket[evicted]
+
+        self._counts[item] = self._min_count
+        self._errors[item] = self._min_count
+        bucket[item] = None
+        self._move(item, self._min_count)
+
+    def _move(self, item: Hashable, count: int) -> None:
+        """Increment the count of a tracked item."""
+        bucket = self._buckets[count]
+        del bucket[item]
+        if not bucket:
+            del self._buckets[count]
+            if count == self._min_count:
+                self._min_count = count + 1
+
+        self._counts[item] = count + 1
+        self._buckets[count + 1][item] = None
+
+    def update(self, items: Iterable[Hashable]) -> None:
+        """Count each of the items."""
+        for item in items:
+            self.add(item)
+
+    def get_count(self, item: Hashable) -> int:
+        """Get an upper bound of the number of times the item was seen.
+
+        For items that aren't counted, this is the smallest count if the summary is full, or else zero.
+        """
+        count = self._counts.get(item)
+        if count is not None:
+            return count
+        return self._min_count if len(self._counts) == self.capacity else 0
+
+    def get_error(self, item: Hashable) -> int:
+        """Get how much larger the item's count might be than the number of times it was seen."""
+        return self._errors.get(item, self.get_count(item))
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[Hashable, int]]:
+        """List the ``n`` items with the largest counts and their counts, like :meth:`collections.Counter.most_common`.
+
+        :param n: The number of items to list. If none, lists all counted items.
+        """
+        rv = sorted(self._counts.items(), key=lambda pair: pair[1], reverse=True)
+        return rv if n is None else rv[:n]
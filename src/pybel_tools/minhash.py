@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+"""Approximate searches for similar sets with MinHash signatures and locality-sensitive hashing (LSH).
+
+Each set is summarized by a MinHash signature, in which each position is the smallest value of a different random
+hash function over the elements of the set. Two sets have the same value in a position with probability equal to
+their tanimoto similarity. The signatures are cut into bands, and only sets that have the same values in all positions
+of at least one band are compared exactly, so pairs of dissimilar sets are rarely looked at.
+"""
+
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Set, Tuple
+
+import numpy as np
+
+from .utils import tanimoto_set_similarity
+
+__all__ = [
+    'MINHASH_PERMUTATIONS',
+    'MINHASH_CACHE_SIZE',
+    'MinHashLSH',
+    'choose_number_bands',
+]
+
+#: The default number of hash functions in each MinHash signature
+MINHASH_PERMUTATIONS = 128
+
+#: The default number of elements whose hashes are kept by each index
+MINHASH_CACHE_SIZE = 2 ** 16
+
+#: The largest prime below 2 ** 32. The hash functions are (a * x + b) mod this prime, with a, b, and x all below
+#: 2 ** 32 so the products fit in unsigned 64-bit integers.
+_PRIME = 4294967291
+_MAX_HASH = 2 ** 32 - 1
+
+# NumPy 2.0 renamed trapz to trapezoid
+_trapezoid = np.trapezoid if hasattr(np, 'trapezoid') else np.trapz
+
+
+class MinHashLSH:
+    """An index of sets that finds the ones at least as similar as a threshold to a query set.
+
+    >>> index = MinHashLSH(threshold=0.5, seed=0)
+    >>> index.add('a', {1, 2, 3, 4})
+    >>> index.add('b', {5, 6, 7, 8})
+    >>> index.search({1, 2, 3})
+    {'a': 0.75}
+
+    Pairs less similar than the threshold are never returned, since each candidate is checked with
+    :func:`pybel_tools.utils.tanimoto_set_similarity`. Pairs that are more similar might be missed, with a probability
+    that shrinks quickly as their similarity grows past the threshold.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.5,
+        number_permutations: int = MINHASH_PERMUTATIONS,
+        number_bands: Optional[int] = None,
+        seed: Optional[int] = None,
+        cache_size: int = MINHASH_CACHE_SIZE,
+    ) -> None:
+        """Build an empty index.
+
+        :param threshold: The smallest tanimoto similarity of the sets to return
+        :param number_permutations: The number of hash functions in each signature. More find more of the similar
+         sets, but take longer.
+        :param number_bands: The number of bands the signatures are cut into. Defaults to the number chosen by
+         :func:`choose_number_bands`. Must divide the number of permutations.
+        :param seed: The seed for choosing the hash functions
+        :param cache_size: The number of elements whose hashes are kept. The oldest are dropped first.
+        :raises ValueError: If the threshold isn't between zero and one or the bands don't divide the permutations
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError(f'threshold must be above 0 and at most 1: {threshold}')
+
+        if number_bands is None:
+            number_bands = choose_number_bands(threshold, number_permutations)
+        elif number_permutations % number_bands:
+            raise ValueError(f'{number_bands} bands do not divide {number_permutations} permutations')
+
+        self.threshold = threshold
+        self.number_bands = number_bands
+        self.rows = number_permutations // number_bands
+
+        random_state = np.random.RandomState(seed)
+        self._a = random_state.randint(1, _PRIME, size=(number_permutations, 1), dtype=np.uint64)
+        self._b = random_state.randint(0, _PRIME, size=(number_permutations, 1), dtype=np.uint64)
+
+        #: The keys of the sets in each bucket of each band
+        self._buckets: List[Dict[bytes, List[Hashable]]] = [defaultdict(list) for _ in range(number_bands)]
+        self._sets: Dict[Hashable, Set] = {}
+        #: The hash of each recently hashed element, keyed by its identity since hashing BEL nodes is slow. The
+        #: elements are kept so their identities aren't reused while they're cached.
+        self._hashes: Dict[int, Tuple[Hashable, int]] = {}
+        self._cache_size = cache_size
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self._sets)
+
+    def get_signature(self, elements: Iterable[Hashable]) -> np.ndarray:
+        """Calculate the MinHash signature of the elements."""
+        hashes = np.fromiter((self._hash(element) for element in elements), dtype=np.uint64)
+        if not len(hashes):
+            return np.full(len(self._a), _PRIME, dtype=np.uint64)
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1)
+
+    def _hash(self, element: Hashable) -> int:
+        rv = self._hashes.get(id(element))
+        if rv is None:
+            rv = self._hashes[id(element)] = element, hash(element) & _MAX_HASH
+            if len(self._hashes) > self._cache_size:
+                del self._hashes[next(iter(self._hashes))]
+        return rv[1]
+
+    def _iterate_bands(self, signature: np.ndarray) -> Iterable[bytes]:
+        for start in range(0, len(signature), self.rows):
+            yield signature[start:start + self.rows].tobytes()
+
+    def add(self, key: Hashable, elements: Iterable[Hashable]) -> None:
+        """Add a set to the index.
+
+        :raises KeyError: If there's already a set with the key
+        """
+        if key in self._sets:
+            raise KeyError(f'already indexed: {key}')
+
+        elements = self._sets[key] = set(elements)
+        for buckets, band in zip(self._buckets, self._iterate_bands(self.get_signature(elements))):
+            buckets[band].append(key)
+
+    def get_candidates(self, elements: Iterable[Hashable]) -> Set[Hashable]:
+        """Get the keys of the sets that share a band of their signature with the elements' signature."""
+        return {
+            key
+            for buckets, band in zip(self._buckets, self._iterate_bands(self.get_signature(elements)))
+            for key in buckets.get(band, ())
+        }
+
+    def search(self, elements: Iterable[Hashable]) -> Mapping[Hashable, float]:
+        """Get the tanimoto similarities of the indexed sets at least as similar to the elements as the threshold."""
+        elements = set(elements)
+        rv = {}
+        for key in self.get_candidates(elements):
+            similarity = tanimoto_set_similarity(elements, self._sets[key])
+            if self.threshold <= similarity:
+                rv[key] = similarity
+        return rv
+
+
+def choose_number_bands(
+    threshold: float,
+    number_permutations: int = MINHASH_PERMUTATIONS,
+    false_negative_weight: float = 0.9,
+) -> int:
+    """Choose the number of bands that best separates the sets above and below the similarity threshold.
+
+    With ``b`` bands of ``r`` rows, sets with tanimoto similarity ``s`` share at least one band with probability
+    ``1 - (1 - s ** r) ** b``. The number of bands dividing the number of permutations is chosen to minimize the
+    weighted areas under this curve below the threshold, where dissimilar sets are compared for nothing, and above the
+    curve above the threshold, where similar sets are missed.
+
+    :param threshold: The smallest tanimoto similarity of the sets to find
+    :param number_permutations: The number of hash functions in each signature
+    :param false_negative_weight: How much more to avoid missing similar sets than comparing dissimilar ones, from zero
+     to one
+    """
+    similarities = np.linspace(0.0, 1.0, 1001)
+    below = similarities < threshold
+
+    best_bands, best_error = number_permutations, np.inf
+    for number_bands in range(1, number_permutations + 1):
+        if number_permutations % number_bands:
+            continue
+        rows = number_permutations // number_bands
+        probability = 1.0 - (1.0 - similarities ** rows) ** number_bands
+        false_positives = _trapezoid(np.where(below, probability, 0.0), similarities)
+        false_negatives = _trapezoid(np.where(below, 0.0, 1.0 - probability), similarities)
+        error = (1.0 - false_negative_weight) * false_positives + false_negative_weight * false_negatives
+        if error < best_error:
+            best_bands, best_error = number_bands, error
+
+    return best_bands
@@ -18,7 +18,7 @@ from pybel.struct.mutation import collapse_nodes, collapse_pair, collapse_to_gen
 from pybel.struct.pipeline import in_place_transformation, transformation
 from pybel.typing import Strings
 from ..filters.edge_filters import build_source_namespace_filter, build_target_namespace_filter
-from ..summary.edge_summary import pair_is_consistent
+from ..summary.relation_index import build_relation_index, get_relation_index, mask_is_consistent
 
 __all__ = [
     'collapse_nodes',
@@ -188,15 +188,21 @@ def collapse_consistent_edges(graph: BELGraph):
 
     .. warning:: This operation doesn't preserve evidences or other annotations
     """
-    for u, v in graph.edges():
-        relation = pair_is_consistent(graph, u, v)
-
-        if not relation:
-            continue
+    index = get_relation_index(graph)
+    consistent_pairs = [
+        (u, v, mask_is_consistent(mask))
+        for u, v, mask in build_relation_index(graph).iterate_masks()
+        if mask_is_consistent(mask)
+    ]
 
+    for u, v, relation in consistent_pairs:
         edges = [(u, v, k) for k in graph[u][v]]
         graph.remove_edges_from(edges)
-        graph.add_edge(u, v, attr_dict={RELATION: relation})
+        key = graph.add_unqualified_edge(u, v, relation)
+        if index is not None:
+            for edge in edges:
+                index.remove_edge(*edge)
+            index.add_edge(u, v, key, graph[u][v][key])
 
 
 @transformation
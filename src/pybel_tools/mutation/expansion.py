@@ -5,7 +5,7 @@
 import logging
 import typing
 from collections import Counter, defaultdict
-from typing import Collection, Iterable, Optional, Tuple
+from typing import Collection, Iterable, Optional, Tuple, Union
 
 import pybel.struct.mutation.expansion.neighborhood
 from pybel import BELGraph
@@ -16,7 +16,9 @@ from pybel.struct.filters.edge_predicates import edge_has_annotation, is_causal_
 from pybel.struct.filters.node_predicates import true_node_predicate
 from pybel.struct.filters.typing import EdgeIterator, EdgePredicates, NodePredicates
 from pybel.struct.pipeline import uni_in_place_transformation
+from pybel.language import Entity
 from pybel.typing import EdgeData
+from ..annotation_index import ensure_annotation_value, get_current_annotation_index
 
 __all__ = [
     'get_peripheral_successor_edges',
@@ -100,15 +102,18 @@ def count_peripheral_predecessors(graph: BELGraph, subgraph: BELGraph) -> typing
 def get_subgraph_edges(
     graph: BELGraph,
     annotation: str,
-    value: str,
+    value: Union[str, Entity],
     source_filter: Optional[NodePredicates] = None,
     target_filter: Optional[NodePredicates] = None,
 ) -> Iterable[Tuple[BaseEntity, BaseEntity, str, EdgeData]]:
     """Get all edges from a given subgraph whose source and target nodes pass all of the given filters.
 
+    Only the edges with the annotation value are checked if the graph has an annotation index attached with
+    :func:`pybel_tools.annotation_index.attach_annotation_index`.
+
     :param graph: A BEL graph
     :param annotation:  The annotation to search
-    :param value: The annotation value to search by
+    :param value: The annotation value to search by, or its identifier
     :param source_filter: Optional filter for source nodes (graph, node) -> bool
     :param target_filter: Optional filter for target nodes (graph, node) -> bool
     :return: An iterable of (source node, target node, key, data) for all edges that match the annotation/value and
@@ -120,10 +125,20 @@ def get_subgraph_edges(
     if target_filter is None:
         target_filter = true_node_predicate
 
-    for u, v, k, data in graph.edges(keys=True, data=True):
-        if not edge_has_annotation(data, annotation):
-            continue
-        if data[ANNOTATIONS][annotation] == value and source_filter(graph, u) and target_filter(graph, v):
+    value = ensure_annotation_value(annotation, value)
+
+    index = get_current_annotation_index(graph)
+    if index is not None:
+        edges = index.iterate_value_edges(annotation, value)
+    else:
+        edges = (
+            (u, v, k, data)
+            for u, v, k, data in graph.edges(keys=True, data=True)
+            if edge_has_annotation(data, annotation) and value in data[ANNOTATIONS][annotation]
+        )
+
+    for u, v, k, data in edges:
+        if source_filter(graph, u) and target_filter(graph, v):
             yield u, v, k, data
 
 
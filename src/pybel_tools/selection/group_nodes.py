@@ -11,6 +11,7 @@ from pybel.dsl import BaseConcept
 from pybel.struct.filters import concatenate_node_predicates
 from pybel.struct.filters.edge_predicates import edge_has_annotation
 from pybel.struct.filters.typing import NodePredicates
+from ..annotation_index import get_current_annotation_index
 from ..utils import group_as_sets
 
 __all__ = [
@@ -27,15 +28,24 @@ def group_nodes_by_annotation(
     graph: BELGraph,
     annotation: str = 'Subgraph',
 ) -> Mapping[str, Set[BaseEntity]]:
-    """Group the nodes occurring in edges by the given annotation."""
+    """Group the nodes occurring in edges by the given annotation.
+
+    Answers from the annotation index attached to the graph with
+    :func:`pybel_tools.annotation_index.attach_annotation_index`, if there is one.
+    """
+    index = get_current_annotation_index(graph)
+    if index is not None:
+        return index.group_nodes(annotation)
+
     result = defaultdict(set)
 
     for u, v, d in graph.edges(data=True):
         if not edge_has_annotation(d, annotation):
             continue
 
-        result[d[ANNOTATIONS][annotation]].add(u)
-        result[d[ANNOTATIONS][annotation]].add(v)
+        for value in d[ANNOTATIONS][annotation]:
+            result[value].add(u)
+            result[value].add(v)
 
     return dict(result)
 
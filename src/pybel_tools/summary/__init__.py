@@ -10,8 +10,12 @@ from .composite_summary import *  # noqa: F401,F403
 from .contradictions import *  # noqa: F401,F403
 from .edge_summary import *  # noqa: F401,F403
 from .error_summary import *  # noqa: F401,F403
+from .keyword_index import *  # noqa: F401,F403
 from .node_properties import *  # noqa: F401,F403
 from .provenance import *  # noqa: F401,F403
+from .relation_index import *  # noqa: F401,F403
+from .signed_adjacency import *  # noqa: F401,F403
 from .stability import *  # noqa: F401,F403
+from .stability_index import *  # noqa: F401,F403
 from .subgraph_summary import *  # noqa: F401,F403
 from .visualization import *  # noqa: F401,F403
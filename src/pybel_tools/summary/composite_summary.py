@@ -6,25 +6,29 @@ from __future__ import annotations
 
 import collections
 from dataclasses import dataclass
-from typing import Counter, List, Mapping, Set, Tuple
+from typing import Any, Counter, Dict, Iterable, List, Mapping, Optional, Set, Tuple
 
 from dataclasses_json import dataclass_json
 
 from pybel import BELGraph, BaseAbundance, BaseEntity
-from pybel.constants import IDENTIFIER, NAME
-from pybel.struct.graph import WarningTuple
-from pybel.struct.summary import (
-    get_naked_names, get_syntax_errors, get_top_hubs, get_top_pathologies, get_unused_annotations,
-    get_unused_list_annotation_values, get_unused_namespaces,
+from pybel.constants import (
+    ACTIVITY, ANNOTATIONS, CITATION, CITATION_AUTHORS, CITATION_DATE, DEGRADATION, EFFECT, FROM_LOC, IDENTIFIER,
+    KIND, LOCATION, MODIFIER, NAME, RELATION, SOURCE_MODIFIER, TARGET_MODIFIER, TO_LOC, TRANSLOCATION, VARIANTS,
 )
-from .error_summary import (
-    get_most_common_errors, get_namespaces_with_incorrect_names, get_undefined_annotations, get_undefined_namespaces,
+from pybel.dsl import Pathology
+from pybel.exceptions import (
+    BELSyntaxError, MissingNamespaceNameWarning, MissingNamespaceRegexWarning, NakedNameWarning,
+    UndefinedAnnotationWarning, UndefinedNamespaceWarning,
 )
-from .provenance import count_confidences, get_citation_years
+from pybel.language import Entity
+from pybel.struct.filters.utils import part_has_modifier
+from pybel.struct.graph import WarningTuple
+from pybel.struct.summary import iterate_node_entities
+from .provenance import _ensure_datetime, create_timeline
+from .signed_adjacency import DECREASE, INCREASE, compile_signed_adjacency, count_stability, estimate_stability
 from .stability import (
-    get_chaotic_pairs, get_contradiction_summary, get_dampened_pairs, get_decrease_mismatch_triplets,
-    get_increase_mismatch_triplets, get_jens_unstable, get_mutually_unstable_correlation_triples, get_regulatory_pairs,
-    get_separate_unstable_correlation_triples,
+    get_contradiction_summary, get_decrease_mismatch_triplets, get_increase_mismatch_triplets, get_jens_unstable,
+    get_mutually_unstable_correlation_triples, get_separate_unstable_correlation_triples,
 )
 from ..typing import SetOfNodePairs, SetOfNodeTriples
 from ..utils import prepare_c3, prepare_c3_time_series
@@ -63,61 +67,76 @@ class BELGraphSummary:
     hub_data: Counter[BaseEntity]
     disease_data: Counter[BaseEntity]
 
-    # Node pairs
-    regulatory_pairs: SetOfNodePairs
-    chaotic_pairs: SetOfNodePairs
-    dampened_pairs: SetOfNodePairs
-    contradictory_pairs: SetOfNodePairs
+    # Node pairs (none unless materialized)
+    regulatory_pairs: Optional[SetOfNodePairs]
+    chaotic_pairs: Optional[SetOfNodePairs]
+    dampened_pairs: Optional[SetOfNodePairs]
+    contradictory_pairs: Optional[SetOfNodePairs]
 
-    # Node triplets
-    separate_unstable_correlation_triples: SetOfNodeTriples
-    mutually_unstable_correlation_triples: SetOfNodeTriples
-    jens_unstable: SetOfNodeTriples
-    increase_mismatch_triplets: SetOfNodeTriples
-    decrease_mismatch_triplets: SetOfNodeTriples
+    # Node triplets (none unless materialized)
+    separate_unstable_correlation_triples: Optional[SetOfNodeTriples]
+    mutually_unstable_correlation_triples: Optional[SetOfNodeTriples]
+    jens_unstable: Optional[SetOfNodeTriples]
+    increase_mismatch_triplets: Optional[SetOfNodeTriples]
+    decrease_mismatch_triplets: Optional[SetOfNodeTriples]
 
     # Bibliometrics
     citation_years: List[Tuple[int, int]]
     confidence_count: Counter[str]
 
+    # Stability counts from :func:`pybel_tools.summary.summarize_stability`, which might be estimates
+    stability_count: Optional[Mapping[str, float]] = None
+    # Standard errors of the stability counts, if they were estimated
+    stability_standard_error: Optional[Mapping[str, float]] = None
+
     @staticmethod
-    def from_graph(graph: BELGraph) -> BELGraphSummary:
-        """Create a summary of the graph."""
+    def from_graph(
+        graph: BELGraph,
+        materialize_stability: bool = False,
+        stability_sample_size: Optional[int] = None,
+        seed: Optional[int] = None,
+    ) -> BELGraphSummary:
+        """Create a summary of the graph.
+
+        :param graph: A BEL graph
+        :param materialize_stability: If true, also build the sets of node pairs and triples. By default, they're
+         left as none and only counted in :attr:`stability_count`, which avoids holding millions of tuples in memory
+         for dense graphs. The pairs come from the same compiled graph as the counts, but each set of triples takes
+         another pass over the graph.
+        :param stability_sample_size: If given, estimate the stability counts from a random sample of this many
+         nodes with :func:`pybel_tools.summary.estimate_stability_summary` instead of counting them exactly
+        :param seed: The seed for the random number generator used for sampling
+        """
+        adjacency = compile_signed_adjacency(graph)
+        if materialize_stability:
+            stability_sets = dict(
+                regulatory_pairs=adjacency.get_mutual_pairs(INCREASE, DECREASE),
+                chaotic_pairs=adjacency.get_mutual_pairs(INCREASE, INCREASE, ordered=False),
+                dampened_pairs=adjacency.get_mutual_pairs(DECREASE, DECREASE, ordered=False),
+                contradictory_pairs=get_contradiction_summary(graph),
+                separate_unstable_correlation_triples=get_separate_unstable_correlation_triples(graph),
+                mutually_unstable_correlation_triples=get_mutually_unstable_correlation_triples(graph),
+                jens_unstable=get_jens_unstable(graph),
+                increase_mismatch_triplets=get_increase_mismatch_triplets(graph),
+                decrease_mismatch_triplets=get_decrease_mismatch_triplets(graph),
+            )
+        else:
+            stability_sets = dict.fromkeys(_STABILITY_SET_FIELDS)
+
+        if stability_sample_size is None:
+            stability_count = count_stability(adjacency)
+            stability_standard_error = None
+        else:
+            estimates = estimate_stability(adjacency, sample_size=stability_sample_size, seed=seed)
+            stability_count = {label: estimate.estimate for label, estimate in estimates.items()}
+            stability_standard_error = {label: estimate.standard_error for label, estimate in estimates.items()}
+
         return BELGraphSummary(
-            # Attribute counters
-            function_count=graph.count.functions(),
-            modifications_count=graph.count.modifications(),
-            relation_count=graph.count.relations(),
-            authors_count=graph.count.authors(),
-            variants_count=graph.count.variants(),
-            namespaces_count=graph.count.namespaces(),
-            # Errors
-            undefined_namespaces=get_undefined_namespaces(graph),
-            undefined_annotations=get_undefined_annotations(graph),
-            namespaces_with_incorrect_names=get_namespaces_with_incorrect_names(graph),
-            unused_namespaces=get_unused_namespaces(graph),
-            unused_annotations=get_unused_annotations(graph),
-            unused_list_annotation_values=get_unused_list_annotation_values(graph),
-            naked_names=get_naked_names(graph),
-            error_count=graph.count.error_types(),
-            error_groups=get_most_common_errors(graph),
-            syntax_errors=get_syntax_errors(graph),
-            # Node pairs
-            regulatory_pairs=get_regulatory_pairs(graph),
-            chaotic_pairs=get_chaotic_pairs(graph),
-            dampened_pairs=get_dampened_pairs(graph),
-            contradictory_pairs=get_contradiction_summary(graph),
-            separate_unstable_correlation_triples=get_separate_unstable_correlation_triples(graph),
-            mutually_unstable_correlation_triples=get_mutually_unstable_correlation_triples(graph),
-            jens_unstable=get_jens_unstable(graph),
-            increase_mismatch_triplets=get_increase_mismatch_triplets(graph),
-            decrease_mismatch_triplets=get_decrease_mismatch_triplets(graph),
-            # Bibliometrics
-            citation_years=get_citation_years(graph),
-            confidence_count=count_confidences(graph),
-            # Random
-            hub_data=_count_top_hubs(graph),
-            disease_data=_count_top_diseases(graph),
+            **_GraphSummarizer(graph).summarize(),
+            # Node pairs and triplets
+            **stability_sets,
+            stability_count=stability_count,
+            stability_standard_error=stability_standard_error,
         )
 
     def prepare_c3_for_function_count(self):
@@ -162,25 +181,215 @@ class BELGraphSummary:
             return prepare_c3(self.disease_data, 'Pathologies')
 
 
-def _count_top_hubs(graph, n: int = 15):
-    return collections.Counter({
-        (
-            node.name or node.identifier
-            if NAME in node or IDENTIFIER in node else
-            str(node)
-        ): degree
-        for node, degree in get_top_hubs(graph, n=n)
-        if isinstance(node, BaseAbundance)
-    })
+_STABILITY_SET_FIELDS = [
+    'regulatory_pairs',
+    'chaotic_pairs',
+    'dampened_pairs',
+    'contradictory_pairs',
+    'separate_unstable_correlation_triples',
+    'mutually_unstable_correlation_triples',
+    'jens_unstable',
+    'increase_mismatch_triplets',
+    'decrease_mismatch_triplets',
+]
+
+
+#: The modifiers counted by :func:`pybel.struct.summary.count_modifications`
+_MODIFICATION_LABELS = {
+    TRANSLOCATION: 'Translocations',
+    DEGRADATION: 'Degradations',
+    ACTIVITY: 'Molecular Activities',
+}
+
+
+class _GraphSummarizer:
+    """Accumulates the non-stability fields of a :class:`BELGraphSummary` with one pass over each part of a graph.
+
+    Each field is the same as the result of the function that :class:`BELGraphSummary` originally called, like
+    :func:`pybel.struct.summary.count_namespaces` or :func:`pybel_tools.summary.get_citation_years`, but the nodes,
+    edges, and warnings are each only iterated once.
+    """
+
+    def __init__(self, graph: BELGraph) -> None:
+        self.graph = graph
+
+        # nodes
+        self.function_count = collections.Counter()
+        self.variants_count = collections.Counter()
+        self.namespaces_count = collections.Counter()
+        self.degrees = collections.Counter()
+
+        # edges
+        self.relation_count = collections.Counter()
+        self.authors_count = collections.Counter()
+        self.used_annotations = set()
+        self.used_list_annotation_values = collections.defaultdict(set)
+        self.modified_nodes = collections.defaultdict(set)
+        self.pathology_edges = set()
+        self.citations_by_year = collections.defaultdict(set)
+        self.confidence_count = collections.Counter()
+
+        # warnings
+        self.undefined_namespaces = set()
+        self.undefined_annotations = set()
+        self.namespaces_with_incorrect_names = set()
+        self.naked_names = set()
+        self.error_count = collections.Counter()
+        self.error_groups = collections.Counter()
+        self.syntax_errors = []
+
+    def summarize(self) -> Dict[str, Any]:
+        """Visit each node, edge, and warning, then get the fields for :class:`BELGraphSummary`."""
+        for node in self.graph:
+            self._visit_node(node)
+        for u, v, data in self.graph.edges(data=True):
+            self._visit_edge(u, v, data)
+        for warning in self.graph.warnings:
+            self._visit_warning(warning)
+
+        return dict(
+            # Attribute counters
+            function_count=self.function_count,
+            modifications_count=collections.Counter({
+                label: len(self.modified_nodes[modifier])
+                for modifier, label in _MODIFICATION_LABELS.items()
+                if self.modified_nodes[modifier]
+            }),
+            relation_count=self.relation_count,
+            authors_count=self.authors_count,
+            variants_count=self.variants_count,
+            namespaces_count=self.namespaces_count,
+            # Errors
+            undefined_namespaces=self.undefined_namespaces,
+            undefined_annotations=self.undefined_annotations,
+            namespaces_with_incorrect_names=self.namespaces_with_incorrect_names,
+            unused_namespaces=self.graph.defined_namespace_keywords - set(self.namespaces_count),
+            unused_annotations=self.graph.defined_annotation_keywords - self.used_annotations,
+            unused_list_annotation_values=self._get_unused_list_annotation_values(),
+            naked_names=self.naked_names,
+            error_count=self.error_count,
+            error_groups=self.error_groups.most_common(20),
+            syntax_errors=self.syntax_errors,
+            # Bibliometrics
+            citation_years=create_timeline(collections.Counter({
+                year: len(citations)
+                for year, citations in self.citations_by_year.items()
+            })),
+            confidence_count=self.confidence_count,
+            # Random
+            hub_data=_name_top_nodes(self.degrees.most_common(15)),
+            disease_data=_name_top_nodes(self._count_pathologies().most_common(15)),
+        )
+
+    def _visit_node(self, node: BaseEntity) -> None:
+        self.function_count[node.function] += 1
+        if VARIANTS in node:
+            self.variants_count.update(variant[KIND] for variant in node[VARIANTS])
+        self.namespaces_count.update(entity.namespace for entity in iterate_node_entities(node))
+        # initialize in node order so ties are broken the same way as :func:`pybel.struct.summary.get_top_hubs`
+        self.degrees[node] = 0
+
+    def _visit_edge(self, u: BaseEntity, v: BaseEntity, data: Mapping[str, Any]) -> None:
+        self.relation_count[data[RELATION]] += 1
+        self.degrees[u] += 1
+        self.degrees[v] += 1
+        self.namespaces_count.update(entity.namespace for entity in _iterate_edge_entities(data))
+
+        for modifier in _MODIFICATION_LABELS:
+            if part_has_modifier(data, SOURCE_MODIFIER, modifier):
+                self.modified_nodes[modifier].add(u)
+            if part_has_modifier(data, TARGET_MODIFIER, modifier):
+                self.modified_nodes[modifier].add(v)
+
+        if isinstance(u, Pathology) or isinstance(v, Pathology):
+            self.pathology_edges.add(tuple(sorted([u, v], key=lambda node: node.as_bel())))
+
+        annotations = data.get(ANNOTATIONS, {})
+        for key, values in annotations.items():
+            self.used_annotations.add(key)
+            if key in self.graph.annotation_list:
+                self.used_list_annotation_values[key].update(value.identifier for value in values)
+
+        citation = data.get(CITATION)
+        if citation is None:
+            return
+
+        self.authors_count.update(citation.get(CITATION_AUTHORS, []))
+        self.confidence_count[
+            'None'
+            if 'Confidence' not in annotations else
+            list(annotations['Confidence'])[0]
+        ] += 1
+
+        if CITATION_DATE in citation:
+            try:
+                dt = _ensure_datetime(citation[CITATION_DATE])
+            except ValueError:
+                pass
+            else:
+                self.citations_by_year[dt.year].add((citation.namespace, citation.identifier))
+
+    def _visit_warning(self, warning: WarningTuple) -> None:
+        _, exc, _ = warning
+        self.error_count[exc.__class__.__name__] += 1
+        self.error_groups[str(exc)] += 1
+
+        if isinstance(exc, BELSyntaxError):
+            self.syntax_errors.append(warning)
+        if isinstance(exc, UndefinedNamespaceWarning):
+            self.undefined_namespaces.add(exc.namespace)
+        if isinstance(exc, UndefinedAnnotationWarning):
+            self.undefined_annotations.add(exc.annotation)
+        if isinstance(exc, (MissingNamespaceNameWarning, MissingNamespaceRegexWarning)):
+            self.namespaces_with_incorrect_names.add(exc.namespace)
+        if isinstance(exc, NakedNameWarning):
+            self.naked_names.add(exc.name)
+
+    def _get_unused_list_annotation_values(self) -> Mapping[str, Set[str]]:
+        rv = {}
+        for annotation, values in self.graph.annotation_list.items():
+            unused = values - self.used_list_annotation_values.get(annotation, set())
+            if unused:
+                rv[annotation] = unused
+        return rv
+
+    def _count_pathologies(self) -> Counter[BaseEntity]:
+        return collections.Counter(
+            node
+            for edge in self.pathology_edges
+            for node in edge
+            if isinstance(node, Pathology)
+        )
+
+
+def _iterate_edge_entities(data: Mapping[str, Any]) -> Iterable[Entity]:
+    """Iterate over the entities in the modifiers of an edge, like :func:`pybel.struct.summary.count_namespaces`."""
+    for side in (SOURCE_MODIFIER, TARGET_MODIFIER):
+        side_data = data.get(side)
+        if side_data is None:
+            continue
+
+        modifier = side_data.get(MODIFIER)
+        effect = side_data.get(EFFECT)
+
+        if modifier == ACTIVITY and effect is not None:
+            yield effect
+        elif modifier == TRANSLOCATION and effect is not None:
+            yield effect[FROM_LOC]
+            yield effect[TO_LOC]
+
+        location = side_data.get(LOCATION)
+        if location is not None:
+            yield location
 
 
-def _count_top_diseases(graph, n=15):
+def _name_top_nodes(pairs: Iterable[Tuple[BaseEntity, int]]) -> Counter[str]:
     return collections.Counter({
         (
             node.name or node.identifier
             if NAME in node or IDENTIFIER in node else
             str(node)
         ): count
-        for node, count in get_top_pathologies(graph, n=n)
+        for node, count in pairs
         if isinstance(node, BaseAbundance)
     })
@@ -5,8 +5,9 @@
 from typing import Collection
 
 from pybel import BELGraph
-from pybel.constants import CAUSAL_DECREASE_RELATIONS, CAUSAL_INCREASE_RELATIONS, CAUSES_NO_CHANGE, RELATION
+from pybel.constants import CAUSAL_DECREASE_RELATIONS, CAUSAL_INCREASE_RELATIONS, CAUSES_NO_CHANGE
 from pybel.dsl import BaseEntity
+from .relation_index import get_pair_mask, mask_has_contradiction
 
 __all__ = [
     'pair_has_contradiction',
@@ -17,10 +18,10 @@ __all__ = [
 def pair_has_contradiction(graph: BELGraph, u: BaseEntity, v: BaseEntity) -> bool:
     """Check if a pair of nodes has any contradictions in their causal relationships.
 
-    Assumes both nodes are in the graph.
+    Assumes both nodes are in the graph. Answers from the relation index attached to the graph with
+    :func:`pybel_tools.summary.attach_relation_index`, if there is one.
     """
-    relations = {data[RELATION] for data in graph[u][v].values()}
-    return relation_set_has_contradictions(relations)
+    return mask_has_contradiction(get_pair_mask(graph, u, v))
 
 
 # TODO should this consider correlations?
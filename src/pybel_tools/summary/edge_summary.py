@@ -3,19 +3,23 @@
 """This module contains functions that provide summaries of the edges in a graph."""
 
 import itertools as itt
+import multiprocessing
 from collections import Counter, defaultdict
-from typing import Iterable, List, Mapping, Optional, Set, Tuple, TypeVar
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple, TypeVar
 
 from pybel import BELGraph
-from pybel.constants import ANNOTATIONS, RELATION
+from pybel.constants import ANNOTATIONS
 from pybel.dsl import BaseEntity
+from pybel.language import Entity
 from pybel.struct.filters.edge_predicates import edge_has_annotation
 from pybel.struct.filters.typing import NodePredicate
 from pybel.struct.summary import (
     count_annotations, count_pathologies, count_relations, get_annotations, get_unused_annotations,
     get_unused_list_annotation_values, iter_annotation_value_pairs, iter_annotation_values,
 )
-from .contradictions import pair_has_contradiction
+from .relation_index import build_relation_index, get_pair_mask, mask_has_contradiction, mask_is_consistent
+from ..annotation_index import get_current_annotation_index, iterate_annotated_edges
+from ..heavy_hitters import SpaceSaving
 
 __all__ = [
     'count_relations',
@@ -26,6 +30,7 @@ __all__ = [
     'get_annotations_containing_keyword',
     'count_annotation_values',
     'count_annotation_values_filtered',
+    'estimate_top_annotation_values',
     'pair_is_consistent',
     'get_consistent_edges',
     'get_contradictory_pairs',
@@ -37,6 +42,14 @@ __all__ = [
 A = TypeVar('A')
 B = TypeVar('B')
 
+#: The number of source nodes whose edges each worker process counts at once
+ANNOTATION_BATCH_SIZE = 4096
+
+#: The number of values counted for each one requested by :func:`estimate_top_annotation_values`
+TOP_VALUES_CAPACITY_FACTOR = 10
+
+_annotation_worker_state: Dict[str, Any] = {}
+
 
 def group_dict_set(iterator: Iterable[Tuple[A, B]]) -> Mapping[A, Set[B]]:
     """Make a dict that accumulates the values for each key in an iterator of doubles."""
@@ -48,10 +61,7 @@ def group_dict_set(iterator: Iterable[Tuple[A, B]]) -> Mapping[A, Set[B]]:
 
 def get_edge_relations(graph: BELGraph) -> Mapping[Tuple[BaseEntity, BaseEntity], Set[str]]:
     """Build a dictionary of {node pair: set of edge types}."""
-    return group_dict_set(
-        ((u, v), d[RELATION])
-        for u, v, d in graph.edges(data=True)
-    )
+    return build_relation_index(graph).get_edge_relations()
 
 
 def count_unique_relations(graph: BELGraph) -> Counter:
@@ -80,14 +90,26 @@ def get_annotations_containing_keyword(graph: BELGraph, keyword: str) -> List[Ma
     ]
 
 
-def count_annotation_values(graph: BELGraph, annotation: str) -> Counter:
+def count_annotation_values(graph: BELGraph, annotation: str, n_jobs: Optional[int] = None) -> Counter:
     """Count in how many edges each annotation appears in a graph.
 
+    Answers from the annotation index attached to the graph with
+    :func:`pybel_tools.annotation_index.attach_annotation_index`, if there is one.
+
     :param graph: A BEL graph
     :param annotation: The annotation to count
+    :param n_jobs: The number of worker processes over which the source nodes are split. If none or 1, counts in the
+     current process. If -1, uses all cores.
     :return: A Counter from {annotation value: frequency}
     """
-    return Counter(iter_annotation_values(graph, annotation))
+    index = get_current_annotation_index(graph)
+    if index is not None:
+        return index.count_values(annotation)
+
+    if n_jobs is None or n_jobs == 1:
+        return Counter(iter_annotation_values(graph, annotation))
+
+    return _count_annotation_values_parallel(graph, annotation, None, None, n_jobs)
 
 
 def count_annotation_values_filtered(
@@ -95,54 +117,146 @@ def count_annotation_values_filtered(
     annotation: str,
     source_predicate: Optional[NodePredicate] = None,
     target_predicate: Optional[NodePredicate] = None,
+    n_jobs: Optional[int] = None,
 ) -> Counter:
     """Count in how many edges each annotation appears in a graph, but filter out source nodes and target nodes.
 
-    See :func:`pybel_tools.utils.keep_node` for a basic filter.
+    See :func:`pybel_tools.utils.keep_node` for a basic filter. Only the edges with the annotation are checked if the
+    graph has an annotation index attached.
 
     :param graph: A BEL graph
     :param annotation: The annotation to count
     :param source_predicate: A predicate (graph, node) -> bool for keeping source nodes
     :param target_predicate: A predicate (graph, node) -> bool for keeping target nodes
+    :param n_jobs: The number of worker processes over which the source nodes are split. If none or 1, counts in the
+     current process. If -1, uses all cores. Unless processes are forked, the predicates have to be picklable, so
+     they can't be lambdas or nested functions.
     :return: A Counter from {annotation value: frequency}
     """
-    if source_predicate and target_predicate:
-        return Counter(
-            data[ANNOTATIONS][annotation]
-            for u, v, data in graph.edges(data=True)
-            if edge_has_annotation(data, annotation) and source_predicate(graph, u) and target_predicate(graph, v)
-        )
-    elif source_predicate:
-        return Counter(
-            data[ANNOTATIONS][annotation]
-            for u, v, data in graph.edges(data=True)
-            if edge_has_annotation(data, annotation) and source_predicate(graph, u)
-        )
-    elif target_predicate:
-        return Counter(
-            data[ANNOTATIONS][annotation]
-            for u, v, data in graph.edges(data=True)
-            if edge_has_annotation(data, annotation) and target_predicate(graph, u)
-        )
-    else:
-        return Counter(
-            data[ANNOTATIONS][annotation]
-            for u, v, data in graph.edges(data=True)
-            if edge_has_annotation(data, annotation)
-        )
+    if source_predicate is None and target_predicate is None:
+        return count_annotation_values(graph, annotation, n_jobs=n_jobs)
+
+    if n_jobs is not None and n_jobs != 1 and get_current_annotation_index(graph) is None:
+        return _count_annotation_values_parallel(graph, annotation, source_predicate, target_predicate, n_jobs)
+
+    return Counter(
+        value
+        for value, u, v, _, _ in iterate_annotated_edges(graph, annotation)
+        if (source_predicate is None or source_predicate(graph, u))
+        and (target_predicate is None or target_predicate(graph, v))
+    )
+
+
+def estimate_top_annotation_values(
+    graph: BELGraph,
+    annotation: str,
+    n: int,
+    capacity: Optional[int] = None,
+    source_predicate: Optional[NodePredicate] = None,
+    target_predicate: Optional[NodePredicate] = None,
+) -> List[Tuple[Entity, int]]:
+    """Estimate the most common values of the annotation in the graph's edges in one pass, in bounded memory.
+
+    Only up to ``capacity`` values are counted at once with :class:`pybel_tools.heavy_hitters.SpaceSaving`, so each
+    count is an upper bound that's too large by at most the number of annotated edges divided by the capacity. All
+    values in more edges than that are found. The source and target predicates filter the edges like in
+    :func:`count_annotation_values_filtered`. If the graph has an annotation index attached, the exact counts are
+    used instead.
+
+    :param graph: A BEL graph
+    :param annotation: The annotation to count
+    :param n: The number of values to return
+    :param capacity: The number of values to count at once. Defaults to :data:`TOP_VALUES_CAPACITY_FACTOR` times n.
+    :param source_predicate: A predicate (graph, node) -> bool for keeping source nodes
+    :param target_predicate: A predicate (graph, node) -> bool for keeping target nodes
+    :return: The values with the largest estimated counts and their counts, from most to least common
+    """
+    if get_current_annotation_index(graph) is not None:
+        return count_annotation_values_filtered(
+            graph, annotation, source_predicate=source_predicate, target_predicate=target_predicate,
+        ).most_common(n)
+
+    summary = SpaceSaving(capacity or TOP_VALUES_CAPACITY_FACTOR * n)
+    summary.update(_iterate_annotation_values_from(graph, graph, annotation, source_predicate, target_predicate))
+    return summary.most_common(n)
+
+
+def _iterate_annotation_values_from(
+    graph: BELGraph,
+    sources: Iterable[BaseEntity],
+    annotation: str,
+    source_predicate: Optional[NodePredicate],
+    target_predicate: Optional[NodePredicate],
+) -> Iterable[Entity]:
+    """Iterate over the values of the annotation in the out-edges of the sources.
+
+    Each predicate is checked once per node or node pair instead of once per edge.
+    """
+    for u in sources:
+        if source_predicate is not None and not source_predicate(graph, u):
+            continue
+        for v, edges in graph[u].items():
+            if target_predicate is not None and not target_predicate(graph, v):
+                continue
+            for data in edges.values():
+                if edge_has_annotation(data, annotation):
+                    yield from data[ANNOTATIONS][annotation]
+
+
+def _count_annotation_values_parallel(
+    graph: BELGraph,
+    annotation: str,
+    source_predicate: Optional[NodePredicate],
+    target_predicate: Optional[NodePredicate],
+    n_jobs: int,
+) -> Counter:
+    """Count the values of the annotation in blocks of source nodes' out-edges in worker processes, then merge them."""
+    number_nodes = graph.number_of_nodes()
+    tasks = [
+        (start, min(start + ANNOTATION_BATCH_SIZE, number_nodes))
+        for start in range(0, number_nodes, ANNOTATION_BATCH_SIZE)
+    ]
+
+    rv = Counter()
+    processes = None if n_jobs < 1 else min(n_jobs, len(tasks) or 1)
+    with multiprocessing.Pool(
+        processes=processes,
+        initializer=_init_annotation_worker,
+        initargs=(graph, annotation, source_predicate, target_predicate),
+    ) as pool:
+        for partial_counts in pool.imap_unordered(_count_worker_annotation_values, tasks):
+            rv.update(partial_counts)
+
+    return rv
+
+
+def _init_annotation_worker(
+    graph: BELGraph,
+    annotation: str,
+    source_predicate: Optional[NodePredicate],
+    target_predicate: Optional[NodePredicate],
+) -> None:
+    _annotation_worker_state['graph'] = graph
+    _annotation_worker_state['nodes'] = list(graph)
+    _annotation_worker_state['arguments'] = annotation, source_predicate, target_predicate
+
+
+def _count_worker_annotation_values(task: Tuple[int, int]) -> Counter:
+    start, stop = task
+    graph = _annotation_worker_state['graph']
+    sources = _annotation_worker_state['nodes'][start:stop]
+    return Counter(_iterate_annotation_values_from(graph, sources, *_annotation_worker_state['arguments']))
 
 
 def pair_is_consistent(graph: BELGraph, u: BaseEntity, v: BaseEntity) -> Optional[str]:
     """Return if the edges between the given nodes are consistent, meaning they all have the same relation.
 
+    Answers from the relation index attached to the graph with :func:`pybel_tools.summary.attach_relation_index`, if
+    there is one.
+
     :return: If the edges aren't consistent, return false, otherwise return the relation type
     """
-    relations = {data[RELATION] for data in graph[u][v].values()}
-
-    if 1 != len(relations):
-        return
-
-    return list(relations)[0]
+    return mask_is_consistent(get_pair_mask(graph, u, v))
 
 
 def get_contradictory_pairs(graph: BELGraph) -> Iterable[Tuple[BaseEntity, BaseEntity]]:
@@ -150,8 +264,8 @@ def get_contradictory_pairs(graph: BELGraph) -> Iterable[Tuple[BaseEntity, BaseE
 
     :return: An iterator over (source, target) node pairs that have contradictory causal edges
     """
-    for u, v in graph.edges():
-        if pair_has_contradiction(graph, u, v):
+    for u, v, mask in build_relation_index(graph).iterate_masks():
+        if mask_has_contradiction(mask):
             yield u, v
 
 
@@ -160,6 +274,6 @@ def get_consistent_edges(graph: BELGraph) -> Iterable[Tuple[BaseEntity, BaseEnti
 
     :return: An iterator over (source, target) node pairs corresponding to edges with many inconsistent relations
     """
-    for u, v in graph.edges():
-        if pair_is_consistent(graph, u, v):
+    for u, v, mask in build_relation_index(graph).iterate_masks():
+        if mask_is_consistent(mask):
             yield u, v
@@ -1,18 +1,26 @@
 # -*- coding: utf-8 -*-
 
-"""This module contains functions that provide summaries of the errors encountered while parsing a BEL script."""
+"""This module contains functions that provide summaries of the errors encountered while parsing a BEL script.
 
-from collections import Iterable, defaultdict
-from typing import Counter, List, Mapping, Optional, Set, Tuple
+The functions answer from a :class:`WarningsIndex` of the graph's warnings, which is built the first time one of them
+is called on a graph and only has to index the warnings appended to the graph since the last call.
+"""
+
+import collections.abc
+import heapq
+from collections import defaultdict
+from typing import Counter, Dict, Iterable, List, Mapping, Optional, Set, Tuple, Type, Union
+from weakref import WeakKeyDictionary
 
 from pybel import BELGraph
 from pybel.constants import ANNOTATIONS
 from pybel.exceptions import (
-    MissingNamespaceNameWarning, MissingNamespaceRegexWarning, UndefinedAnnotationWarning, UndefinedNamespaceWarning,
+    BELParserWarning, MissingNamespaceNameWarning, MissingNamespaceRegexWarning, UndefinedAnnotationWarning,
+    UndefinedNamespaceWarning,
 )
-from pybel.struct.filters.edge_predicates import edge_has_annotation
+from pybel.struct.graph import WarningTuple
 from pybel.struct.summary.errors import count_error_types, count_naked_names, get_naked_names
-from pybel.struct.summary.node_summary import get_names_by_namespace, get_namespaces
+from pybel.struct.summary.node_summary import get_names, get_names_by_namespace, get_namespaces
 from ..utils import count_dict_values
 
 __all__ = [
@@ -31,15 +39,146 @@ __all__ = [
     'get_undefined_annotations',
     'get_namespaces_with_incorrect_names',
     'get_most_common_errors',
+    'WarningsIndex',
+    'get_warnings_index',
 ]
 
+#: The warnings about names that aren't in their namespaces
+_INCORRECT_NAME_WARNINGS = (MissingNamespaceNameWarning, MissingNamespaceRegexWarning)
+
+ExceptionClasses = Union[Type[BELParserWarning], Tuple[Type[BELParserWarning], ...]]
+
+_warnings_indexes: 'WeakKeyDictionary[BELGraph, WarningsIndex]' = WeakKeyDictionary()
+
+
+class WarningsIndex:
+    """Maps from the exception classes, namespaces, annotations, and line numbers to a list of warnings.
+
+    The positions of the warnings with each key are kept in order, so queries give the warnings in the same order as
+    scanning the list. Since warnings are only ever appended to a graph, :meth:`update` only indexes the warnings
+    after the ones already indexed.
+    """
+
+    def __init__(self, warnings: List[WarningTuple]) -> None:
+        """Index the warnings.
+
+        :param warnings: A list of warnings, like :data:`pybel.BELGraph.warnings`
+        """
+        self.warnings = warnings
+        self._number_indexed = 0
+        self._by_class: Dict[Type[BELParserWarning], List[int]] = defaultdict(list)
+        self._by_namespace: Dict[str, List[int]] = defaultdict(list)
+        self._by_annotation: Dict[str, List[int]] = defaultdict(list)
+        self._by_line: Dict[int, List[int]] = defaultdict(list)
+        #: The line numbers of the warnings with each message, built by :meth:`group_messages`
+        self._messages: Optional[Dict[str, List[int]]] = None
+        self.update()
+
+    @property
+    def number_warnings(self) -> int:
+        """Get the number of indexed warnings."""
+        return self._number_indexed
+
+    def update(self) -> None:
+        """Index the warnings appended to the list since it was last indexed."""
+        for position in range(self._number_indexed, len(self.warnings)):
+            _, exc, context = self.warnings[position]
+            self._by_class[exc.__class__].append(position)
+
+            namespace = getattr(exc, 'namespace', None)
+            if namespace is not None:
+                self._by_namespace[namespace].append(position)
+
+            line_number = getattr(exc, 'line_number', None)
+            if line_number is not None:
+                self._by_line[line_number].append(position)
+
+            if context and context.get(ANNOTATIONS):
+                for annotation in context[ANNOTATIONS]:
+                    self._by_annotation[annotation].append(position)
+
+            if self._messages is not None:
+                self._messages.setdefault(str(exc), []).append(exc.line_number)
+
+        self._number_indexed = len(self.warnings)
+
+    def iterate_warnings(
+        self,
+        classes: Optional[ExceptionClasses] = None,
+        namespace: Optional[str] = None,
+        annotation: Optional[str] = None,
+        line_number: Optional[int] = None,
+    ) -> Iterable[WarningTuple]:
+        """Iterate over the warnings matching all of the given conditions, in order.
+
+        :param classes: An exception class or tuple of classes, whose instances (including subclasses) are kept
+        :param namespace: The namespace of the exception
+        :param annotation: An annotation in the warning's context
+        :param line_number: The line number of the exception
+        """
+        candidates = []
+        if namespace is not None:
+            candidates.append(self._by_namespace.get(namespace, []))
+        if annotation is not None:
+            candidates.append(self._by_annotation.get(annotation, []))
+        if line_number is not None:
+            candidates.append(self._by_line.get(line_number, []))
+        # Merging the positions of the classes takes a pass over all of their warnings, so it's only worth it when
+        # there's no narrower list. Otherwise, the classes are checked for each warning below.
+        if classes is not None and not candidates:
+            candidates.append(self._get_class_positions(classes))
+
+        positions = min(candidates, key=len) if candidates else range(self._number_indexed)
+        for position in positions:
+            warning = self.warnings[position]
+            _, exc, context = warning
+            if classes is not None and not isinstance(exc, classes):
+                continue
+            if namespace is not None and getattr(exc, 'namespace', None) != namespace:
+                continue
+            if annotation is not None and (not context or annotation not in context.get(ANNOTATIONS, {})):
+                continue
+            if line_number is not None and getattr(exc, 'line_number', None) != line_number:
+                continue
+            yield warning
+
+    def _get_class_positions(self, classes: ExceptionClasses) -> List[int]:
+        return list(heapq.merge(*(
+            positions
+            for cls, positions in self._by_class.items()
+            if issubclass(cls, classes)
+        )))
+
+    def group_messages(self) -> Mapping[str, List[int]]:
+        """Group the line numbers of the warnings by their messages, like :func:`group_errors`."""
+        if self._messages is None:
+            self._messages = {}
+            for _, exc, _ in self.warnings[:self._number_indexed]:
+                self._messages.setdefault(str(exc), []).append(exc.line_number)
+        return {
+            message: list(line_numbers)
+            for message, line_numbers in self._messages.items()
+        }
+
+
+def get_warnings_index(graph: BELGraph) -> WarningsIndex:
+    """Get the index of the graph's warnings, building it or indexing the warnings appended since it was built.
+
+    The index is rebuilt if the graph's warnings were replaced with a new list or removed from the list.
+    """
+    index = _warnings_indexes.get(graph)
+    if index is None or index.warnings is not graph.warnings or len(graph.warnings) < index.number_warnings:
+        index = _warnings_indexes[graph] = WarningsIndex(graph.warnings)
+    else:
+        index.update()
+    return index
+
 
 def get_namespaces_with_incorrect_names(graph: BELGraph) -> Set[str]:
     """Return the set of all namespaces with incorrect names in the graph."""
     return {
         exc.namespace
-        for _, exc, _ in graph.warnings
-        if isinstance(exc, (MissingNamespaceNameWarning, MissingNamespaceRegexWarning))
+        for _, exc, _ in get_warnings_index(graph).iterate_warnings(_INCORRECT_NAME_WARNINGS)
     }
 
 
@@ -47,8 +186,7 @@ def get_undefined_namespaces(graph: BELGraph) -> Set[str]:
     """Get all namespaces that are used in the BEL graph aren't actually defined."""
     return {
         exc.namespace
-        for _, exc, _ in graph.warnings
-        if isinstance(exc, UndefinedNamespaceWarning)
+        for _, exc, _ in get_warnings_index(graph).iterate_warnings(UndefinedNamespaceWarning)
     }
 
 
@@ -59,8 +197,7 @@ def get_incorrect_names_by_namespace(graph: BELGraph, namespace: str) -> Set[str
     """
     return {
         exc.name
-        for _, exc, _ in graph.warnings
-        if isinstance(exc, (MissingNamespaceNameWarning, MissingNamespaceRegexWarning)) and exc.namespace == namespace
+        for _, exc, _ in get_warnings_index(graph).iterate_warnings(_INCORRECT_NAME_WARNINGS, namespace=namespace)
     }
 
 
@@ -71,8 +208,7 @@ def get_undefined_namespace_names(graph: BELGraph, namespace: str) -> Set[str]:
     """
     return {
         exc.name
-        for _, exc, _ in graph.warnings
-        if isinstance(exc, UndefinedNamespaceWarning) and exc.namespace == namespace
+        for _, exc, _ in get_warnings_index(graph).iterate_warnings(UndefinedNamespaceWarning, namespace=namespace)
     }
 
 
@@ -81,10 +217,15 @@ def get_incorrect_names(graph: BELGraph) -> Mapping[str, Set[str]]:
 
     :return: The set of all incorrect names from the given namespace in the graph
     """
-    return {
-        namespace: get_incorrect_names_by_namespace(graph, namespace)
+    rv = {
+        namespace: set()
         for namespace in get_namespaces(graph)
     }
+    for _, exc, _ in get_warnings_index(graph).iterate_warnings(_INCORRECT_NAME_WARNINGS):
+        names = rv.get(exc.namespace)
+        if names is not None:
+            names.add(exc.name)
+    return rv
 
 
 def get_undefined_annotations(graph: BELGraph) -> Set[str]:
@@ -94,8 +235,7 @@ def get_undefined_annotations(graph: BELGraph) -> Set[str]:
     """
     return {
         exc.annotation
-        for _, exc, _ in graph.warnings
-        if isinstance(exc, UndefinedAnnotationWarning)
+        for _, exc, _ in get_warnings_index(graph).iterate_warnings(UndefinedAnnotationWarning)
     }
 
 
@@ -106,9 +246,7 @@ def calculate_incorrect_name_dict(graph: BELGraph) -> Mapping[str, str]:
     """
     missing = defaultdict(list)
 
-    for _, e, ctx in graph.warnings:
-        if not isinstance(e, (MissingNamespaceNameWarning, MissingNamespaceRegexWarning)):
-            continue
+    for _, e, _ in get_warnings_index(graph).iterate_warnings(_INCORRECT_NAME_WARNINGS):
         missing[e.namespace].append(e.name)
 
     return dict(missing)
@@ -121,15 +259,12 @@ def calculate_error_by_annotation(graph: BELGraph, annotation: str) -> Mapping[s
     """
     results = defaultdict(list)
 
-    for _, exc, ctx in graph.warnings:
-        if not ctx or not edge_has_annotation(ctx, annotation):
-            continue
-
+    for _, exc, ctx in get_warnings_index(graph).iterate_warnings(annotation=annotation):
         values = ctx[ANNOTATIONS][annotation]
 
         if isinstance(values, str):
             results[values].append(exc.__class__.__name__)
-        elif isinstance(values, Iterable):
+        elif isinstance(values, collections.abc.Iterable):
             for value in values:
                 results[value].append(exc.__class__.__name__)
 
@@ -141,12 +276,7 @@ def group_errors(graph: BELGraph) -> Mapping[str, List[int]]:
 
     :return: A dictionary of {error string: list of line numbers}
     """
-    warning_summary = defaultdict(list)
-
-    for _, exc, _ in graph.warnings:
-        warning_summary[str(exc)].append(exc.line_number)
-
-    return dict(warning_summary)
+    return get_warnings_index(graph).group_messages()
 
 
 def count_errors(graph: BELGraph) -> Counter[str]:
@@ -178,8 +308,16 @@ def get_names_including_errors(graph: BELGraph) -> Mapping[str, Set[str]]:
     them together as a unioned set
 
     :return: The dict of the sets of all correct and incorrect names from the given namespace in the graph
+    :raises IndexError: if a namespace used in the graph isn't defined in it, like
+     :func:`get_names_including_errors_by_namespace`
     """
+    incorrect_names = get_incorrect_names(graph)
+    for namespace in incorrect_names:
+        if namespace not in graph.defined_namespace_keywords:
+            raise IndexError("{} is not defined in {}".format(namespace, graph))
+
+    names = get_names(graph)
     return {
-        namespace: get_names_including_errors_by_namespace(graph, namespace)
-        for namespace in get_namespaces(graph)
+        namespace: names.get(namespace, set()) | incorrect
+        for namespace, incorrect in incorrect_names.items()
     }
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+"""Indexes for typeahead searches over the strings in a graph, like PubMed identifiers and author names."""
+
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set
+
+import numpy as np
+
+__all__ = [
+    'PrefixIndex',
+    'SubstringIndex',
+]
+
+
+class PrefixIndex:
+    """Finds the strings starting with a given prefix by binary search over the sorted strings."""
+
+    def __init__(self, strings: Iterable[str]) -> None:
+        """Sort the distinct strings."""
+        self._strings: List[str] = sorted(set(strings))
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self._strings)
+
+    def search(self, prefix: str) -> List[str]:
+        """Get the strings starting with the prefix, in sorted order."""
+        if not prefix:
+            return list(self._strings)
+
+        start = bisect_left(self._strings, prefix)
+        # All strings starting with the prefix come before the prefix with its last character incremented
+        stop = bisect_left(self._strings, prefix[:-1] + chr(ord(prefix[-1]) + 1), lo=start)
+        return self._strings[start:stop]
+
+
+class SubstringIndex:
+    """Finds the strings containing a given substring, ignoring case, with an n-gram index.
+
+    Each lowercase substring of up to :data:`GRAM_SIZE` characters of each string is mapped to the sorted positions of
+    the strings that contain it. Queries this short are answered with a single lookup. Longer queries intersect the
+    positions of the strings containing each of their n-grams then check the remaining candidates.
+    """
+
+    #: The length of the longest n-grams in the index
+    GRAM_SIZE = 3
+
+    def __init__(self, strings: Iterable[str]) -> None:
+        """Index the distinct strings."""
+        self._strings: List[str] = sorted(set(strings))
+        self._lowered: List[str] = [string.lower() for string in self._strings]
+
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for i, string in enumerate(self._lowered):
+            for gram in _iterate_grams(string, self.GRAM_SIZE):
+                postings[gram].append(i)
+
+        self._postings: Dict[str, np.ndarray] = {
+            gram: np.array(positions, dtype=np.int32)
+            for gram, positions in postings.items()
+        }
+
+    def __len__(self) -> int:  # noqa: D105
+        return len(self._strings)
+
+    def search(self, keyword: str) -> Set[str]:
+        """Get the strings containing the keyword, ignoring case."""
+        keyword = keyword.lower()
+        if not keyword:
+            return set(self._strings)
+
+        if len(keyword) <= self.GRAM_SIZE:
+            return {
+                self._strings[i]
+                for i in self._postings.get(keyword, _EMPTY).tolist()
+            }
+
+        grams = {
+            keyword[start:start + self.GRAM_SIZE]
+            for start in range(len(keyword) - self.GRAM_SIZE + 1)
+        }
+        postings = sorted((self._postings.get(gram, _EMPTY) for gram in grams), key=len)
+        candidates = postings[0]
+        for positions in postings[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, positions, assume_unique=True)
+
+        return {
+            self._strings[i]
+            for i in candidates.tolist()
+            if keyword in self._lowered[i]
+        }
+
+
+_EMPTY = np.array([], dtype=np.int32)
+
+
+def _iterate_grams(string: str, size: int) -> Iterable[str]:
+    """Iterate over the distinct substrings of the string with up to the given number of characters."""
+    return {
+        string[start:start + length]
+        for length in range(1, size + 1)
+        for start in range(len(string) - length + 1)
+    }
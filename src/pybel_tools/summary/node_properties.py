@@ -2,17 +2,18 @@
 
 """This module contains functions that calculate properties of nodes."""
 
-from collections import Counter, defaultdict
+import heapq
+from collections import defaultdict
+from operator import itemgetter
 from typing import Iterable, List, Mapping, Optional, Set, Tuple, Union
 
-import networkx as nx
-
 from pybel import BELGraph
 from pybel.constants import CITATION
 from pybel.dsl import BaseEntity
 from pybel.struct.filters.edge_predicates import is_causal_relation
 from pybel.struct.filters.node_predicates import is_causal_central, is_causal_sink, is_causal_source
 from pybel.struct.summary.node_summary import count_modifications, get_activities, get_degradations, get_translocated
+from ..utils import CENTRALITY_SAMPLES, calculate_betweenness_centality
 
 __all__ = [
     'is_causal_relation',
@@ -102,17 +103,44 @@ def get_causal_sink_nodes(graph: BELGraph, func) -> Set[BaseEntity]:
 
 
 def count_top_degrees(graph: BELGraph, number: Optional[int] = 30) -> Mapping[BaseEntity, int]:
-    """Get the nodes with the top degrees."""
-    dd = graph.degree()
-    dc = Counter(dd)
-    return dict(dc.most_common(number))
+    """Get the nodes with the top degrees.
+
+    :param graph: A BEL graph
+    :param number: The number of nodes to keep. If none, keep all of them, sorted by degree.
+    """
+    return dict(_get_top_items(graph.degree(), number))
+
+
+def count_top_centrality(
+    graph: BELGraph,
+    number: Optional[int] = 30,
+    number_samples: Optional[int] = CENTRALITY_SAMPLES,
+    seed: Optional[int] = None,
+    n_jobs: Optional[int] = None,
+) -> Mapping[BaseEntity, float]:
+    """Get the nodes with the top betweenness centralities.
+
+    Calculating the betweenness centrality exactly takes a breadth-first search from every node, which takes
+    O(VE) time. By default, it's estimated from a random sample of sources with
+    :func:`pybel_tools.utils.calculate_betweenness_centality`.
+
+    :param graph: A BEL graph
+    :param number: The number of nodes to keep. If none, keep all of them, sorted by centrality.
+    :param number_samples: The number of sources to sample. If none, or if the graph doesn't have more nodes than
+     this, every node is used as a source and the betweenness centrality is exact.
+    :param seed: The seed for the random number generator used for sampling
+    :param n_jobs: The number of processes over which the batches of sources are split. If none or 1, run in this
+     process. If -1, use all cores.
+    """
+    betweenness = calculate_betweenness_centality(graph, number_samples=number_samples, seed=seed, n_jobs=n_jobs)
+    return dict(_get_top_items(betweenness.items(), number))
 
 
-def count_top_centrality(graph: BELGraph, number: Optional[int] = 30) -> Mapping[BaseEntity, int]:
-    """Get top centrality dictionary."""
-    dd = nx.betweenness_centrality(graph)
-    dc = Counter(dd)
-    return dict(dc.most_common(number))
+def _get_top_items(pairs: Iterable[Tuple[BaseEntity, float]], number: Optional[int]) -> List[Tuple[BaseEntity, float]]:
+    """Get the pairs with the largest values, like :meth:`collections.Counter.most_common` without building one."""
+    if number is None:
+        return sorted(pairs, key=itemgetter(1), reverse=True)
+    return heapq.nlargest(number, pairs, key=itemgetter(1))
 
 
 def get_node_citations(graph: BELGraph, node: BaseEntity) -> Mapping[BaseEntity, List[Mapping]]:
@@ -7,15 +7,22 @@ import logging
 import typing
 from collections import Counter, defaultdict
 from datetime import datetime
-from typing import Iterable, List, Mapping, Optional, Set, Tuple, Union
+from functools import lru_cache
+from typing import Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Set, Tuple, TypeVar, Union
+from weakref import WeakKeyDictionary
 
 from pybel import BELGraph
 from pybel.constants import ANNOTATIONS, CITATION, CITATION_AUTHORS, CITATION_DATE, EVIDENCE
 from pybel.dsl import BaseEntity
-from pybel.struct import build_pmid_inclusion_filter, edge_has_annotation, filter_edges
+from pybel.language import Entity
+from pybel.struct import build_pmid_inclusion_filter, filter_edges
+from pybel.struct.filters.edge_predicates import has_pubmed
 from pybel.struct.summary import iterate_pubmed_identifiers
 from pybel.typing import Strings
+from .keyword_index import PrefixIndex, SubstringIndex
+from ..annotation_index import iterate_annotated_edges
 from ..filters import build_edge_data_filter
+from ..typing import NodePair
 from ..utils import count_defaultdict, count_dict_values, group_as_lists, group_as_sets
 
 __all__ = [
@@ -26,16 +33,36 @@ __all__ = [
     'count_authors',
     'count_author_publications',
     'get_authors_by_keyword',
+    'clear_keyword_indexes',
     'count_authors_by_annotation',
     'get_evidences_by_pmid',
     'count_citation_years',
     'create_timeline',
     'get_citation_years',
     'count_confidences',
+    'ProvenanceIndex',
+    'attach_provenance_index',
+    'get_provenance_index',
+    'detach_provenance_index',
 ]
 
 logger = logging.getLogger(__name__)
 
+#: A citation's namespace and identifier
+Citation = Tuple[str, str]
+#: An edge's source, target, and key
+EdgeKey = Tuple[BaseEntity, BaseEntity, str]
+
+_attached_indexes: 'WeakKeyDictionary[BELGraph, ProvenanceIndex]' = WeakKeyDictionary()
+
+#: The keyword indexes of each graph, with the number of edges the graph had when each was built
+_keyword_indexes: 'WeakKeyDictionary[BELGraph, Dict[str, Tuple[int, object]]]' = WeakKeyDictionary()
+
+X = TypeVar('X')
+
+#: The number of distinct date strings whose parses are kept by :func:`_parse_date`
+DATE_CACHE_SIZE = 2 ** 16
+
 
 def _generate_citation_dict(graph: BELGraph) -> Mapping[str, Mapping[Tuple[BaseEntity, BaseEntity], str]]:
     """Prepare a citation data dictionary from a graph.
@@ -59,6 +86,11 @@ def get_pmid_by_keyword(
 ) -> Set[str]:
     """Get the set of PubMed identifiers beginning with the given keyword string.
 
+    If a graph is given, its identifiers are sorted once and searched with a
+    :class:`pybel_tools.summary.PrefixIndex` that's reused until the number of edges in the graph changes. Edits that
+    keep the number of edges the same, like replacing an edge or changing a citation in place, aren't noticed, so call
+    :func:`clear_keyword_indexes` after them.
+
     :param keyword: The beginning of a PubMed identifier
     :param graph: A BEL graph
     :param pubmed_identifiers: A set of pre-cached PubMed identifiers
@@ -74,11 +106,23 @@ def get_pmid_by_keyword(
     if graph is None:
         raise ValueError('Graph not supplied')
 
-    return {
-        pubmed_identifier
-        for pubmed_identifier in iterate_pubmed_identifiers(graph)
-        if pubmed_identifier.startswith(keyword)
-    }
+    index = _get_keyword_index(graph, 'pmids', lambda: PrefixIndex(iterate_pubmed_identifiers(graph)))
+    return set(index.search(keyword))
+
+
+def _get_keyword_index(graph: BELGraph, name: str, build: Callable[[], X]) -> X:
+    """Get the graph's keyword index with the given name, building it if it's missing or the graph changed."""
+    indexes = _keyword_indexes.setdefault(graph, {})
+    number_edges = graph.number_of_edges()
+    cached = indexes.get(name)
+    if cached is None or cached[0] != number_edges:
+        cached = indexes[name] = number_edges, build()
+    return cached[1]
+
+
+def clear_keyword_indexes(graph: BELGraph) -> None:
+    """Drop the keyword indexes built for the graph, so the next keyword search rebuilds them."""
+    _keyword_indexes.pop(graph, None)
 
 
 def count_pmids(graph: BELGraph) -> Counter:
@@ -86,6 +130,10 @@ def count_pmids(graph: BELGraph) -> Counter:
 
     :return: A Counter from {(pmid, name): frequency}
     """
+    index = _get_current_index(graph)
+    if index is not None:
+        return index.count_pmids()
+
     return Counter(iterate_pubmed_identifiers(graph))
 
 
@@ -96,10 +144,16 @@ def count_citations(graph: BELGraph, **annotations) -> Counter:
     :param dict annotations: The annotation filters to use
     :return: A counter from {(citation type, citation reference): frequency}
     """
+    if not annotations:
+        index = _get_current_index(graph)
+        if index is not None:
+            return index.count_citations()
+
     annotation_dict_filter = build_edge_data_filter(annotations)
 
     citations = defaultdict(set)
-    for u, v, _, d in filter_edges(graph, annotation_dict_filter):
+    for u, v, k in filter_edges(graph, annotation_dict_filter):
+        d = graph[u][v][k]
         if CITATION in d:
             citations[u, v].add((d[CITATION].namespace, d[CITATION].identifier))
 
@@ -113,13 +167,14 @@ def count_citations_by_annotation(graph: BELGraph, annotation: str) -> Mapping[s
     :param annotation: The annotation to use to group the graph
     :return: A dictionary of Counters {subgraph name: Counter from {citation: frequency}}
     """
+    index = _get_current_index(graph)
+    if index is not None:
+        return index.count_citations_by_annotation(annotation)
+
     citations = defaultdict(lambda: defaultdict(set))
-    for u, v, data in graph.edges(data=True):
-        if not edge_has_annotation(data, annotation) or CITATION not in data:
+    for k, u, v, _, data in iterate_annotated_edges(graph, annotation):
+        if CITATION not in data:
             continue
-
-        k = data[ANNOTATIONS][annotation]
-
         citations[k][u, v].add((data[CITATION].namespace, data[CITATION].identifier))
 
     return {
@@ -130,11 +185,19 @@ def count_citations_by_annotation(graph: BELGraph, annotation: str) -> Mapping[s
 
 def count_authors(graph: BELGraph) -> typing.Counter[str]:
     """Count the number of edges in which each author appears."""
+    index = _get_current_index(graph)
+    if index is not None:
+        return index.count_authors()
+
     return graph.count.authors()
 
 
 def count_author_publications(graph: BELGraph) -> typing.Counter[str]:
     """Count the number of publications of each author to the given graph."""
+    index = _get_current_index(graph)
+    if index is not None:
+        return index.count_author_publications()
+
     authors = group_as_lists(_iter_author_publiations(graph))
     return Counter(count_dict_values(count_defaultdict(authors)))
 
@@ -158,14 +221,17 @@ def get_authors(graph: BELGraph) -> Set[str]:
 def get_authors_by_keyword(keyword: str, graph=None, authors=None) -> Set[str]:
     """Get authors for whom the search term is a substring.
 
+    If a graph is given, its authors are searched with a :class:`pybel_tools.summary.SubstringIndex` that's reused
+    until the number of edges in the graph changes. Edits that keep the number of edges the same aren't noticed, so
+    call :func:`clear_keyword_indexes` after them.
+
     :param pybel.BELGraph graph: A BEL graph
     :param keyword: The keyword to search the author strings for
     :param set[str] authors: An optional set of pre-cached authors calculated from the graph
     :return: A set of authors with the keyword as a substring
     """
-    keyword_lower = keyword.lower()
-
     if authors is not None:
+        keyword_lower = keyword.lower()
         return {
             author
             for author in authors
@@ -175,11 +241,8 @@ def get_authors_by_keyword(keyword: str, graph=None, authors=None) -> Set[str]:
     if graph is None:
         raise ValueError('Graph not supplied')
 
-    return {
-        author
-        for author in graph.get_authors()
-        if keyword_lower in author.lower()
-    }
+    index = _get_keyword_index(graph, 'authors', lambda: SubstringIndex(graph.get_authors()))
+    return index.search(keyword)
 
 
 def count_authors_by_annotation(graph: BELGraph, annotation: str = 'Subgraph') -> Mapping[str, typing.Counter[str]]:
@@ -193,12 +256,12 @@ def count_authors_by_annotation(graph: BELGraph, annotation: str = 'Subgraph') -
     return count_defaultdict(authors)
 
 
-def _iter_authors_by_annotation(graph: BELGraph, annotation: str = 'Subgraph') -> Iterable[Tuple[str, str]]:
-    for _, _, data in graph.edges(data=True):
-        if not edge_has_annotation(data, annotation) or CITATION not in data or CITATION_AUTHORS not in data[CITATION]:
+def _iter_authors_by_annotation(graph: BELGraph, annotation: str = 'Subgraph') -> Iterable[Tuple[Entity, str]]:
+    for value, _, _, _, data in iterate_annotated_edges(graph, annotation):
+        if CITATION not in data or CITATION_AUTHORS not in data[CITATION]:
             continue
         for author in data[CITATION][CITATION_AUTHORS]:
-            yield data[ANNOTATIONS][annotation], author
+            yield value, author
 
 
 def get_evidences_by_pmid(graph: BELGraph, pmids: Strings) -> Mapping[str, Set[str]]:
@@ -208,44 +271,74 @@ def get_evidences_by_pmid(graph: BELGraph, pmids: Strings) -> Mapping[str, Set[s
     :param pmids: An iterable of PubMed identifiers, as strings. Is consumed and converted to a set.
     :return: A dictionary of {pmid: set of all evidence strings}
     """
+    index = _get_current_index(graph)
+    if index is not None:
+        return index.get_evidences_by_pmid(pmids)
+
     return group_as_sets(
-        (data[CITATION].identifier, data[EVIDENCE])
-        for _, _, _, data in filter_edges(graph, build_pmid_inclusion_filter(pmids))
+        (graph[u][v][k][CITATION].identifier, graph[u][v][k][EVIDENCE])
+        for u, v, k in filter_edges(graph, build_pmid_inclusion_filter(pmids))
     )
 
 
-# TODO date parsing should be handled during either pybel parse-time or during graph loading.
 def count_citation_years(graph: BELGraph) -> typing.Counter[int]:
     """Count the number of citations from each year."""
-    result = defaultdict(set)
+    index = _get_current_index(graph)
+    if index is not None:
+        return index.count_citation_years()
 
-    for _, _, data in graph.edges(data=True):
-        if CITATION not in data or CITATION_DATE not in data[CITATION]:
-            continue
+    # Many edges share a citation, so each distinct citation and date is only parsed once
+    citation_dates = {
+        (data[CITATION].namespace, data[CITATION].identifier, data[CITATION][CITATION_DATE])
+        for _, _, data in graph.edges(data=True)
+        if CITATION in data and CITATION_DATE in data[CITATION]
+    }
 
-        try:
-            dt = _ensure_datetime(data[CITATION][CITATION_DATE])
-        except ValueError:
-            continue
-        else:
-            result[dt.year].add((
-                data[CITATION].namespace,
-                data[CITATION].identifier,
-            ))
+    result = defaultdict(set)
+    for namespace, identifier, date in citation_dates:
+        year = _get_year(date)
+        if year is not None:
+            result[year].add((namespace, identifier))
 
     return count_dict_values(result)
 
 
+def _get_year(date: Union[datetime, str]) -> Optional[int]:
+    try:
+        return _ensure_datetime(date).year
+    except ValueError:
+        return None
+
+
 def _ensure_datetime(s: Union[datetime, str]) -> datetime:
     if isinstance(s, datetime):
         return s
 
     elif isinstance(s, str):
-        return datetime.strptime(s, '%Y-%m-%d')
+        rv = _parse_date(s)
+        if rv is None:
+            raise ValueError(f'invalid date: {s}')
+        return rv
 
     raise TypeError
 
 
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_date(s: str) -> Optional[datetime]:
+    """Parse a date like ``2019-01-31``, or return none if it's not valid."""
+    if len(s) == 10 and s[4] == s[7] == '-' and s[:4].isdigit() and s[5:7].isdigit() and s[8:].isdigit():
+        try:
+            return datetime(int(s[:4]), int(s[5:7]), int(s[8:]))
+        except ValueError:  # e.g., the 30th of February
+            return None
+
+    # Handles the less common forms strptime allows, like unpadded months
+    try:
+        return datetime.strptime(s, '%Y-%m-%d')
+    except ValueError:
+        return None
+
+
 def get_citation_years(graph: BELGraph) -> List[Tuple[int, int]]:
     """Create a citation timeline counter from the graph."""
     return create_timeline(count_citation_years(graph))
@@ -271,12 +364,251 @@ def create_timeline(year_counter: typing.Counter[int]) -> List[Tuple[int, int]]:
 
 def count_confidences(graph: BELGraph) -> typing.Counter[str]:
     """Count the confidences in the graph."""
+    index = _get_current_index(graph)
+    if index is not None:
+        return index.count_confidences()
+
     return Counter(
-        (
-            'None'
-            if ANNOTATIONS not in data or 'Confidence' not in data[ANNOTATIONS] else
-            list(data[ANNOTATIONS]['Confidence'])[0]
-        )
+        _get_confidence(data)
         for _, _, data in graph.edges(data=True)
         if CITATION in data  # don't bother with unqualified statements
     )
+
+
+def _get_confidence(data: Mapping) -> Union[str, Entity]:
+    if ANNOTATIONS not in data or 'Confidence' not in data[ANNOTATIONS]:
+        return 'None'
+    return list(data[ANNOTATIONS]['Confidence'])[0]
+
+
+def attach_provenance_index(graph: BELGraph) -> 'ProvenanceIndex':
+    """Build a provenance index for the graph and attach it, so the functions in this module answer from it.
+
+    Since BEL graphs don't emit events, edges added to or removed from the graph afterwards have to be passed to
+    :meth:`ProvenanceIndex.add_edge` and :meth:`ProvenanceIndex.remove_edge`. The results are only correct if every
+    edit goes through them. The only check is on the number of edges: if the graph and its index differ, the
+    functions log a warning and scan the graph instead. Edits that keep the number of edges the same, like replacing
+    an edge or changing an edge's citation in place, go unnoticed, so call this again after them to rebuild the index.
+
+    >>> from pybel.examples import sialic_acid_graph
+    >>> index = attach_provenance_index(sialic_acid_graph)
+    >>> pmids = count_pmids(sialic_acid_graph)  # answered from the index
+    >>> detach_provenance_index(sialic_acid_graph)
+    """
+    rv = _attached_indexes[graph] = ProvenanceIndex.from_graph(graph)
+    return rv
+
+
+def get_provenance_index(graph: BELGraph) -> Optional['ProvenanceIndex']:
+    """Get the provenance index attached to the graph, if there is one."""
+    return _attached_indexes.get(graph)
+
+
+def detach_provenance_index(graph: BELGraph) -> None:
+    """Remove the provenance index attached to the graph, if there is one."""
+    _attached_indexes.pop(graph, None)
+
+
+def _get_current_index(graph: BELGraph) -> Optional['ProvenanceIndex']:
+    index = _attached_indexes.get(graph)
+    if index is None:
+        return None
+    if index.number_edges != graph.number_of_edges():
+        logger.warning('the provenance index attached to %s is out of date. scanning its edges instead', graph)
+        return None
+    return index
+
+
+class ProvenanceIndex:
+    """Inverted maps from citations, authors, years, and annotation values to the edges that cite them.
+
+    It's built in one pass over the edges with :meth:`from_graph`. Afterwards, each query method returns the same
+    result as the function of the same name in :mod:`pybel_tools.summary.provenance`, but only looks at the
+    citations, authors, or years involved instead of every edge.
+    """
+
+    def __init__(self) -> None:
+        """Build an empty index. Use :meth:`from_graph` to index an existing graph."""
+        #: The data dictionary of each indexed edge
+        self._edge_data: Dict[EdgeKey, Mapping] = {}
+
+        #: The edges with each citation
+        self._edges_by_citation: Dict[Citation, Set[EdgeKey]] = defaultdict(set)
+        #: The number of edges with each citation between each pair of nodes
+        self._pairs_by_citation: Dict[Citation, typing.Counter[NodePair]] = defaultdict(Counter)
+        #: The number of edges by each author with each citation
+        self._citations_by_author: Dict[str, typing.Counter[Citation]] = defaultdict(Counter)
+        #: The number of edges from each year with each citation
+        self._citations_by_year: Dict[int, typing.Counter[Citation]] = defaultdict(Counter)
+        #: The number of edges with each citation between each pair of nodes, for each value of each annotation
+        self._pairs_by_annotation: Dict[str, Dict[Entity, Dict[Citation, typing.Counter[NodePair]]]] = defaultdict(
+            lambda: defaultdict(lambda: defaultdict(Counter)),
+        )
+        #: The number of edges with each PubMed identifier, after stripping whitespace
+        self._pmid_edges: typing.Counter[str] = Counter()
+        #: The number of edges with each evidence for each PubMed identifier
+        self._evidences_by_pmid: Dict[str, typing.Counter[str]] = defaultdict(Counter)
+        #: The number of edges with each confidence, over edges with citations
+        self._confidences: typing.Counter[Union[str, Entity]] = Counter()
+
+    @classmethod
+    def from_graph(cls, graph: BELGraph) -> 'ProvenanceIndex':
+        """Build an index of all edges in the graph."""
+        rv = cls()
+        for u, v, key, data in graph.edges(keys=True, data=True):
+            rv.add_edge(u, v, key, data)
+        return rv
+
+    @property
+    def number_edges(self) -> int:
+        """Get the number of indexed edges, including the ones without citations."""
+        return len(self._edge_data)
+
+    def add_edge(self, u: BaseEntity, v: BaseEntity, key: str, data: Mapping) -> None:
+        """Update the index after an edge is added to the graph."""
+        self._edge_data[u, v, key] = data
+        self._update(u, v, key, data, 1)
+
+    def remove_edge(self, u: BaseEntity, v: BaseEntity, key: str) -> None:
+        """Update the index after an edge is removed from the graph.
+
+        :raises KeyError: If there's no such edge in the index
+        """
+        data = self._edge_data.pop((u, v, key))
+        self._update(u, v, key, data, -1)
+
+    def _update(self, u: BaseEntity, v: BaseEntity, key: str, data: Mapping, change: int) -> None:
+        if CITATION not in data:
+            return
+
+        citation_data = data[CITATION]
+        citation = citation_data.namespace, citation_data.identifier
+
+        if change > 0:
+            self._edges_by_citation[citation].add((u, v, key))
+        else:
+            _discard_item(self._edges_by_citation, citation, (u, v, key))
+        _count_item(self._pairs_by_citation, citation, (u, v), change)
+
+        for author in citation_data.get(CITATION_AUTHORS, []):
+            _count_item(self._citations_by_author, author, citation, change)
+
+        year = _get_citation_year(citation_data)
+        if year is not None:
+            _count_item(self._citations_by_year, year, citation, change)
+
+        for annotation, values in data.get(ANNOTATIONS, {}).items():
+            for value in values:
+                _count_item(self._pairs_by_annotation[annotation][value], citation, (u, v), change)
+                if not self._pairs_by_annotation[annotation][value]:
+                    del self._pairs_by_annotation[annotation][value]
+            if not self._pairs_by_annotation[annotation]:
+                del self._pairs_by_annotation[annotation]
+
+        if has_pubmed(data):
+            _change_count(self._pmid_edges, citation_data.identifier.strip(), change)
+            if EVIDENCE in data:
+                _count_item(self._evidences_by_pmid, citation_data.identifier, data[EVIDENCE], change)
+
+        _change_count(self._confidences, _get_confidence(data), change)
+
+    def get_citation_edges(self, namespace: str, identifier: str) -> Set[EdgeKey]:
+        """Get the (source, target, key) triples of the edges with the given citation."""
+        return set(self._edges_by_citation.get((namespace, identifier), ()))
+
+    def get_author_citations(self, author: str) -> Set[Citation]:
+        """Get the citations by the given author."""
+        return set(self._citations_by_author.get(author, ()))
+
+    def get_year_citations(self, year: int) -> Set[Citation]:
+        """Get the citations from the given year."""
+        return set(self._citations_by_year.get(year, ()))
+
+    def get_annotation_citations(self, annotation: str, value: Entity) -> Set[Citation]:
+        """Get the citations of edges with the given annotation value."""
+        return set(self._pairs_by_annotation.get(annotation, {}).get(value, ()))
+
+    def count_pmids(self) -> typing.Counter[str]:
+        """Count the number of edges with each PubMed identifier, like :func:`count_pmids`."""
+        return Counter(self._pmid_edges)
+
+    def count_citations(self) -> typing.Counter[Citation]:
+        """Count the number of node pairs with each citation, like :func:`count_citations`."""
+        return Counter({
+            citation: len(pairs)
+            for citation, pairs in self._pairs_by_citation.items()
+        })
+
+    def count_citations_by_annotation(self, annotation: str) -> Mapping[Entity, typing.Counter[Citation]]:
+        """Count the node pairs with each citation for each value of the annotation.
+
+        Like :func:`count_citations_by_annotation`.
+        """
+        return {
+            value: Counter({
+                citation: len(pairs)
+                for citation, pairs in citations.items()
+            })
+            for value, citations in self._pairs_by_annotation.get(annotation, {}).items()
+        }
+
+    def count_authors(self) -> typing.Counter[str]:
+        """Count the number of edges in which each author appears, like :func:`count_authors`."""
+        return Counter({
+            author: sum(citations.values())
+            for author, citations in self._citations_by_author.items()
+        })
+
+    def count_author_publications(self) -> typing.Counter[str]:
+        """Count the number of publications of each author, like :func:`count_author_publications`."""
+        return Counter({
+            author: len(citations)
+            for author, citations in self._citations_by_author.items()
+        })
+
+    def get_evidences_by_pmid(self, pmids: Strings) -> Mapping[str, Set[str]]:
+        """Map PubMed identifiers to their evidence strings, like :func:`get_evidences_by_pmid`."""
+        if isinstance(pmids, str):
+            pmids = [pmids]
+        return {
+            pmid: set(self._evidences_by_pmid[pmid])
+            for pmid in set(pmids)
+            if pmid in self._evidences_by_pmid
+        }
+
+    def count_citation_years(self) -> typing.Counter[int]:
+        """Count the number of citations from each year, like :func:`count_citation_years`."""
+        return Counter({
+            year: len(citations)
+            for year, citations in self._citations_by_year.items()
+        })
+
+    def count_confidences(self) -> typing.Counter[Union[str, Entity]]:
+        """Count the confidences of edges with citations, like :func:`count_confidences`."""
+        return Counter(self._confidences)
+
+
+def _get_citation_year(citation_data: Mapping) -> Optional[int]:
+    if CITATION_DATE not in citation_data:
+        return None
+    return _get_year(citation_data[CITATION_DATE])
+
+
+def _change_count(counter: typing.Counter, item: Hashable, change: int) -> None:
+    """Change the count of the item, removing it if it reaches zero."""
+    counter[item] += change
+    if counter[item] <= 0:
+        del counter[item]
+
+
+def _count_item(counters: Dict[Hashable, typing.Counter], key: Hashable, item: Hashable, change: int) -> None:
+    """Change the count of the item in the key's counter, removing the counter if it becomes empty."""
+    _change_count(counters[key], item, change)
+    if not counters[key]:
+        del counters[key]
+
+
+def _discard_item(sets: Dict[Hashable, Set], key: Hashable, item: Hashable) -> None:
+    sets[key].discard(item)
+    if not sets[key]:
+        del sets[key]
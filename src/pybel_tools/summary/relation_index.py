@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+"""An index of the set of relations between each pair of nodes, stored as a bitmask.
+
+Each relation is assigned a bit by :func:`get_relation_bit`, so checking whether the edges between a pair of nodes
+are consistent or contradictory is a bit test instead of a pass over the pair's edges. Functions like
+:func:`pybel_tools.summary.get_contradictory_pairs` build an index in one pass over the edges, which also visits each
+pair once even if it has many edges. The ones that check a single pair, like
+:func:`pybel_tools.summary.pair_has_contradiction`, answer from the index attached to the graph with
+:func:`attach_relation_index`, if there is one.
+"""
+
+import logging
+import typing
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Mapping, Optional, Set, Tuple
+from weakref import WeakKeyDictionary
+
+from pybel import BELGraph
+from pybel.constants import CAUSAL_DECREASE_RELATIONS, CAUSAL_INCREASE_RELATIONS, CAUSES_NO_CHANGE, RELATION
+from pybel.dsl import BaseEntity
+from pybel.typing import EdgeData
+from ..typing import NodePair
+
+__all__ = [
+    'RelationIndex',
+    'attach_relation_index',
+    'get_relation_index',
+    'detach_relation_index',
+    'get_pair_mask',
+    'build_relation_index',
+    'get_relation_bit',
+    'get_mask_relations',
+    'mask_is_consistent',
+    'mask_has_contradiction',
+]
+
+logger = logging.getLogger(__name__)
+
+#: An edge's source, target, and key
+EdgeKey = Tuple[BaseEntity, BaseEntity, str]
+
+#: The bit of each relation, extended as new relations are seen
+_relation_bits: Dict[str, int] = {}
+#: The relation of each bit
+_bit_relations: Dict[int, str] = {}
+
+_attached_indexes: 'WeakKeyDictionary[BELGraph, RelationIndex]' = WeakKeyDictionary()
+
+
+def get_relation_bit(relation: str) -> int:
+    """Get the bit representing the relation, assigning the next unused one if it's new."""
+    rv = _relation_bits.get(relation)
+    if rv is None:
+        rv = _relation_bits[relation] = 1 << len(_relation_bits)
+        _bit_relations[rv] = relation
+    return rv
+
+
+def _get_relations_mask(relations: Iterable[str]) -> int:
+    rv = 0
+    for relation in relations:
+        rv |= get_relation_bit(relation)
+    return rv
+
+
+INCREASE_MASK = _get_relations_mask(sorted(CAUSAL_INCREASE_RELATIONS))
+DECREASE_MASK = _get_relations_mask(sorted(CAUSAL_DECREASE_RELATIONS))
+NO_CHANGE_MASK = _get_relations_mask([CAUSES_NO_CHANGE])
+
+
+def get_mask_relations(mask: int) -> Set[str]:
+    """Get the relations whose bits are set in the mask."""
+    rv = set()
+    while mask:
+        bit = mask & -mask
+        rv.add(_bit_relations[bit])
+        mask ^= bit
+    return rv
+
+
+def mask_is_consistent(mask: int) -> Optional[str]:
+    """Get the relation if the mask has exactly one, like :func:`pybel_tools.summary.pair_is_consistent`."""
+    if not mask or mask & (mask - 1):
+        return None
+    return _bit_relations[mask]
+
+
+def mask_has_contradiction(mask: int) -> bool:
+    """Check if the mask has more than one of increases, decreases, and causes no change.
+
+    Like :func:`pybel_tools.summary.relation_set_has_contradictions`.
+    """
+    return 1 < bool(mask & INCREASE_MASK) + bool(mask & DECREASE_MASK) + bool(mask & NO_CHANGE_MASK)
+
+
+def attach_relation_index(graph: BELGraph) -> 'RelationIndex':
+    """Build a relation index for the graph and attach it, so the functions checking node pairs answer from it.
+
+    Since BEL graphs don't emit events, edges added to or removed from the graph afterwards have to be passed to
+    :meth:`RelationIndex.add_edge` and :meth:`RelationIndex.remove_edge`. Functions that change the graph themselves,
+    like :func:`pybel_tools.mutation.collapse_consistent_edges`, keep the attached index up to date. If the number of
+    edges between a pair of nodes doesn't match the index, the functions log a warning and check the edges instead.
+    That can't catch an edge replaced by another or a relation changed in place, so attach a new index after those.
+    """
+    rv = _attached_indexes[graph] = RelationIndex.from_graph(graph)
+    return rv
+
+
+def get_relation_index(graph: BELGraph) -> Optional['RelationIndex']:
+    """Get the relation index attached to the graph, if there is one."""
+    return _attached_indexes.get(graph)
+
+
+def detach_relation_index(graph: BELGraph) -> None:
+    """Remove the relation index attached to the graph, if there is one."""
+    _attached_indexes.pop(graph, None)
+
+
+def get_pair_mask(graph: BELGraph, u: BaseEntity, v: BaseEntity) -> int:
+    """Get the mask of the relations between the nodes, from the attached index if it's up to date for the pair.
+
+    Assumes both nodes are in the graph.
+    """
+    index = _attached_indexes.get(graph)
+    if index is not None:
+        if index.count_edges(u, v) == graph.number_of_edges(u, v):
+            return index.get_mask(u, v)
+        logger.warning('the relation index attached to %s is out of date. checking the edges instead', graph)
+
+    return _get_relations_mask(data[RELATION] for data in graph[u][v].values())
+
+
+def build_relation_index(graph: BELGraph) -> 'RelationIndex':
+    """Get the relation index attached to the graph if it's up to date, or else build a new one."""
+    index = _attached_indexes.get(graph)
+    if index is not None:
+        if index.number_edges == graph.number_of_edges():
+            return index
+        logger.warning('the relation index attached to %s is out of date. building a new one', graph)
+    return RelationIndex.from_graph(graph)
+
+
+class RelationIndex:
+    """A bitmask of the relations between each pair of nodes with edges between them.
+
+    The number of edges with each relation is also kept, so the masks stay correct as edges are removed.
+    """
+
+    def __init__(self) -> None:
+        """Build an empty index. Use :meth:`from_graph` to index an existing graph."""
+        #: The relation bit of each indexed edge
+        self._edge_bits: Dict[EdgeKey, int] = {}
+        #: The number of edges with each relation bit between each pair of nodes
+        self._pair_bits: Dict[NodePair, typing.Counter[int]] = defaultdict(Counter)
+        #: The relations between each pair of nodes
+        self._masks: Dict[NodePair, int] = {}
+
+    @classmethod
+    def from_graph(cls, graph: BELGraph) -> 'RelationIndex':
+        """Build an index of all edges in the graph."""
+        rv = cls()
+        for u, v, key, relation in graph.edges(keys=True, data=RELATION):
+            rv._add(u, v, key, relation)
+        return rv
+
+    @property
+    def number_edges(self) -> int:
+        """Get the number of indexed edges."""
+        return len(self._edge_bits)
+
+    def add_edge(self, u: BaseEntity, v: BaseEntity, key: str, data: EdgeData) -> None:
+        """Update the index after an edge is added to the graph."""
+        self._add(u, v, key, data[RELATION])
+
+    def _add(self, u: BaseEntity, v: BaseEntity, key: str, relation: str) -> None:
+        bit = self._edge_bits[u, v, key] = get_relation_bit(relation)
+        self._pair_bits[u, v][bit] += 1
+        self._masks[u, v] = self._masks.get((u, v), 0) | bit
+
+    def remove_edge(self, u: BaseEntity, v: BaseEntity, key: str) -> None:
+        """Update the index after an edge is removed from the graph.
+
+        :raises KeyError: If there's no such edge in the index
+        """
+        bit = self._edge_bits.pop((u, v, key))
+        counter = self._pair_bits[u, v]
+        counter[bit] -= 1
+        if counter[bit]:
+            return
+
+        del counter[bit]
+        if counter:
+            self._masks[u, v] &= ~bit
+        else:
+            del self._pair_bits[u, v]
+            del self._masks[u, v]
+
+    def count_edges(self, u: BaseEntity, v: BaseEntity) -> int:
+        """Count the indexed edges from the first node to the second."""
+        counter = self._pair_bits.get((u, v))
+        return 0 if counter is None else sum(counter.values())
+
+    def get_mask(self, u: BaseEntity, v: BaseEntity) -> int:
+        """Get the mask of the relations from the first node to the second, which is zero if there are no edges."""
+        return self._masks.get((u, v), 0)
+
+    def get_relations(self, u: BaseEntity, v: BaseEntity) -> Set[str]:
+        """Get the relations from the first node to the second."""
+        return get_mask_relations(self.get_mask(u, v))
+
+    def iterate_masks(self) -> Iterable[Tuple[BaseEntity, BaseEntity, int]]:
+        """Iterate over each pair of nodes with edges between them, once, and the mask of their relations."""
+        for (u, v), mask in self._masks.items():
+            yield u, v, mask
+
+    def get_edge_relations(self) -> Mapping[NodePair, Set[str]]:
+        """Build a dictionary of {node pair: set of relations}, like :func:`pybel_tools.summary.get_edge_relations`."""
+        return {
+            pair: get_mask_relations(mask)
+            for pair, mask in self._masks.items()
+        }
@@ -0,0 +1,417 @@
+# -*- coding: utf-8 -*-
+
+"""A compact representation of the signed edges in a BEL graph for counting stability motifs.
+
+A BEL graph is compiled in a single pass over its edges to a :class:`SignedAdjacency`, which assigns each node an
+integer identifier and stores one bitmask of relation flags for each ordered pair of nodes. All of the pair and triple
+counts reported by :func:`pybel_tools.summary.summarize_stability` are then calculated from sparse matrices built from
+these bitmasks. The triangle-based counts use sparse matrix products.
+"""
+
+import multiprocessing
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from pybel import BELGraph
+from pybel.constants import (
+    CAUSAL_DECREASE_RELATIONS, CAUSAL_INCREASE_RELATIONS, CAUSES_NO_CHANGE, NEGATIVE_CORRELATION,
+    POSITIVE_CORRELATION, RELATION,
+)
+from pybel.dsl import BaseEntity
+
+__all__ = [
+    'SignedAdjacency',
+    'compile_signed_adjacency',
+    'count_stability',
+    'estimate_stability',
+    'StabilityEstimate',
+    'STABILITY_LABELS',
+]
+
+INCREASE = 1
+DECREASE = 2
+NO_CHANGE = 4
+POSITIVE = 8
+NEGATIVE = 16
+
+RELATION_FLAGS: Mapping[str, int] = {
+    **{relation: INCREASE for relation in CAUSAL_INCREASE_RELATIONS},
+    **{relation: DECREASE for relation in CAUSAL_DECREASE_RELATIONS},
+    CAUSES_NO_CHANGE: NO_CHANGE,
+    POSITIVE_CORRELATION: POSITIVE,
+    NEGATIVE_CORRELATION: NEGATIVE,
+}
+
+#: The number of rows of each sparse matrix product, which bounds the memory used for hub nodes
+BATCH_SIZE = 2048
+
+#: The state shared with each worker process by :func:`_init_worker`
+_worker_state: Dict[str, Any] = {}
+
+
+@dataclass
+class SignedAdjacency:
+    """The signed edges of a BEL graph over integer node identifiers.
+
+    Nodes are numbered in the order of their string representations, so the identifiers can be used to put nodes in
+    the same order as ``sorted(nodes, key=str)`` without comparing strings again.
+    """
+
+    #: The nodes, indexed by their identifiers
+    nodes: List[BaseEntity]
+    #: The source node identifier of each ordered pair
+    sources: np.ndarray
+    #: The target node identifier of each ordered pair
+    targets: np.ndarray
+    #: The union of the relation flags of all edges from the source to the target
+    masks: np.ndarray
+
+    @property
+    def number_nodes(self) -> int:
+        """Get the number of nodes."""
+        return len(self.nodes)
+
+    def get_matrix(self, flags: int) -> sparse.csr_matrix:
+        """Get a binary adjacency matrix of the ordered pairs with any of the given relation flags."""
+        idx = (self.masks & flags) != 0
+        return _build_matrix(self.sources[idx], self.targets[idx], self.number_nodes)
+
+    def get_mutual_pairs(self, forward: int, backward: int, ordered: bool = True) -> Set[Tuple[BaseEntity, BaseEntity]]:
+        """Get the pairs of nodes (A, B) with forward flags on the edges from A to B and backward flags from B to A.
+
+        :param forward: The relation flags of the edges from the first node to the second
+        :param backward: The relation flags of the edges from the second node to the first
+        :param ordered: If false, only include each pair once, with the nodes in the order of their string
+         representations like :func:`pybel_tools.summary.get_chaotic_pairs`. Only makes sense if the flags are the
+         same.
+        """
+        product = self.get_matrix(forward).multiply(self.get_matrix(backward).T).tocoo()
+        return {
+            (self.nodes[source], self.nodes[target])
+            for source, target in zip(product.row.tolist(), product.col.tolist())
+            if ordered or source <= target
+        }
+
+
+def compile_signed_adjacency(graph: BELGraph) -> SignedAdjacency:
+    """Compile the signed edges of a BEL graph in one pass."""
+    nodes = sorted(graph, key=str)
+    node_to_id = {node: i for i, node in enumerate(nodes)}
+
+    pair_masks: Dict[int, int] = {}
+    number_nodes = len(nodes)
+    for u, v, data in graph.edges(data=True):
+        flag = RELATION_FLAGS.get(data[RELATION])
+        if flag is None:
+            continue
+        key = node_to_id[u] * number_nodes + node_to_id[v]
+        pair_masks[key] = pair_masks.get(key, 0) | flag
+
+    keys = np.fromiter(pair_masks.keys(), dtype=np.int64, count=len(pair_masks))
+    sources, targets = np.divmod(keys, max(number_nodes, 1))
+
+    return SignedAdjacency(
+        nodes=nodes,
+        sources=sources,
+        targets=targets,
+        masks=np.fromiter(pair_masks.values(), dtype=np.int64, count=len(pair_masks)),
+    )
+
+
+def _build_matrix(sources: np.ndarray, targets: np.ndarray, number_nodes: int) -> sparse.csr_matrix:
+    return sparse.csr_matrix(
+        (np.ones(len(sources), dtype=np.int64), (sources, targets)),
+        shape=(number_nodes, number_nodes),
+    )
+
+
+def _split_diagonal(matrix: sparse.csr_matrix):
+    """Split a matrix into a copy without its diagonal and a dense vector of its diagonal."""
+    diagonal = matrix.diagonal()
+    off_diagonal = sparse.csr_matrix(matrix - sparse.diags(diagonal))
+    off_diagonal.eliminate_zeros()
+    return off_diagonal, diagonal
+
+
+def _binary(matrix: sparse.spmatrix) -> sparse.csr_matrix:
+    matrix = sparse.csr_matrix(matrix)
+    matrix.data = (matrix.data != 0).astype(np.int64)
+    matrix.eliminate_zeros()
+    return matrix
+
+
+class _Matrices:
+    """The sparse matrices needed to count the stability motifs of a compiled graph."""
+
+    def __init__(self, adjacency: SignedAdjacency):
+        self.number_nodes = adjacency.number_nodes
+
+        self.increases = increases = adjacency.get_matrix(INCREASE)
+        self.decreases = decreases = adjacency.get_matrix(DECREASE)
+        self.decreases_transposed = decreases.T.tocsr()
+
+        self.increases_off, self.increases_diagonal = _split_diagonal(increases)
+        self.decreases_off, self.decreases_diagonal = _split_diagonal(decreases)
+        self.increases_off_transposed = self.increases_off.T.tocsr()
+        self.decreases_off_transposed = self.decreases_off.T.tocsr()
+
+        contradiction_flags = adjacency.masks & (INCREASE | DECREASE | NO_CHANGE)
+        is_contradiction = (
+            ((contradiction_flags & INCREASE) != 0).astype(np.int64)
+            + ((contradiction_flags & DECREASE) != 0)
+            + ((contradiction_flags & NO_CHANGE) != 0)
+        ) > 1
+        self.contradictions = np.bincount(
+            adjacency.sources[is_contradiction],
+            minlength=self.number_nodes,
+        ).astype(np.int64)
+
+        # correlations are symmetric, so they're counted no matter which direction the edge went
+        positives = adjacency.get_matrix(POSITIVE)
+        negatives = adjacency.get_matrix(NEGATIVE)
+        self.positives, self.positives_diagonal = _split_diagonal(_binary(positives + positives.T))
+        self.negatives, self.negatives_diagonal = _split_diagonal(_binary(negatives + negatives.T))
+
+        # Jens' transformation (type 1) from :func:`pybel_tools.summary.jens_transformation_alpha`
+        jens = _binary(positives + positives.T + increases + self.decreases_transposed)
+        self.jens_off, self.jens_diagonal = _split_diagonal(jens)
+        self.jens_off_transposed = self.jens_off.T.tocsr()
+
+
+def _row_sums(matrix: sparse.spmatrix) -> np.ndarray:
+    return np.asarray(matrix.sum(axis=1), dtype=np.float64).ravel()
+
+
+def _count_regulatory_pairs(m: _Matrices, rows: np.ndarray) -> np.ndarray:
+    return _row_sums(m.increases[rows].multiply(m.decreases_transposed[rows]))
+
+
+def _count_mutual_pairs(off: sparse.csr_matrix, off_transposed: sparse.csr_matrix, diagonal, rows) -> np.ndarray:
+    # pairs of distinct nodes are seen from both ends, so each end gets half
+    return _row_sums(off[rows].multiply(off_transposed[rows])) / 2 + diagonal[rows]
+
+
+def _count_chaotic_pairs(m: _Matrices, rows: np.ndarray) -> np.ndarray:
+    return _count_mutual_pairs(m.increases_off, m.increases_off_transposed, m.increases_diagonal, rows)
+
+
+def _count_dampened_pairs(m: _Matrices, rows: np.ndarray) -> np.ndarray:
+    return _count_mutual_pairs(m.decreases_off, m.decreases_off_transposed, m.decreases_diagonal, rows)
+
+
+def _count_contradictory_pairs(m: _Matrices, rows: np.ndarray) -> np.ndarray:
+    return m.contradictions[rows].astype(np.float64)
+
+
+def _count_separately_unstable_triples(m: _Matrices, rows: np.ndarray) -> np.ndarray:
+    positives = m.positives[rows]
+    # each triangle with one negative and two positive edges is seen from both ends of the negative edge
+    triangles = _row_sums((positives @ m.positives).multiply(m.negatives[rows])) / 2
+    # triples that use a correlative self-loop, which :func:`get_correlation_triangles` also reports
+    degenerate = (
+        m.positives_diagonal[rows] * _row_sums(positives.multiply(m.negatives[rows]))
+        + m.negatives_diagonal[rows] * _row_sums(positives)
+    )
+    return triangles + degenerate
+
+
+def _count_mutually_unstable_triples(m: _Matrices, rows: np.ndarray) -> np.ndarray:
+    negatives = m.negatives[rows]
+    triangles = _row_sums((negatives @ m.negatives).multiply(negatives)) / 6
+    degenerate = m.negatives_diagonal[rows] * _row_sums(negatives)
+    return triangles + degenerate
+
+
+def _count_directed_triangles(
+    off: sparse.csr_matrix,
+    off_transposed: sparse.csr_matrix,
+    diagonal: np.ndarray,
+    rows: np.ndarray,
+    include_loops: bool,
+) -> np.ndarray:
+    """Count the distinct node sets of the 3-cycles reported by :func:`get_triangles`."""
+    off_rows = off[rows]
+    cycles = _row_sums((off_rows @ off).multiply(off_transposed[rows])) / 3
+
+    # node sets where every pair is mutual have a 3-cycle in both orientations, but are only reported once
+    mutual = off.multiply(off_transposed).tocsr()
+    mutual_rows = mutual[rows]
+    doubled = _row_sums((mutual_rows @ mutual).multiply(mutual_rows)) / 6
+
+    # a node with a self-loop forms a 3-cycle with itself and with each of its mutual neighbors
+    degenerate = diagonal[rows] * (_row_sums(mutual_rows) + (1 if include_loops else 0))
+
+    return cycles - doubled + degenerate
+
+
+def _count_jens_unstable_triples(m: _Matrices, rows: np.ndarray) -> np.ndarray:
+    return _count_directed_triangles(m.jens_off, m.jens_off_transposed, m.jens_diagonal, rows, include_loops=True)
+
+
+def _count_mismatch_triples(causal: sparse.csr_matrix, m: _Matrices, rows: np.ndarray) -> np.ndarray:
+    # pairs of children are seen in both orders
+    causal_rows = causal[rows]
+    return _row_sums((causal_rows @ m.negatives).multiply(causal_rows)) / 2
+
+
+def _count_increase_mismatch_triples(m: _Matrices, rows: np.ndarray) -> np.ndarray:
+    return _count_mismatch_triples(m.increases, m, rows)
+
+
+def _count_decrease_mismatch_triples(m: _Matrices, rows: np.ndarray) -> np.ndarray:
+    return _count_mismatch_triples(m.decreases, m, rows)
+
+
+def _count_chaotic_triples(m: _Matrices, rows: np.ndarray) -> np.ndarray:
+    return _count_directed_triangles(
+        m.increases_off, m.increases_off_transposed, m.increases_diagonal, rows, include_loops=False,
+    )
+
+
+def _count_dampened_triples(m: _Matrices, rows: np.ndarray) -> np.ndarray:
+    return _count_directed_triangles(
+        m.decreases_off, m.decreases_off_transposed, m.decreases_diagonal, rows, include_loops=False,
+    )
+
+
+#: Functions that calculate the contribution of each of the given rows (nodes) to each count
+_COUNTERS: Mapping[str, Callable[[_Matrices, np.ndarray], np.ndarray]] = {
+    'Regulatory Pairs': _count_regulatory_pairs,
+    'Chaotic Pairs': _count_chaotic_pairs,
+    'Dampened Pairs': _count_dampened_pairs,
+    'Contradictory Pairs': _count_contradictory_pairs,
+    'Separately Unstable Triples': _count_separately_unstable_triples,
+    'Mutually Unstable Triples': _count_mutually_unstable_triples,
+    'Jens Unstable Triples': _count_jens_unstable_triples,
+    'Increase Mismatch Triples': _count_increase_mismatch_triples,
+    'Decrease Mismatch Triples': _count_decrease_mismatch_triples,
+    'Chaotic Triples': _count_chaotic_triples,
+    'Dampened Triples': _count_dampened_triples,
+}
+
+#: The labels of the counts returned by :func:`count_stability`
+STABILITY_LABELS = list(_COUNTERS)
+
+
+class StabilityEstimate(NamedTuple):
+    """An estimate of a count of stability motifs from a sample of nodes."""
+
+    #: The estimated count
+    estimate: float
+    #: The standard error of the estimate, which is zero when all nodes were sampled
+    standard_error: float
+
+
+def count_stability(
+    adjacency: SignedAdjacency,
+    batch_size: Optional[int] = None,
+    n_jobs: Optional[int] = None,
+) -> Mapping[str, int]:
+    """Count the stability motifs in a compiled graph.
+
+    :param adjacency: A compiled graph from :func:`compile_signed_adjacency`
+    :param batch_size: The number of nodes whose rows are multiplied at once. Defaults to :data:`BATCH_SIZE`.
+    :param n_jobs: The number of worker processes. If none or 1, counts in the current process. If -1, uses all
+     cores. Each worker receives the compiled graph once, then counts (detector, block of rows) tasks, so the
+     slowest detectors are spread over several workers too.
+    :return: A dictionary from the labels in :data:`STABILITY_LABELS` to counts
+    """
+    if n_jobs is None or n_jobs == 1:
+        rows = np.arange(adjacency.number_nodes)
+        return {
+            label: int(round(contributions.sum()))
+            for label, contributions in _get_contributions(adjacency, rows, batch_size=batch_size).items()
+        }
+
+    batch_size = batch_size or BATCH_SIZE
+    tasks = [
+        (label, start, min(start + batch_size, adjacency.number_nodes))
+        for label in _COUNTERS
+        for start in range(0, adjacency.number_nodes, batch_size)
+    ]
+
+    totals = dict.fromkeys(_COUNTERS, 0.0)
+    processes = None if n_jobs < 1 else n_jobs
+    with multiprocessing.Pool(processes=processes, initializer=_init_worker, initargs=(adjacency,)) as pool:
+        for label, total in pool.imap_unordered(_count_worker_task, tasks):
+            totals[label] += total
+
+    return {
+        label: int(round(total))
+        for label, total in totals.items()
+    }
+
+
+def _init_worker(adjacency: SignedAdjacency) -> None:
+    _worker_state['matrices'] = _Matrices(adjacency)
+
+
+def _count_worker_task(task: Tuple[str, int, int]) -> Tuple[str, float]:
+    label, start, stop = task
+    return label, float(_COUNTERS[label](_worker_state['matrices'], np.arange(start, stop)).sum())
+
+
+def estimate_stability(
+    adjacency: SignedAdjacency,
+    sample_size: int,
+    seed: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> Mapping[str, StabilityEstimate]:
+    """Estimate the stability motif counts in a compiled graph from a random sample of nodes.
+
+    Each count is a sum of contributions from each node, so it is estimated by scaling up the mean contribution of a
+    uniform sample of nodes drawn without replacement. Only the sampled rows are multiplied, so the cost grows with the
+    sample size instead of with the number of nodes.
+
+    :param adjacency: A compiled graph from :func:`compile_signed_adjacency`
+    :param sample_size: The number of nodes to sample. If it's at least the number of nodes, the counts are exact.
+    :param seed: The seed for the random number generator
+    :param batch_size: The number of nodes whose rows are multiplied at once. Defaults to :data:`BATCH_SIZE`.
+    :return: A dictionary from the labels in :data:`STABILITY_LABELS` to estimates
+    """
+    number_nodes = adjacency.number_nodes
+    if sample_size <= 0:
+        raise ValueError(f'sample size must be positive: {sample_size}')
+
+    if number_nodes <= sample_size:
+        return {
+            label: StabilityEstimate(float(count), 0.0)
+            for label, count in count_stability(adjacency, batch_size=batch_size).items()
+        }
+
+    rows = np.sort(np.random.RandomState(seed).choice(number_nodes, size=sample_size, replace=False))
+    # finite population correction, since nodes are sampled without replacement
+    correction = np.sqrt((number_nodes - sample_size) / (number_nodes - 1))
+
+    rv = {}
+    for label, contributions in _get_contributions(adjacency, rows, batch_size=batch_size).items():
+        standard_deviation = contributions.std(ddof=1) if sample_size > 1 else 0.0
+        rv[label] = StabilityEstimate(
+            estimate=float(number_nodes * contributions.mean()),
+            standard_error=float(number_nodes * standard_deviation / np.sqrt(sample_size) * correction),
+        )
+    return rv
+
+
+def _get_contributions(
+    adjacency: SignedAdjacency,
+    rows: np.ndarray,
+    batch_size: Optional[int] = None,
+) -> Mapping[str, np.ndarray]:
+    """Calculate the contribution of each of the given nodes to each count, in batches of rows."""
+    batch_size = batch_size or BATCH_SIZE
+    matrices = _Matrices(adjacency)
+
+    batches = {label: [] for label in _COUNTERS}
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        for label, counter in _COUNTERS.items():
+            batches[label].append(counter(matrices, batch))
+
+    return {
+        label: np.concatenate(arrays) if arrays else np.zeros(0)
+        for label, arrays in batches.items()
+    }
@@ -4,7 +4,7 @@
 
 import itertools as itt
 import logging
-from typing import Iterable, Mapping, Set, Tuple
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
 
 import networkx as nx
 
@@ -15,7 +15,8 @@ from pybel.constants import (
 )
 from pybel.dsl import BaseEntity
 from pybel.struct import get_causal_subgraph
-from .contradictions import relation_set_has_contradictions
+from .relation_index import build_relation_index, get_mask_relations, mask_has_contradiction
+from .signed_adjacency import StabilityEstimate, compile_signed_adjacency, count_stability, estimate_stability
 from ..typing import NodeTriple, SetOfNodePairs, SetOfNodeTriples
 
 __all__ = [
@@ -25,9 +26,11 @@ __all__ = [
     'get_dampened_pairs',
     'get_correlation_graph',
     'get_correlation_triangles',
+    'count_correlation_triangles',
     'get_separate_unstable_correlation_triples',
     'get_mutually_unstable_correlation_triples',
     'get_triangles',
+    'count_triangles',
     'jens_transformation_alpha',
     'jens_transformation_beta',
     'get_jens_unstable',
@@ -36,6 +39,7 @@ __all__ = [
     'get_chaotic_triplets',
     'get_dampened_triplets',
     'summarize_stability',
+    'estimate_stability_summary',
 ]
 
 logger = logging.getLogger(__name__)
@@ -47,10 +51,9 @@ def get_contradiction_summary(graph: BELGraph) -> Set[Tuple[BaseEntity, BaseEnti
 
 
 def _iterate_contradictions(graph) -> Iterable[Tuple[BaseEntity, BaseEntity, Tuple[str]]]:
-    for u, v in set(graph.edges()):
-        relations = tuple(sorted({data[RELATION] for data in graph[u][v].values()}))
-        if relation_set_has_contradictions(relations):
-            yield u, v, relations
+    for u, v, mask in build_relation_index(graph).iterate_masks():
+        if mask_has_contradiction(mask):
+            yield u, v, tuple(sorted(get_mask_relations(mask)))
 
 
 def get_regulatory_pairs(graph: BELGraph) -> SetOfNodePairs:
@@ -130,14 +133,32 @@ def get_correlation_graph(graph: BELGraph) -> nx.Graph:
     return result
 
 
-def get_correlation_triangles(graph: BELGraph) -> SetOfNodeTriples:
-    """Return a set of all triangles pointed by the given node."""
-    return {
-        tuple(sorted([n, u, v], key=str))
-        for n in graph
-        for u, v in itt.combinations(graph[n], 2)
-        if graph.has_edge(u, v)
+def get_correlation_triangles(graph: nx.Graph) -> SetOfNodeTriples:
+    """Return a set of all triangles in an undirected graph, with nodes in sorted order.
+
+    Triangles are listed with a degree-ordered forward algorithm, so hub nodes don't require iterating over all pairs
+    of their neighbors. A node with a self-loop also forms a (degenerate) triangle with each of its neighbors.
+    """
+    nodes, neighbors, loops = _index_undirected(graph)
+    rv = {
+        (nodes[a], nodes[b], nodes[c])
+        for a, b, c in _iterate_forward_triangles(neighbors)
     }
+    rv.update(
+        _sorted_triple(nodes, loop, loop, neighbor)
+        for loop in loops
+        for neighbor in neighbors[loop]
+    )
+    return rv
+
+
+def count_correlation_triangles(graph: nx.Graph) -> int:
+    """Count the triangles returned by :func:`get_correlation_triangles` without building them."""
+    _, neighbors, loops = _index_undirected(graph)
+    return (
+        sum(1 for _ in _iterate_forward_triangles(neighbors))
+        + sum(len(neighbors[loop]) for loop in loops)
+    )
 
 
 def get_triangles(graph: nx.DiGraph) -> SetOfNodeTriples:
@@ -145,12 +166,106 @@ def get_triangles(graph: nx.DiGraph) -> SetOfNodeTriples:
 
     Each 3-cycle is returned once, with nodes in sorted order.
     """
-    return {
-        tuple(sorted([a, b, c], key=str))
-        for a, b in graph.edges()
-        for c in graph.successors(b)
-        if graph.has_edge(c, a)
+    nodes, successors, neighbors, loops = _index_directed(graph)
+    rv = {
+        (nodes[a], nodes[b], nodes[c])
+        for a, b, c in _iterate_forward_triangles(neighbors)
+        if _is_cycle(successors, a, b, c)
     }
+    for loop in loops:
+        rv.add((nodes[loop], nodes[loop], nodes[loop]))
+        rv.update(
+            _sorted_triple(nodes, loop, loop, neighbor)
+            for neighbor in neighbors[loop]
+            if neighbor in successors[loop] and loop in successors[neighbor]
+        )
+    return rv
+
+
+def count_triangles(graph: nx.DiGraph) -> int:
+    """Count the 3-cycles returned by :func:`get_triangles` without building them."""
+    _, successors, neighbors, loops = _index_directed(graph)
+    return (
+        sum(1 for a, b, c in _iterate_forward_triangles(neighbors) if _is_cycle(successors, a, b, c))
+        + sum(
+            1 + sum(neighbor in successors[loop] and loop in successors[neighbor] for neighbor in neighbors[loop])
+            for loop in loops
+        )
+    )
+
+
+def _index_nodes(graph: nx.Graph) -> Tuple[List[BaseEntity], Dict[BaseEntity, int]]:
+    """Number the nodes in sorted order, so sorting their identifiers gives the same order as sorting the nodes."""
+    nodes = sorted(graph, key=str)
+    return nodes, {node: i for i, node in enumerate(nodes)}
+
+
+def _index_undirected(graph: nx.Graph) -> Tuple[List[BaseEntity], List[Set[int]], Set[int]]:
+    """Get the nodes, the neighbors of each node excluding itself, and the nodes with self-loops."""
+    nodes, node_to_id = _index_nodes(graph)
+    neighbors = [set() for _ in nodes]
+    loops = set()
+    for u, v in graph.edges():
+        u, v = node_to_id[u], node_to_id[v]
+        if u == v:
+            loops.add(u)
+        else:
+            neighbors[u].add(v)
+            neighbors[v].add(u)
+    return nodes, neighbors, loops
+
+
+def _index_directed(graph: nx.DiGraph) -> Tuple[List[BaseEntity], List[Set[int]], List[Set[int]], Set[int]]:
+    """Get the nodes, the successors and undirected neighbors of each node, and the nodes with self-loops."""
+    nodes, node_to_id = _index_nodes(graph)
+    successors = [set() for _ in nodes]
+    neighbors = [set() for _ in nodes]
+    loops = set()
+    for u, v in graph.edges():
+        u, v = node_to_id[u], node_to_id[v]
+        successors[u].add(v)
+        if u == v:
+            loops.add(u)
+        else:
+            neighbors[u].add(v)
+            neighbors[v].add(u)
+    return nodes, successors, neighbors, loops
+
+
+def _iterate_forward_triangles(neighbors: List[Set[int]]) -> Iterable[Tuple[int, int, int]]:
+    """Iterate over each triangle in an undirected graph once, as a sorted triple of node identifiers.
+
+    Each edge is oriented from the node with the lower degree to the node with the higher degree, so a hub node only
+    has to intersect its few forward neighbors instead of checking all pairs of its neighbors.
+    """
+    order = sorted(range(len(neighbors)), key=lambda i: (len(neighbors[i]), i))
+    rank = [0] * len(neighbors)
+    for position, i in enumerate(order):
+        rank[i] = position
+
+    forward = [
+        {v for v in neighbors[u] if rank[u] < rank[v]}
+        for u in range(len(neighbors))
+    ]
+
+    for u in order:
+        forward_u = forward[u]
+        for v in forward_u:
+            for w in forward_u.intersection(forward[v]):
+                yield tuple(sorted((u, v, w)))
+
+
+def _is_cycle(successors: List[Set[int]], a: int, b: int, c: int) -> bool:
+    """Check if there's a 3-cycle through the given nodes in either orientation."""
+    return (
+        (b in successors[a] and c in successors[b] and a in successors[c])
+        or (c in successors[a] and b in successors[c] and a in successors[b])
+    )
+
+
+def _sorted_triple(nodes: List[BaseEntity], a: int, b: int, c: int) -> NodeTriple:
+    x, y, z = sorted((a, b, c))
+    return nodes[x], nodes[y], nodes[z]
 
 
 def get_separate_unstable_correlation_triples(graph: BELGraph) -> SetOfNodeTriples:
@@ -285,14 +400,15 @@ def _iterate_mismatch_triplets(graph: BELGraph, relation_set: Set[str]) -> Itera
             if data[RELATION] in relation_set
         }
 
-        for a, b in itt.combinations(children, 2):
-            if b not in graph[a]:
-                continue
-
-            if any(d[RELATION] == NEGATIVE_CORRELATION for d in graph[a][b].values()):
+        for a, b in itt.combinations(sorted(children, key=str), 2):
+            if _has_negative_correlation(graph, a, b) or _has_negative_correlation(graph, b, a):
                 yield node, a, b
 
 
+def _has_negative_correlation(graph: BELGraph, u: BaseEntity, v: BaseEntity) -> bool:
+    return v in graph[u] and any(d[RELATION] == NEGATIVE_CORRELATION for d in graph[u][v].values())
+
+
 def get_chaotic_triplets(graph: BELGraph) -> SetOfNodeTriples:
     """Yield triples of nodes (A, B, C) such that ``A -> B``, ``B -> C``, and ``C -> A``."""
     return set(_iterate_disregulated_triplets(graph, CAUSAL_INCREASE_RELATIONS))
@@ -316,34 +432,32 @@ def _iterate_disregulated_triplets(graph: BELGraph, relation_set: Set[str]) -> I
         yield a, b, c
 
 
-def summarize_stability(graph: BELGraph) -> Mapping[str, int]:
-    """Summarize the stability of the graph."""
-    regulatory_pairs = get_regulatory_pairs(graph)
-    chaotic_pairs = get_chaotic_pairs(graph)
-    dampened_pairs = get_dampened_pairs(graph)
-    contradictory_pairs = get_contradiction_summary(graph)
-    separately_unstable_triples = get_separate_unstable_correlation_triples(graph)
-    mutually_unstable_triples = get_mutually_unstable_correlation_triples(graph)
-    jens_unstable_triples = get_jens_unstable(graph)
-    increase_mismatch_triples = get_increase_mismatch_triplets(graph)
-    decrease_mismatch_triples = get_decrease_mismatch_triplets(graph)
-    chaotic_triples = get_chaotic_triplets(graph)
-    dampened_triples = get_dampened_triplets(graph)
-
-    return {
-        'Regulatory Pairs': _count_or_len(regulatory_pairs),
-        'Chaotic Pairs': _count_or_len(chaotic_pairs),
-        'Dampened Pairs': _count_or_len(dampened_pairs),
-        'Contradictory Pairs': _count_or_len(contradictory_pairs),
-        'Separately Unstable Triples': _count_or_len(separately_unstable_triples),
-        'Mutually Unstable Triples': _count_or_len(mutually_unstable_triples),
-        'Jens Unstable Triples': _count_or_len(jens_unstable_triples),
-        'Increase Mismatch Triples': _count_or_len(increase_mismatch_triples),
-        'Decrease Mismatch Triples': _count_or_len(decrease_mismatch_triples),
-        'Chaotic Triples': _count_or_len(chaotic_triples),
-        'Dampened Triples': _count_or_len(dampened_triples),
-    }
+def summarize_stability(graph: BELGraph, n_jobs: Optional[int] = None) -> Mapping[str, int]:
+    """Summarize the stability of the graph.
 
+    The graph is compiled once with :func:`pybel_tools.summary.signed_adjacency.compile_signed_adjacency`, then each
+    count is calculated with sparse matrix products instead of building the sets returned by the functions above.
+    The counts are the same as the sizes of those sets.
 
-def _count_or_len(it):
-    return sum(1 for _ in it)
+    :param graph: A BEL graph
+    :param n_jobs: The number of worker processes that share the compiled graph. If none or 1, counts in the current
+     process. If -1, uses all cores.
+    """
+    adjacency = compile_signed_adjacency(graph)
+    return count_stability(adjacency, n_jobs=n_jobs)
+
+
+def estimate_stability_summary(
+    graph: BELGraph,
+    sample_size: int,
+    seed: Optional[int] = None,
+) -> Mapping[str, StabilityEstimate]:
+    """Estimate the counts from :func:`summarize_stability` by only looking at a random sample of nodes.
+
+    :param graph: A BEL graph
+    :param sample_size: The number of nodes to sample
+    :param seed: The seed for the random number generator
+    :return: A dictionary from labels to pairs of estimated counts and their standard errors
+    """
+    adjacency = compile_signed_adjacency(graph)
+    return estimate_stability(adjacency, sample_size=sample_size, seed=seed)
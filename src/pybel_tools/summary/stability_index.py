@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+
+"""An index of the stability motifs in a BEL graph that is updated as edges are added and removed.
+
+Every motif found by :mod:`pybel_tools.summary.stability` depends only on the relations between the pairs of nodes it
+contains. When an edge between two nodes is added or removed, only the pairs in which both nodes appear and the triples
+in which both nodes appear can change. Triples also need a relation between each pair of their nodes, so the third
+node is always a common neighbor of the two nodes.
+"""
+
+import itertools as itt
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Iterable, Mapping, Set, Tuple
+
+from pybel import BELGraph
+from pybel.constants import (
+    CAUSAL_DECREASE_RELATIONS, CAUSAL_INCREASE_RELATIONS, CORRELATIVE_RELATIONS, NEGATIVE_CORRELATION,
+    POSITIVE_CORRELATION, RELATION,
+)
+from pybel.dsl import BaseEntity
+from .contradictions import relation_set_has_contradictions
+from ..typing import NodePair, NodeTriple, SetOfNodePairs, SetOfNodeTriples
+
+__all__ = [
+    'StabilityIndex',
+]
+
+#: One, two, or three distinct nodes
+NodeSet = Tuple[BaseEntity, ...]
+
+SEPARATELY_UNSTABLE = 'Separately Unstable Triples'
+MUTUALLY_UNSTABLE = 'Mutually Unstable Triples'
+JENS_UNSTABLE = 'Jens Unstable Triples'
+INCREASE_MISMATCH = 'Increase Mismatch Triples'
+DECREASE_MISMATCH = 'Decrease Mismatch Triples'
+CHAOTIC_TRIPLES = 'Chaotic Triples'
+DAMPENED_TRIPLES = 'Dampened Triples'
+
+#: The keys of the triple sets, in the same order as :func:`pybel_tools.summary.summarize_stability`
+TRIPLE_KEYS = [
+    SEPARATELY_UNSTABLE,
+    MUTUALLY_UNSTABLE,
+    JENS_UNSTABLE,
+    INCREASE_MISMATCH,
+    DECREASE_MISMATCH,
+    CHAOTIC_TRIPLES,
+    DAMPENED_TRIPLES,
+]
+
+
+class StabilityIndex:
+    """Keeps the pair and triple sets from :mod:`pybel_tools.summary.stability` up to date under edits.
+
+    Each query method returns the same result as the function of the same name applied to a graph with the same
+    edges, but only the neighborhood of an edited edge is re-examined after each edit. Since BEL graphs don't emit
+    events, the index has to be told about each edit:
+
+    >>> from pybel.constants import INCREASES
+    >>> from pybel.examples import sialic_acid_graph
+    >>> index = StabilityIndex.from_graph(sialic_acid_graph)
+    >>> u, v = list(sialic_acid_graph)[:2]
+    >>> index.add_edge(u, v, INCREASES)
+    >>> counts = index.summarize_stability()
+    """
+
+    def __init__(self) -> None:
+        """Build an empty index. Use :meth:`from_graph` to index an existing graph."""
+        #: The number of edges of each relation between each ordered pair of nodes
+        self._relations: Dict[NodePair, Counter] = {}
+        #: The nodes that share at least one edge with each node, excluding itself
+        self._neighbors: Dict[BaseEntity, Set[BaseEntity]] = defaultdict(set)
+
+        self._regulatory_pairs: SetOfNodePairs = set()
+        self._chaotic_pairs: SetOfNodePairs = set()
+        self._dampened_pairs: SetOfNodePairs = set()
+        self._contradictions: Dict[NodePair, Tuple[str, ...]] = {}
+
+        self._triples: Dict[str, SetOfNodeTriples] = {key: set() for key in TRIPLE_KEYS}
+        #: The triples of each kind that contain each node
+        self._triples_by_node: Dict[str, Dict[BaseEntity, SetOfNodeTriples]] = {
+            key: defaultdict(set)
+            for key in TRIPLE_KEYS
+        }
+
+    @classmethod
+    def from_graph(cls, graph: BELGraph) -> 'StabilityIndex':
+        """Build an index of all edges in the graph."""
+        rv = cls()
+        for u, v, data in graph.edges(data=True):
+            rv._add_relation(u, v, data[RELATION])
+        for u, v in rv._relations:
+            rv._update_pair(u, v)
+        for nodes in rv._iterate_indexed_node_sets():
+            rv._add_triples(nodes)
+        return rv
+
+    def add_edge(self, u: BaseEntity, v: BaseEntity, relation: str) -> None:
+        """Update the index after an edge with the given relation from ``u`` to ``v`` is added to the graph."""
+        self._add_relation(u, v, relation)
+        self._update(u, v)
+
+    def add_edge_data(self, u: BaseEntity, v: BaseEntity, data: Mapping) -> None:
+        """Update the index after an edge with the given data from ``u`` to ``v`` is added to the graph."""
+        self.add_edge(u, v, data[RELATION])
+
+    def remove_edge(self, u: BaseEntity, v: BaseEntity, relation: str) -> None:
+        """Update the index after an edge with the given relation from ``u`` to ``v`` is removed from the graph.
+
+        :raises KeyError: If there's no such edge in the index
+        """
+        counter = self._relations[u, v]
+        if not counter[relation]:
+            raise KeyError(f'no {relation} edge from {u} to {v}')
+
+        counter[relation] -= 1
+        if not counter[relation]:
+            del counter[relation]
+        if not counter:
+            del self._relations[u, v]
+            if u != v and (v, u) not in self._relations:
+                self._neighbors[u].discard(v)
+                self._neighbors[v].discard(u)
+
+        self._update(u, v)
+
+    def remove_edge_data(self, u: BaseEntity, v: BaseEntity, data: Mapping) -> None:
+        """Update the index after an edge with the given data from ``u`` to ``v`` is removed from the graph."""
+        self.remove_edge(u, v, data[RELATION])
+
+    def get_contradiction_summary(self) -> Set[Tuple[BaseEntity, BaseEntity, Tuple[str, ...]]]:
+        """Get the same result as :func:`pybel_tools.summary.get_contradiction_summary`."""
+        return {
+            (u, v, relations)
+            for (u, v), relations in self._contradictions.items()
+        }
+
+    def get_regulatory_pairs(self) -> SetOfNodePairs:
+        """Get the same result as :func:`pybel_tools.summary.get_regulatory_pairs`."""
+        return set(self._regulatory_pairs)
+
+    def get_chaotic_pairs(self) -> SetOfNodePairs:
+        """Get the same result as :func:`pybel_tools.summary.get_chaotic_pairs`."""
+        return set(self._chaotic_pairs)
+
+    def get_dampened_pairs(self) -> SetOfNodePairs:
+        """Get the same result as :func:`pybel_tools.summary.get_dampened_pairs`."""
+        return set(self._dampened_pairs)
+
+    def get_separate_unstable_correlation_triples(self) -> SetOfNodeTriples:
+        """Get the same result as :func:`pybel_tools.summary.get_separate_unstable_correlation_triples`."""
+        return set(self._triples[SEPARATELY_UNSTABLE])
+
+    def get_mutually_unstable_correlation_triples(self) -> SetOfNodeTriples:
+        """Get the same result as :func:`pybel_tools.summary.get_mutually_unstable_correlation_triples`."""
+        return set(self._triples[MUTUALLY_UNSTABLE])
+
+    def get_jens_unstable(self) -> SetOfNodeTriples:
+        """Get the same result as :func:`pybel_tools.summary.get_jens_unstable`."""
+        return set(self._triples[JENS_UNSTABLE])
+
+    def get_increase_mismatch_triplets(self) -> SetOfNodeTriples:
+        """Get the same result as :func:`pybel_tools.summary.get_increase_mismatch_triplets`."""
+        return set(self._triples[INCREASE_MISMATCH])
+
+    def get_decrease_mismatch_triplets(self) -> SetOfNodeTriples:
+        """Get the same result as :func:`pybel_tools.summary.get_decrease_mismatch_triplets`."""
+        return set(self._triples[DECREASE_MISMATCH])
+
+    def get_chaotic_triplets(self) -> SetOfNodeTriples:
+        """Get the same result as :func:`pybel_tools.summary.get_chaotic_triplets`."""
+        return set(self._triples[CHAOTIC_TRIPLES])
+
+    def get_dampened_triplets(self) -> SetOfNodeTriples:
+        """Get the same result as :func:`pybel_tools.summary.get_dampened_triplets`."""
+        return set(self._triples[DAMPENED_TRIPLES])
+
+    def summarize_stability(self) -> Mapping[str, int]:
+        """Get the same result as :func:`pybel_tools.summary.summarize_stability`."""
+        return {
+            'Regulatory Pairs': len(self._regulatory_pairs),
+            'Chaotic Pairs': len(self._chaotic_pairs),
+            'Dampened Pairs': len(self._dampened_pairs),
+            'Contradictory Pairs': len(self._contradictions),
+            **{
+                key: len(self._triples[key])
+                for key in TRIPLE_KEYS
+            },
+        }
+
+    def _add_relation(self, u: BaseEntity, v: BaseEntity, relation: str) -> None:
+        counter = self._relations.get((u, v))
+        if counter is None:
+            counter = self._relations[u, v] = Counter()
+        counter[relation] += 1
+        if u != v:
+            self._neighbors[u].add(v)
+            self._neighbors[v].add(u)
+
+    def _update(self, u: BaseEntity, v: BaseEntity) -> None:
+        """Re-examine the pairs and triples that contain both nodes."""
+        self._update_pair(u, v)
+        self._update_pair(v, u)
+
+        for key in TRIPLE_KEYS:
+            by_node = self._triples_by_node[key]
+            if u == v:  # a self-loop only affects the triples that contain the node more than once
+                affected = {triple for triple in by_node.get(u, ()) if 1 < triple.count(u)}
+            else:
+                affected = by_node.get(u, set()) & by_node.get(v, set())
+            for triple in affected:
+                self._discard_triple(key, triple)
+
+        for nodes in self._iterate_node_sets(u, v):
+            self._add_triples(nodes)
+
+    def _update_pair(self, u: BaseEntity, v: BaseEntity) -> None:
+        """Re-examine the ordered pair (u, v)."""
+        if self._has_any(u, v, CAUSAL_INCREASE_RELATIONS) and self._has_any(v, u, CAUSAL_DECREASE_RELATIONS):
+            self._regulatory_pairs.add((u, v))
+        else:
+            self._regulatory_pairs.discard((u, v))
+
+        pair = _sort_nodes((u, v))
+        for pairs, relations in (
+            (self._chaotic_pairs, CAUSAL_INCREASE_RELATIONS),
+            (self._dampened_pairs, CAUSAL_DECREASE_RELATIONS),
+        ):
+            if self._has_any(u, v, relations) and self._has_any(v, u, relations):
+                pairs.add(pair)
+            else:
+                pairs.discard(pair)
+
+        counter = self._relations.get((u, v))
+        relations = tuple(sorted(counter)) if counter else ()
+        if relation_set_has_contradictions(relations):
+            self._contradictions[u, v] = relations
+        else:
+            self._contradictions.pop((u, v), None)
+
+    def _iterate_indexed_node_sets(self) -> Iterable[NodeSet]:
+        """Iterate over the sets of nodes that could form a triple, some more than once."""
+        for u, v in self._relations:
+            if u == v:
+                yield u,
+                continue
+            yield u, v
+            for w in self._neighbors[u] & self._neighbors[v]:
+                yield u, v, w
+
+    def _iterate_node_sets(self, u: BaseEntity, v: BaseEntity) -> Iterable[NodeSet]:
+        """Iterate over each set of nodes that could form a triple with both nodes."""
+        if u == v:
+            yield u,
+            for w in self._neighbors[u]:
+                yield u, w
+            return
+
+        yield u, v
+        for w in self._neighbors[u] & self._neighbors[v]:
+            yield u, v, w
+
+    def _add_triples(self, nodes: NodeSet) -> None:
+        """Add the triples of each kind made up of exactly the given nodes."""
+        for key, triples in self._get_triples(nodes).items():
+            for triple in triples:
+                self._triples[key].add(triple)
+                for node in triple:
+                    self._triples_by_node[key][node].add(triple)
+
+    def _discard_triple(self, key: str, triple: NodeTriple) -> None:
+        self._triples[key].discard(triple)
+        by_node = self._triples_by_node[key]
+        for node in triple:
+            by_node[node].discard(triple)
+            if not by_node[node]:
+                del by_node[node]
+
+    def _get_triples(self, nodes: NodeSet) -> Mapping[str, Set[NodeTriple]]:
+        """Get the triples of each kind made up of exactly the given nodes."""
+        rv = {key: set() for key in TRIPLE_KEYS}
+
+        for a, b, c in _iterate_multisets(nodes):
+            if self._is_cycle(a, b, c, self._has_jens_edge):
+                rv[JENS_UNSTABLE].add((a, b, c))
+            if not a == b == c:
+                rv[SEPARATELY_UNSTABLE].update(self._iterate_separately_unstable(a, b, c))
+                if all(self._has_correlation(x, y, NEGATIVE_CORRELATION) for x, y in ((a, b), (b, c), (a, c))):
+                    rv[MUTUALLY_UNSTABLE].add((a, b, c))
+                if self._is_cycle(a, b, c, self._has_increase):
+                    rv[CHAOTIC_TRIPLES].add((a, b, c))
+                if self._is_cycle(a, b, c, self._has_decrease):
+                    rv[DAMPENED_TRIPLES].add((a, b, c))
+
+        for node, a, b in _iterate_mismatch_candidates(nodes):
+            if not self._has_correlation(a, b, NEGATIVE_CORRELATION):
+                continue
+            if self._has_increase(node, a) and self._has_increase(node, b):
+                rv[INCREASE_MISMATCH].add((node, a, b))
+            if self._has_decrease(node, a) and self._has_decrease(node, b):
+                rv[DECREASE_MISMATCH].add((node, a, b))
+
+        return rv
+
+    def _iterate_separately_unstable(self, a: BaseEntity, b: BaseEntity, c: BaseEntity) -> Iterable[NodeTriple]:
+        """Apply the same rules as :func:`pybel_tools.summary.get_separate_unstable_correlation_triples`."""
+        if not all(self._get_correlations(x, y) for x, y in ((a, b), (b, c), (a, c))):
+            return
+
+        positive_ab = self._has_correlation(a, b, POSITIVE_CORRELATION)
+        positive_bc = self._has_correlation(b, c, POSITIVE_CORRELATION)
+        positive_ac = self._has_correlation(a, c, POSITIVE_CORRELATION)
+        negative_ab = self._has_correlation(a, b, NEGATIVE_CORRELATION)
+        negative_bc = self._has_correlation(b, c, NEGATIVE_CORRELATION)
+        negative_ac = self._has_correlation(a, c, NEGATIVE_CORRELATION)
+
+        if positive_ab and positive_bc and negative_ac:
+            yield b, a, c
+        if positive_ab and negative_bc and positive_ac:
+            yield a, b, c
+        if negative_ab and positive_bc and positive_ac:
+            yield c, a, b
+
+    @staticmethod
+    def _is_cycle(
+        a: BaseEntity,
+        b: BaseEntity,
+        c: BaseEntity,
+        has_edge: Callable[[BaseEntity, BaseEntity], bool],
+    ) -> bool:
+        return (
+            (has_edge(a, b) and has_edge(b, c) and has_edge(c, a))
+            or (has_edge(a, c) and has_edge(c, b) and has_edge(b, a))
+        )
+
+    def _has_any(self, u: BaseEntity, v: BaseEntity, relations: Iterable[str]) -> bool:
+        counter = self._relations.get((u, v))
+        return counter is not None and any(counter[relation] for relation in relations)
+
+    def _has_increase(self, u: BaseEntity, v: BaseEntity) -> bool:
+        return self._has_any(u, v, CAUSAL_INCREASE_RELATIONS)
+
+    def _has_decrease(self, u: BaseEntity, v: BaseEntity) -> bool:
+        return self._has_any(u, v, CAUSAL_DECREASE_RELATIONS)
+
+    def _has_jens_edge(self, u: BaseEntity, v: BaseEntity) -> bool:
+        """Check for an edge from ``u`` to ``v`` in :func:`pybel_tools.summary.jens_transformation_alpha`."""
+        return (
+            self._has_correlation(u, v, POSITIVE_CORRELATION)
+            or self._has_increase(u, v)
+            or self._has_decrease(v, u)
+        )
+
+    def _get_correlations(self, u: BaseEntity, v: BaseEntity) -> Set[str]:
+        """Get the correlative relations between two nodes in either direction."""
+        return {
+            relation
+            for pair in ((u, v), (v, u))
+            for relation in self._relations.get(pair, ())
+            if relation in CORRELATIVE_RELATIONS
+        }
+
+    def _has_correlation(self, u: BaseEntity, v: BaseEntity, relation: str) -> bool:
+        return self._has_any(u, v, (relation,)) or self._has_any(v, u, (relation,))
+
+
+def _sort_nodes(nodes: Iterable[BaseEntity]) -> Tuple[BaseEntity, ...]:
+    return tuple(sorted(nodes, key=str))
+
+
+def _iterate_multisets(nodes: NodeSet) -> Iterable[NodeTriple]:
+    """Iterate over the sorted triples that contain each of the given one, two, or three nodes and no others."""
+    if len(nodes) == 1:
+        yield nodes * 3
+    elif len(nodes) == 2:
+        x, y = _sort_nodes(nodes)
+        yield x, x, y
+        yield x, y, y
+    else:
+        yield _sort_nodes(nodes)
+
+
+def _iterate_mismatch_candidates(nodes: NodeSet) -> Iterable[NodeTriple]:
+    """Iterate over the (parent, child, child) triples that contain each of the given nodes and no others."""
+    if len(nodes) < 2:
+        return
+    for node in nodes:
+        children = nodes if len(nodes) == 2 else [other for other in nodes if other != node]
+        for a, b in itt.combinations(_sort_nodes(children), 2):
+            yield node, a, b
+
@@ -6,17 +6,25 @@ import itertools as itt
 from collections import defaultdict
 from typing import Counter, Dict, Iterable, List, Mapping, Optional, Set, Tuple, Union
 
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
 from pybel import BELGraph
 from pybel.constants import ANNOTATIONS
+from pybel.language import Entity
 from pybel.struct.filters.edge_predicates import edge_has_annotation
 from pybel.struct.filters.typing import NodePredicate, NodePredicates
+from ..annotation_index import ensure_annotation_value, get_current_annotation_index, iterate_annotated_edges
 from ..selection.group_nodes import group_nodes_by_annotation, group_nodes_by_annotation_filtered
-from ..typing import EdgeSet
-from ..utils import calculate_tanimoto_set_distances, count_dict_values
+from ..typing import EdgeSet, NodePair
+from ..utils import calculate_tanimoto_from_sizes, calculate_tanimoto_set_distances, count_dict_values
 
 __all__ = [
     'count_subgraph_sizes',
     'calculate_subgraph_edge_overlap',
+    'SubgraphOverlap',
+    'calculate_subgraph_edge_overlap_matrix',
     'summarize_subgraph_edge_overlap',
     'rank_subgraph_by_node_filter',
     'summarize_subgraph_node_overlap',
@@ -53,11 +61,16 @@ def calculate_subgraph_edge_overlap(
     :return: {subgraph: set of edges}, {(subgraph 1, subgraph2): set of intersecting edges},
             {(subgraph 1, subgraph2): set of unioned edges}, {(subgraph 1, subgraph2): tanimoto similarity},
     """
-    sg2edge = defaultdict(set)
-
-    for u, v, d in graph.edges(data=True):
-        if edge_has_annotation(d, annotation):
-            sg2edge[d[ANNOTATIONS][annotation]].add((u, v))
+    index = get_current_annotation_index(graph)
+    if index is not None:
+        sg2edge = index.group_node_pairs(annotation)
+    else:
+        sg2edge = defaultdict(set)
+        for u, v, d in graph.edges(data=True):
+            if not edge_has_annotation(d, annotation):
+                continue
+            for value in d[ANNOTATIONS][annotation]:
+                sg2edge[value].add((u, v))
 
     subgraph_intersection: Dict[str, Dict[str, Set[EdgeSet]]] = defaultdict(dict)
     subgraph_union: Dict[str, Dict[str, Set[EdgeSet]]] = defaultdict(dict)
@@ -71,6 +84,110 @@ def calculate_subgraph_edge_overlap(
     return sg2edge, subgraph_intersection, subgraph_union, result
 
 
+class SubgraphOverlap:
+    """The overlap between the sets of edges in the sub-graphs induced by each value of an annotation.
+
+    Each sub-graph's edges are a row of a sparse boolean incidence matrix, so the sizes of the intersections of all
+    pairs of sub-graphs come from a single sparse matrix product. The unions and tanimoto similarities are calculated
+    from the sizes alone. The sets of intersecting or unioned edges are only built for the pairs that are asked for.
+    """
+
+    def __init__(
+        self,
+        annotation: str,
+        values: List[Entity],
+        pairs: List[NodePair],
+        incidence: sparse.csr_matrix,
+    ) -> None:
+        """Calculate the overlaps of the sub-graphs.
+
+        :param annotation: The annotation inducing the sub-graphs
+        :param values: The annotation values labeling the rows of the incidence matrix
+        :param pairs: The (source, target) node pairs labeling the columns of the incidence matrix
+        :param incidence: A sparse matrix with a one where each sub-graph has an edge between each pair of nodes
+        """
+        self.annotation = annotation
+        self.values = values
+        self.pairs = pairs
+        self.incidence = incidence
+        self._value_to_row: Dict[Entity, int] = {value: row for row, value in enumerate(values)}
+
+        #: The number of node pairs in each sub-graph
+        self.sizes: np.ndarray = np.diff(incidence.indptr)
+        #: The number of node pairs in the intersection of each pair of sub-graphs
+        self.intersection_sizes: np.ndarray = (incidence @ incidence.T).toarray()
+        #: The number of node pairs in the union of each pair of sub-graphs
+        self.union_sizes: np.ndarray = self.sizes[:, np.newaxis] + self.sizes[np.newaxis, :] - self.intersection_sizes
+        #: The tanimoto similarity of each pair of sub-graphs
+        self.tanimoto: np.ndarray = calculate_tanimoto_from_sizes(self.intersection_sizes, self.sizes, self.sizes)
+
+    def _get_columns(self, value: Union[str, Entity]) -> np.ndarray:
+        row = self._value_to_row[ensure_annotation_value(self.annotation, value)]
+        return self.incidence.indices[self.incidence.indptr[row]:self.incidence.indptr[row + 1]]
+
+    def _get_pairs(self, columns: np.ndarray) -> EdgeSet:
+        return {self.pairs[column] for column in columns.tolist()}
+
+    def get_edges(self, value: Union[str, Entity]) -> EdgeSet:
+        """Get the node pairs in the sub-graph for the given annotation value or its identifier.
+
+        :raises KeyError: If the value isn't one of the sub-graphs
+        """
+        return self._get_pairs(self._get_columns(value))
+
+    def get_intersection(self, value: Union[str, Entity], other: Union[str, Entity]) -> EdgeSet:
+        """Get the node pairs in both of the sub-graphs."""
+        return self._get_pairs(np.intersect1d(self._get_columns(value), self._get_columns(other), assume_unique=True))
+
+    def get_union(self, value: Union[str, Entity], other: Union[str, Entity]) -> EdgeSet:
+        """Get the node pairs in either of the sub-graphs."""
+        return self._get_pairs(np.union1d(self._get_columns(value), self._get_columns(other)))
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Get the tanimoto similarities in a square data frame, labeled by the identifiers of the values."""
+        labels = [value.identifier for value in self.values]
+        return pd.DataFrame(self.tanimoto, index=labels, columns=labels)
+
+    def to_dict(self) -> Mapping[Entity, Mapping[Entity, float]]:
+        """Get the tanimoto similarities as a dict of dicts, like :func:`summarize_subgraph_edge_overlap`."""
+        return {
+            value: dict(zip(self.values, row))
+            for value, row in zip(self.values, self.tanimoto.tolist())
+        }
+
+
+def calculate_subgraph_edge_overlap_matrix(graph: BELGraph, annotation: str = 'Subgraph') -> SubgraphOverlap:
+    """Calculate the overlap between the sub-graphs without building the intersection and union of every pair.
+
+    Gives the same similarities as :func:`calculate_subgraph_edge_overlap`, but only stores the node pairs in each
+    sub-graph and a matrix of the sizes of their intersections.
+
+    :param graph: A BEL graph
+    :param annotation: The annotation to group by and compare. Defaults to 'Subgraph'
+
+    >>> from pybel.examples import sialic_acid_graph
+    >>> overlap = calculate_subgraph_edge_overlap_matrix(sialic_acid_graph, annotation='Species')
+    >>> df = overlap.to_dataframe()
+    """
+    value_to_row: Dict[Entity, int] = {}
+    pair_to_column: Dict[NodePair, int] = {}
+    rows, columns = [], []
+    for value, u, v, _, _ in iterate_annotated_edges(graph, annotation):
+        rows.append(value_to_row.setdefault(value, len(value_to_row)))
+        columns.append(pair_to_column.setdefault((u, v), len(pair_to_column)))
+
+    incidence = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, columns)),
+        shape=(len(value_to_row), len(pair_to_column)),
+    )
+    # Parallel edges between the same nodes in the same sub-graph are summed together
+    incidence.sum_duplicates()
+    incidence.data[:] = 1
+    incidence.sort_indices()
+
+    return SubgraphOverlap(annotation, list(value_to_row), list(pair_to_column), incidence)
+
+
 def summarize_subgraph_edge_overlap(
     graph: BELGraph,
     annotation: str = 'Subgraph',
@@ -81,8 +198,7 @@ def summarize_subgraph_edge_overlap(
     :param annotation: The annotation to group by and compare. Defaults to :code:`"Subgraph"`
     :return: A similarity matrix in a dict of dicts
     """
-    _, _, _, subgraph_overlap = calculate_subgraph_edge_overlap(graph, annotation)
-    return subgraph_overlap
+    return calculate_subgraph_edge_overlap_matrix(graph, annotation).to_dict()
 
 
 def summarize_subgraph_node_overlap(
@@ -3,21 +3,43 @@
 """This module contains functions useful throughout PyBEL Tools."""
 
 import datetime
-import itertools as itt
+import hashlib
 import json
 import logging
+import multiprocessing
+import random
 import typing
-from collections import Counter, defaultdict
+from collections import Counter, OrderedDict, defaultdict
 from operator import itemgetter
-from typing import Callable, Dict, Iterable, List, Mapping, Optional, Set, Sized, Tuple, TypeVar, Union
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set, Sized, Tuple, TypeVar, Union
 
-import networkx as nx
+import numpy as np
+import pandas as pd
+from scipy import sparse
 
 from pybel import BELGraph
 
 logger = logging.getLogger(__name__)
 
+#: The default number of sources sampled by :func:`calculate_betweenness_centality`
 CENTRALITY_SAMPLES = 200
+
+#: The number of sources searched at the same time by :func:`calculate_betweenness_centality`. Each batch uses about
+#: 40 bytes per node per source.
+CENTRALITY_BATCH_SIZE = 32
+
+#: The number of results kept in memory by :func:`calculate_betweenness_centality`
+CENTRALITY_CACHE_SIZE = 32
+
+#: The number of rows of the similarity matrix calculated at the same time by
+#: :func:`calculate_tanimoto_set_distances`. Each batch uses 8 bytes per key per row.
+TANIMOTO_BATCH_SIZE = 1024
+
+_centrality_cache: 'OrderedDict[Tuple[str, Optional[int], Optional[int]], Counter]' = OrderedDict()
+
+#: The compiled graph shared with each worker process by :func:`_init_centrality_worker`
+_centrality_worker_state: Dict[str, Any] = {}
+
 X = TypeVar('X')
 Y = TypeVar('Y')
 
@@ -122,23 +144,51 @@ def calculate_single_tanimoto_set_distances(
 
 def calculate_tanimoto_set_distances(
     dict_of_sets: Mapping[X, Set],
+    top_k: Optional[int] = None,
 ) -> Mapping[X, Mapping[X, float]]:
     """Return a distance matrix keyed by the keys in the given dict.
 
-    Distances are calculated based on pairwise tanimoto similarity of the sets contained.
+    Distances are calculated based on pairwise tanimoto similarity of the sets contained. The sizes of the
+    intersections of all pairs of sets come from a product of a sparse incidence matrix with its transpose, calculated
+    :data:`TANIMOTO_BATCH_SIZE` rows at a time.
 
     :param dict_of_sets: A dict of {x: set of y}
+    :param top_k: If given, only keep each key's similarities to the ``top_k`` other keys with the most similar sets,
+     so the result doesn't grow quadratically with the number of keys
     :return: A similarity matrix based on the set overlap (tanimoto) score between each x as a dict of dicts
     """
-    result: Dict[X, Dict[X, float]] = defaultdict(dict)
+    keys, incidence = build_incidence_matrix(dict_of_sets)
+    result: Dict[X, Dict[X, float]] = {}
 
-    for x, y in itt.combinations(dict_of_sets, 2):
-        result[x][y] = result[y][x] = tanimoto_set_similarity(dict_of_sets[x], dict_of_sets[y])
+    for start, similarities in _iterate_tanimoto_batches(incidence):
+        if top_k is None:
+            for key, row in zip(keys[start:], similarities.tolist()):
+                result[key] = dict(zip(keys, row))
+            continue
 
-    for x in dict_of_sets:
-        result[x][x] = 1.0
+        number = min(top_k, len(keys) - 1)
+        for offset, row in enumerate(similarities):
+            row_key = keys[start + offset]
+            # leave the key out while choosing its neighbors, since it's always the most similar to itself
+            row[start + offset] = -np.inf
+            top = np.argpartition(-row, number - 1)[:number] if 0 < number else ()
+            result[row_key] = {row_key: 1.0}
+            for column in sorted(top, key=lambda column: (-row[column], column)):
+                result[row_key][keys[column]] = float(row[column])
 
-    return dict(result)
+    return result
+
+
+def calculate_tanimoto_set_matrix(dict_of_sets: Mapping[X, Set]) -> pd.DataFrame:
+    """Calculate the pairwise tanimoto similarities of the sets in a square data frame, labeled by the keys.
+
+    :param dict_of_sets: A dict of {x: set of y}
+    """
+    keys, incidence = build_incidence_matrix(dict_of_sets)
+    similarities = np.empty((len(keys), len(keys)))
+    for start, batch in _iterate_tanimoto_batches(incidence):
+        similarities[start:start + len(batch)] = batch
+    return pd.DataFrame(similarities, index=keys, columns=keys)
 
 
 def calculate_global_tanimoto_set_distances(dict_of_sets: Mapping[X, Set]) -> Mapping[X, Mapping[X, float]]:
@@ -149,18 +199,84 @@ def calculate_global_tanimoto_set_distances(dict_of_sets: Mapping[X, Set]) -> Ma
     :param dict_of_sets: A dict of {x: set of y}
     :return: A similarity matrix based on the alternative tanimoto distance as a dict of dicts
     """
-    universe = set(itt.chain.from_iterable(dict_of_sets.values()))
-    universe_size = len(universe)
+    keys, incidence = build_incidence_matrix(dict_of_sets)
+    universe_size = incidence.shape[1]
+    sizes = np.diff(incidence.indptr)
 
-    result: Dict[X, Dict[X, float]] = defaultdict(dict)
+    result: Dict[X, Dict[X, float]] = {}
+    for start, intersections in _iterate_intersection_batches(incidence):
+        stop = start + len(intersections)
+        unions = sizes[start:stop, np.newaxis] + sizes[np.newaxis, :] - intersections
+        distances = 1.0 - unions / universe_size
+        for key, row in zip(keys[start:stop], distances.tolist()):
+            result[key] = dict(zip(keys, row))
 
-    for x, y in itt.combinations(dict_of_sets, 2):
-        result[x][y] = result[y][x] = 1.0 - len(dict_of_sets[x] | dict_of_sets[y]) / universe_size
+    return result
 
-    for x in dict_of_sets:
-        result[x][x] = 1.0 - len(x) / universe_size
 
-    return dict(result)
+def build_incidence_matrix(dict_of_sets: Mapping[X, Set]) -> Tuple[List[X], sparse.csr_matrix]:
+    """Build a sparse matrix with a row for each key and a one in the column of each element of its set.
+
+    :param dict_of_sets: A dict of {x: set of y}
+    :return: The keys labeling the rows and the incidence matrix
+    """
+    keys = list(dict_of_sets)
+    element_to_column: Dict[Any, int] = {}
+    indptr = [0]
+    indices = []
+    for key in keys:
+        indices.extend(
+            element_to_column.setdefault(element, len(element_to_column))
+            for element in set(dict_of_sets[key])
+        )
+        indptr.append(len(indices))
+
+    incidence = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.int32), indices, indptr),
+        shape=(len(keys), len(element_to_column)),
+    )
+    return keys, incidence
+
+
+def _iterate_intersection_batches(incidence: sparse.csr_matrix) -> Iterable[Tuple[int, np.ndarray]]:
+    """Iterate over the first row of each batch and the sizes of the intersections of its rows with all rows."""
+    transposed = incidence.T.tocsc()
+    for start in range(0, incidence.shape[0], TANIMOTO_BATCH_SIZE):
+        yield start, (incidence[start:start + TANIMOTO_BATCH_SIZE] @ transposed).toarray()
+
+
+def _iterate_tanimoto_batches(incidence: sparse.csr_matrix) -> Iterable[Tuple[int, np.ndarray]]:
+    """Iterate over the first row of each batch and the tanimoto similarities of its rows with all rows.
+
+    The similarity of each set with itself is one, even if it's empty, and the similarity of two empty sets is zero.
+    """
+    sizes = np.diff(incidence.indptr)
+    for start, intersections in _iterate_intersection_batches(incidence):
+        stop = start + len(intersections)
+        similarities = calculate_tanimoto_from_sizes(intersections, sizes[start:stop], sizes)
+        similarities[np.arange(stop - start), np.arange(start, stop)] = 1.0
+        yield start, similarities
+
+
+def calculate_tanimoto_from_sizes(
+    intersection_sizes: np.ndarray,
+    row_sizes: np.ndarray,
+    column_sizes: np.ndarray,
+) -> np.ndarray:
+    """Calculate the tanimoto similarities from the sizes of the sets and their intersections.
+
+    :param intersection_sizes: The size of the intersection of each row's set with each column's set
+    :param row_sizes: The size of each row's set
+    :param column_sizes: The size of each column's set
+    :return: The tanimoto similarities, which are zero where both sets are empty
+    """
+    union_sizes = row_sizes[:, np.newaxis] + column_sizes[np.newaxis, :] - intersection_sizes
+    return np.divide(
+        intersection_sizes,
+        union_sizes,
+        out=np.zeros(intersection_sizes.shape),
+        where=union_sizes > 0,
+    )
 
 
 def barh(d, plt, title=None):
@@ -257,16 +373,197 @@ def prepare_c3_time_series(data: List[Tuple[int, int]], y_axis_label: str = 'y',
     ])
 
 
-def calculate_betweenness_centality(graph: BELGraph, number_samples: int = CENTRALITY_SAMPLES) -> Counter:
-    """Calculate the betweenness centrality over nodes in the graph.
+def hash_graph(graph: BELGraph) -> str:
+    """Calculate a hash of the nodes and edges in the graph that doesn't depend on the order they were added.
 
-    Tries to do it with a certain number of samples, but then tries a complete approach if it fails.
+    This is useful as a key for caching the results of expensive calculations on a graph.
     """
-    try:
-        res = nx.betweenness_centrality(graph, k=number_samples)
-    except Exception:
-        res = nx.betweenness_centrality(graph)
-    return Counter(res)
+    node_hashes = sorted(node.md5 for node in graph)
+    edge_hashes = sorted(
+        _hash_json([u.md5, v.md5, data])
+        for u, v, data in graph.edges(data=True)
+    )
+    return _hash_json([node_hashes, edge_hashes])
+
+
+def _hash_json(data) -> str:
+    return hashlib.md5(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()  # noqa: S303
+
+
+def calculate_betweenness_centality(
+    graph: BELGraph,
+    number_samples: Optional[int] = CENTRALITY_SAMPLES,
+    seed: Optional[int] = None,
+    n_jobs: Optional[int] = None,
+    use_cache: bool = True,
+) -> Counter:
+    """Calculate the normalized betweenness centrality over nodes in the graph with Brandes' algorithm.
+
+    The edges are compiled to a sparse matrix and the breadth-first searches from each batch of
+    :data:`CENTRALITY_BATCH_SIZE` sources are done together with sparse matrix products. Like
+    :func:`networkx.betweenness_centrality` with ``k=number_samples``, the result is extrapolated from a random sample
+    of sources. With the same seed, the same sources are sampled as by networkx, and the result is rescaled like
+    networkx 3.5 and later, which rescales the sampled sources separately from the other nodes. Older versions of
+    networkx give different sampled results.
+
+    :param graph: A BEL graph
+    :param number_samples: The number of sources to sample. If none, or if the graph doesn't have more nodes than
+     this, every node is used as a source and the betweenness centrality is exact.
+    :param seed: The seed for the random number generator used for sampling
+    :param n_jobs: The number of processes over which the batches of sources are split. If none or 1, run in this
+     process. If -1, use all cores.
+    :param use_cache: If true, reuse the results for identical graphs, keyed by :func:`hash_graph` and the
+     sampling arguments. Only the :data:`CENTRALITY_CACHE_SIZE` most recently used results are kept. Results sampled
+     without a seed aren't cached, since each call should draw a new sample.
+    :return: The betweenness centrality of each node. Treat it as read-only if it might have been cached.
+    """
+    is_sampled = number_samples is not None and number_samples < graph.number_of_nodes()
+    if not use_cache or (is_sampled and seed is None):
+        return _calculate_betweenness_centrality(graph, number_samples=number_samples, seed=seed, n_jobs=n_jobs)
+
+    key = hash_graph(graph), number_samples, seed
+    rv = _centrality_cache.get(key)
+    if rv is not None:
+        _centrality_cache.move_to_end(key)
+        return rv
+
+    rv = _centrality_cache[key] = _calculate_betweenness_centrality(
+        graph, number_samples=number_samples, seed=seed, n_jobs=n_jobs,
+    )
+    while len(_centrality_cache) > CENTRALITY_CACHE_SIZE:
+        _centrality_cache.popitem(last=False)
+
+    return rv
+
+
+def clear_betweenness_centrality_cache() -> None:
+    """Clear the cache used by :func:`calculate_betweenness_centality`."""
+    _centrality_cache.clear()
+
+
+def _calculate_betweenness_centrality(
+    graph: BELGraph,
+    number_samples: Optional[int],
+    seed: Optional[int],
+    n_jobs: Optional[int],
+) -> Counter:
+    nodes = list(graph)
+    number_nodes = len(nodes)
+    if number_samples is None or number_nodes <= number_samples:
+        sources = list(range(number_nodes))
+        number_samples = None
+    else:
+        sources = random.Random(seed).sample(range(number_nodes), number_samples)
+
+    adjacency = _compile_adjacency(graph, nodes)
+    batches = [
+        np.array(sources[start:start + CENTRALITY_BATCH_SIZE])
+        for start in range(0, len(sources), CENTRALITY_BATCH_SIZE)
+    ]
+
+    betweenness = np.zeros(number_nodes)
+    if n_jobs is None or n_jobs == 1 or len(batches) <= 1:
+        transposed = adjacency.T.tocsr()
+        for batch in batches:
+            betweenness += _accumulate_betweenness(adjacency, transposed, batch)
+    else:
+        processes = None if n_jobs < 1 else min(n_jobs, len(batches))
+        with multiprocessing.Pool(
+            processes=processes,
+            initializer=_init_centrality_worker,
+            initargs=(adjacency,),
+        ) as pool:
+            for partial_betweenness in pool.imap_unordered(_accumulate_worker_betweenness, batches):
+                betweenness += partial_betweenness
+
+    # Same scaling as networkx 3.5+ for directed graphs. When extrapolating from sampled sources, a source is never
+    # on its own paths, so it's averaged over the other sampled sources.
+    if number_nodes > 2:
+        if number_samples is None:
+            betweenness /= (number_nodes - 1) * (number_nodes - 2)
+        else:
+            is_source = np.zeros(number_nodes, dtype=bool)
+            is_source[sources] = True
+            betweenness /= np.where(
+                is_source,
+                (number_samples - 1) * (number_nodes - 2) if number_samples > 1 else np.nan,
+                number_samples * (number_nodes - 2),
+            )
+
+    return Counter(dict(zip(nodes, betweenness.tolist())))
+
+
+def _compile_adjacency(graph: BELGraph, nodes: List) -> sparse.csr_matrix:
+    """Build a sparse matrix whose rows are sources and columns are targets, ignoring parallel edges."""
+    index = {node: i for i, node in enumerate(nodes)}
+    sources, targets = [], []
+    for u, v in graph.edges():
+        sources.append(index[u])
+        targets.append(index[v])
+
+    adjacency = sparse.csr_matrix(
+        (np.ones(len(sources)), (sources, targets)),
+        shape=(len(nodes), len(nodes)),
+    )
+    adjacency.data[:] = 1.0  # parallel edges were summed
+    return adjacency
+
+
+def _init_centrality_worker(adjacency: sparse.csr_matrix) -> None:
+    _centrality_worker_state['adjacency'] = adjacency
+    _centrality_worker_state['transposed'] = adjacency.T.tocsr()
+
+
+def _accumulate_worker_betweenness(sources: np.ndarray) -> np.ndarray:
+    return _accumulate_betweenness(
+        _centrality_worker_state['adjacency'],
+        _centrality_worker_state['transposed'],
+        sources,
+    )
+
+
+def _accumulate_betweenness(
+    adjacency: sparse.csr_matrix,
+    transposed: sparse.csr_matrix,
+    sources: np.ndarray,
+) -> np.ndarray:
+    """Sum the dependencies of each node over shortest paths from the given sources.
+
+    Each column of the dense arrays corresponds to one of the sources, so the breadth-first searches advance one level
+    at a time together.
+    """
+    number_nodes = adjacency.shape[0]
+    columns = np.arange(len(sources))
+
+    distance = np.full((number_nodes, len(sources)), -1, dtype=np.int32)
+    distance[sources, columns] = 0
+    # The number of shortest paths from the source to each node
+    sigma = np.zeros((number_nodes, len(sources)))
+    sigma[sources, columns] = 1.0
+
+    frontier = sigma
+    depth = 0
+    while True:
+        reached = transposed @ frontier
+        reached[distance >= 0] = 0.0
+        new = reached > 0
+        if not new.any():
+            break
+        depth += 1
+        distance[new] = depth
+        sigma = sigma + reached
+        frontier = reached
+
+    delta = np.zeros_like(sigma)
+    for level in range(depth, 0, -1):
+        is_target = distance == level
+        coefficient = np.zeros_like(sigma)
+        coefficient[is_target] = (1.0 + delta[is_target]) / sigma[is_target]
+        is_predecessor = distance == level - 1
+        delta[is_predecessor] += sigma[is_predecessor] * (adjacency @ coefficient)[is_predecessor]
+
+    delta[sources, columns] = 0.0
+    return delta.sum(axis=1)
 
 
 T = TypeVar('T', List, Tuple)
@@ -1,11 +1,20 @@
 # -*- coding: utf-8 -*-
 
 import os
+import random
 import tempfile
 import unittest
 
+import networkx as nx
+
 from pybel import BELGraph
-from pybel.dsl import gene, protein, rna
+from pybel.constants import (
+    ASSOCIATION, CAUSES_NO_CHANGE, CITATION_AUTHORS, CITATION_DATE, DECREASES, DIRECTLY_DECREASES, DIRECTLY_INCREASES,
+    INCREASES, NEGATIVE_CORRELATION, POSITIVE_CORRELATION, RELATION,
+)
+from pybel.dsl import Pathology, Protein, gene, protein, rna
+from pybel.exceptions import MissingNamespaceNameWarning, NakedNameWarning, UndefinedNamespaceWarning
+from pybel.language import CitationDict
 from pybel.manager import Manager
 from pybel.testing.utils import n
 
@@ -196,3 +205,99 @@ class ExampleNetworkMixin(unittest.TestCase):
         self.network2 = make_graph_2()
         self.network3 = make_graph_3()
         self.network4 = make_graph_4()
+
+
+RELATIONS = [
+    INCREASES, DIRECTLY_INCREASES, DECREASES, DIRECTLY_DECREASES, CAUSES_NO_CHANGE, POSITIVE_CORRELATION,
+    NEGATIVE_CORRELATION, ASSOCIATION,
+]
+
+
+def make_random_graph(seed: int, number_nodes: int = 12, number_edges: int = 80) -> BELGraph:
+    """Make a random graph with all kinds of causal and correlative edges, including self-loops."""
+    rng = random.Random(seed)
+    nodes = [Protein('HGNC', f'P{i}') for i in range(number_nodes)]
+    graph = BELGraph()
+    for _ in range(number_edges):
+        graph.add_edge(rng.choice(nodes), rng.choice(nodes), **{RELATION: rng.choice(RELATIONS)})
+    return graph
+
+
+def get_sampled_centrality(graph, number_samples: int, seed: int):
+    """Calculate the sampled betweenness centrality rescaled like networkx 3.5+, with any version of networkx.
+
+    The unscaled sums over the same sources as sampled by networkx are the same in every version, so they're
+    rescaled here.
+    """
+    graph = nx.DiGraph(graph)
+    number_nodes = graph.number_of_nodes()
+    sources = random.Random(seed).sample(list(graph), number_samples)
+    betweenness = nx.betweenness_centrality_subset(graph, sources, list(graph), normalized=False)
+    return {
+        node: value / ((number_samples - 1 if node in sources else number_samples) * (number_nodes - 2))
+        for node, value in betweenness.items()
+    }
+
+
+def make_annotated_graph(seed: int, number_nodes: int = 15, number_edges: int = 120, number_values: int = 8):
+    """Make a random graph whose edges each have a few random values of the Subgraph annotation."""
+    rng = random.Random(seed)
+    nodes = [Protein('HGNC', f'P{i}') for i in range(number_nodes)]
+    values = [f'S{i}' for i in range(number_values)]
+    graph = BELGraph()
+    graph.annotation_list['Subgraph'] = set(values)
+    for i in range(number_edges):
+        graph.add_increases(
+            rng.choice(nodes), rng.choice(nodes), citation=str(i), evidence=str(i),
+            annotations={'Subgraph': set(rng.sample(values, rng.randint(1, 3)))},
+        )
+    return graph
+
+
+def make_graph_with_warnings() -> BELGraph:
+    """Make a graph with pathologies, list annotations, and warnings."""
+    graph = BELGraph()
+    graph.namespace_url['HGNC'] = 'hgnc.belns'
+    graph.namespace_url['UNUSED'] = 'unused.belns'
+    graph.annotation_list['Confidence'] = {'High', 'Low'}
+    graph.annotation_list['Subgraph'] = {'S1', 'S2'}
+
+    a, b = Protein('HGNC', 'A'), Protein('HGNC', 'B')
+    disease = Pathology('MESH', 'disease')
+    graph.add_increases(a, b, citation='1', evidence='e1', annotations={'Confidence': 'High', 'Subgraph': 'S1'})
+    graph.add_increases(a, disease, citation='2', evidence='e2', annotations={'Confidence': 'Low'})
+    graph.add_decreases(disease, a, citation='3', evidence='e3')
+    graph.add_association(b, disease, citation='3', evidence='e4')
+
+    graph.warnings.extend([
+        (None, NakedNameWarning(1, 'line', 0, 'naked'), {}),
+        (None, NakedNameWarning(2, 'line', 0, 'naked'), {}),
+        (None, UndefinedNamespaceWarning(3, 'line', 0, 'UNDEFINED', 'x'), {}),
+        (None, MissingNamespaceNameWarning(4, 'line', 0, 'HGNC', 'missing'), {}),
+    ])
+    return graph
+
+
+def make_citation(identifier: str, date: str, authors, namespace: str = 'pubmed') -> CitationDict:
+    """Make a citation with a date and authors."""
+    return CitationDict(namespace=namespace, identifier=identifier, **{CITATION_DATE: date, CITATION_AUTHORS: authors})
+
+
+def make_provenance_graph() -> BELGraph:
+    """Make a graph with citations shared between edges, authors, dates, and annotations."""
+    graph = BELGraph()
+    graph.annotation_list['Confidence'] = {'High', 'Low'}
+    graph.annotation_list['Subgraph'] = {'S1', 'S2'}
+
+    a, b, c = Protein('HGNC', 'A'), Protein('HGNC', 'B'), Protein('HGNC', 'C')
+    first = make_citation('1', '2015-01-02', ['Author A', 'Author B'])
+    second = make_citation('2', '2016-03-04', ['Author B'])
+    third = make_citation('3', 'not a date', ['Author C'], namespace='doi')
+
+    graph.add_increases(a, b, citation=first, evidence='e1', annotations={'Confidence': 'High', 'Subgraph': 'S1'})
+    graph.add_decreases(a, b, citation=first, evidence='e2', annotations={'Subgraph': 'S1'})
+    graph.add_increases(b, c, citation=first, evidence='e1', annotations={'Subgraph': {'S1', 'S2'}})
+    graph.add_increases(a, c, citation=second, evidence='e3', annotations={'Confidence': 'Low', 'Subgraph': 'S2'})
+    graph.add_association(c, a, citation=third, evidence='e4')
+    graph.add_part_of(a, c)
+    return graph
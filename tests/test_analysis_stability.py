@@ -1,3 +1,5 @@
+import itertools as itt
+import random
 import unittest
 
 from pybel import BELGraph
@@ -5,9 +7,28 @@ from pybel.constants import DECREASES, INCREASES, NEGATIVE_CORRELATION, POSITIVE
 from pybel.dsl import Protein
 from pybel_tools.mutation.inference import infer_missing_two_way_edges
 from pybel_tools.summary import (
-    get_correlation_graph, get_correlation_triangles, get_mutually_unstable_correlation_triples,
-    get_separate_unstable_correlation_triples,
+    BELGraphSummary, StabilityIndex, compile_signed_adjacency, count_correlation_triangles, count_stability,
+    count_triangles, estimate_stability_summary, get_chaotic_pairs, get_chaotic_triplets, get_contradiction_summary,
+    get_correlation_graph, get_correlation_triangles, get_dampened_pairs, get_dampened_triplets,
+    get_decrease_mismatch_triplets, get_increase_mismatch_triplets, get_jens_unstable,
+    get_mutually_unstable_correlation_triples, get_regulatory_pairs, get_separate_unstable_correlation_triples,
+    get_triangles, jens_transformation_alpha, summarize_stability,
 )
+from tests.constants import RELATIONS, make_random_graph
+
+STABILITY_FUNCTIONS = {
+    'Regulatory Pairs': get_regulatory_pairs,
+    'Chaotic Pairs': get_chaotic_pairs,
+    'Dampened Pairs': get_dampened_pairs,
+    'Contradictory Pairs': get_contradiction_summary,
+    'Separately Unstable Triples': get_separate_unstable_correlation_triples,
+    'Mutually Unstable Triples': get_mutually_unstable_correlation_triples,
+    'Jens Unstable Triples': get_jens_unstable,
+    'Increase Mismatch Triples': get_increase_mismatch_triplets,
+    'Decrease Mismatch Triples': get_decrease_mismatch_triplets,
+    'Chaotic Triples': get_chaotic_triplets,
+    'Dampened Triples': get_dampened_triplets,
+}
 
 
 class TestUnstableTriplets(unittest.TestCase):
@@ -96,3 +117,155 @@ class TestUnstableTriplets(unittest.TestCase):
         graph.add_edge(c, b, **{RELATION: NEGATIVE_CORRELATION})
         graph.add_edge(e, c, **{RELATION: POSITIVE_CORRELATION})
         graph.add_edge(e, b, **{RELATION: POSITIVE_CORRELATION})
+
+
+class TestSummarizeStability(unittest.TestCase):
+    """Test the counts from the signed adjacency match the sets from the individual functions."""
+
+    def test_random_graphs(self):
+        """Test the counts on random graphs."""
+        for seed in range(25):
+            graph = make_random_graph(seed)
+            summary = summarize_stability(graph)
+            for label, function in STABILITY_FUNCTIONS.items():
+                with self.subTest(seed=seed, label=label):
+                    self.assertEqual(len(function(graph)), summary[label])
+
+    def test_parallel(self):
+        """Test counting in worker processes gives the same counts."""
+        graph = make_random_graph(0, number_nodes=40, number_edges=400)
+        adjacency = compile_signed_adjacency(graph)
+        self.assertEqual(summarize_stability(graph), count_stability(adjacency, batch_size=7, n_jobs=2))
+
+    def test_empty(self):
+        """Test an empty graph has no unstable motifs."""
+        self.assertEqual(dict.fromkeys(STABILITY_FUNCTIONS, 0), summarize_stability(BELGraph()))
+
+    def test_estimate(self):
+        """Test estimating the counts from a sample of nodes."""
+        graph = make_random_graph(0, number_nodes=40, number_edges=400)
+        summary = summarize_stability(graph)
+
+        full = estimate_stability_summary(graph, sample_size=graph.number_of_nodes())
+        for label, count in summary.items():
+            self.assertEqual((count, 0.0), full[label])
+
+        self.assertEqual(
+            estimate_stability_summary(graph, sample_size=20, seed=5),
+            estimate_stability_summary(graph, sample_size=20, seed=5),
+        )
+
+        # the estimates are unbiased, so they should average out to the real counts
+        number_seeds = 50
+        samples = [estimate_stability_summary(graph, sample_size=20, seed=seed) for seed in range(number_seeds)]
+        for label, count in summary.items():
+            mean_estimate = sum(sample[label].estimate for sample in samples) / number_seeds
+            mean_standard_error = sum(sample[label].standard_error for sample in samples) / number_seeds
+            with self.subTest(label=label):
+                self.assertAlmostEqual(count, mean_estimate, delta=mean_standard_error)
+
+    def test_summary_without_sets(self):
+        """Test the graph summary only counts the unstable motifs by default."""
+        graph = make_random_graph(1)
+        summary = BELGraphSummary.from_graph(graph)
+        self.assertIsNone(summary.regulatory_pairs)
+        self.assertIsNone(summary.jens_unstable)
+        self.assertIsNone(summary.stability_standard_error)
+        self.assertEqual(summarize_stability(graph), summary.stability_count)
+
+        sampled = BELGraphSummary.from_graph(graph, stability_sample_size=5, seed=0)
+        self.assertEqual(set(summary.stability_count), set(sampled.stability_standard_error))
+
+    def test_summary_with_sets(self):
+        """Test the materialized sets in the graph summary are the same as from the separate functions."""
+        for seed in range(3):
+            graph = make_random_graph(seed)
+            summary = BELGraphSummary.from_graph(graph, materialize_stability=True)
+            with self.subTest(seed=seed):
+                self.assertEqual(summarize_stability(graph), summary.stability_count)
+                self.assertEqual(get_regulatory_pairs(graph), summary.regulatory_pairs)
+                self.assertEqual(get_chaotic_pairs(graph), summary.chaotic_pairs)
+                self.assertEqual(get_dampened_pairs(graph), summary.dampened_pairs)
+                self.assertEqual(get_contradiction_summary(graph), summary.contradictory_pairs)
+                self.assertEqual(get_jens_unstable(graph), summary.jens_unstable)
+
+
+def _naive_correlation_triangles(graph):
+    return {
+        tuple(sorted([n, u, v], key=str))
+        for n in graph
+        for u, v in itt.combinations(graph[n], 2)
+        if graph.has_edge(u, v)
+    }
+
+
+def _naive_triangles(graph):
+    return {
+        tuple(sorted([a, b, c], key=str))
+        for a, b in graph.edges()
+        for c in graph.successors(b)
+        if graph.has_edge(c, a)
+    }
+
+
+class TestTriangles(unittest.TestCase):
+    """Test the forward triangle listing matches checking all pairs of neighbors."""
+
+    def test_random_graphs(self):
+        """Test listing and counting triangles on random graphs."""
+        for seed in range(25):
+            graph = make_random_graph(seed, number_edges=120)
+            with self.subTest(seed=seed, kind='correlation'):
+                cg = get_correlation_graph(graph)
+                expected = _naive_correlation_triangles(cg)
+                self.assertEqual(expected, get_correlation_triangles(cg))
+                self.assertEqual(len(expected), count_correlation_triangles(cg))
+
+            with self.subTest(seed=seed, kind='directed'):
+                jg = jens_transformation_alpha(graph)
+                expected = _naive_triangles(jg)
+                self.assertEqual(expected, get_triangles(jg))
+                self.assertEqual(len(expected), count_triangles(jg))
+
+
+class TestStabilityIndex(unittest.TestCase):
+    """Test the incremental stability index gives the same results as the batch functions."""
+
+    def assert_index_matches(self, graph, index):
+        """Assert each query of the index matches the function of the same name on the graph."""
+        for function in STABILITY_FUNCTIONS.values():
+            with self.subTest(function=function.__name__):
+                self.assertEqual(function(graph), getattr(index, function.__name__)())
+        self.assertEqual(summarize_stability(graph), index.summarize_stability())
+
+    def test_edits(self):
+        """Test adding and removing random edges."""
+        for seed in range(3):
+            rng = random.Random(seed)
+            graph = make_random_graph(seed, number_nodes=10, number_edges=40)
+            index = StabilityIndex.from_graph(graph)
+            self.assert_index_matches(graph, index)
+
+            nodes = sorted(graph, key=str)
+            for _ in range(30):
+                edges = list(graph.edges(keys=True, data=True))
+                if edges and rng.random() < 0.4:
+                    u, v, key, data = rng.choice(edges)
+                    graph.remove_edge(u, v, key)
+                    index.remove_edge_data(u, v, data)
+                else:
+                    u, v, relation = rng.choice(nodes), rng.choice(nodes), rng.choice(RELATIONS)
+                    graph.add_edge(u, v, **{RELATION: relation})
+                    index.add_edge(u, v, relation)
+
+                self.assert_index_matches(graph, index)
+
+    def test_remove_missing(self):
+        """Test removing an edge that isn't indexed."""
+        a, b = Protein('HGNC', 'A'), Protein('HGNC', 'B')
+        index = StabilityIndex()
+        index.add_edge(a, b, INCREASES)
+        with self.assertRaises(KeyError):
+            index.remove_edge(a, b, DECREASES)
+        with self.assertRaises(KeyError):
+            index.remove_edge(b, a, INCREASES)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the annotation index and the functions that group graphs by annotations."""
+
+import unittest
+
+from pybel import BELGraph
+from pybel.dsl import Protein
+from pybel.examples import egf_graph, sialic_acid_graph
+from pybel.language import Entity
+from pybel.struct.filters.node_predicates import is_causal_source
+from pybel_tools.annotation_index import (
+    AnnotationIndex, attach_annotation_index, detach_annotation_index, get_annotation_index,
+)
+from pybel_tools.mutation import get_subgraph_edges
+from pybel_tools.selection import group_nodes_by_annotation
+from pybel_tools.summary import (
+    calculate_subgraph_edge_overlap, count_annotation_values, count_annotation_values_filtered,
+    count_authors_by_annotation, count_citations_by_annotation,
+)
+from tests.constants import make_citation, make_provenance_graph
+
+a, b, c, d = (Protein('HGNC', name) for name in 'ABCD')
+
+
+def _summarize(graph: BELGraph, annotation: str = 'Subgraph'):
+    return dict(
+        nodes=group_nodes_by_annotation(graph, annotation),
+        overlap=calculate_subgraph_edge_overlap(graph, annotation),
+        values=count_annotation_values(graph, annotation),
+        values_by_source=count_annotation_values_filtered(graph, annotation, source_predicate=is_causal_source),
+        values_by_target=count_annotation_values_filtered(graph, annotation, target_predicate=is_causal_source),
+        edges=sorted(
+            (u.as_bel(), v.as_bel(), k)
+            for u, v, k, _ in get_subgraph_edges(graph, annotation, 'S1')
+        ),
+        authors=count_authors_by_annotation(graph, annotation),
+        citations=count_citations_by_annotation(graph, annotation),
+    )
+
+
+class TestAnnotationIndex(unittest.TestCase):
+    """Test the functions give the same results with and without an attached annotation index."""
+
+    def assert_index_matches(self, graph: BELGraph, annotation: str = 'Subgraph'):
+        """Check the functions give the same results with and without an index attached to the graph."""
+        expected = _summarize(graph, annotation)
+        attach_annotation_index(graph)
+        try:
+            actual = _summarize(graph, annotation)
+        finally:
+            detach_annotation_index(graph)
+
+        for key, value in expected.items():
+            with self.subTest(key=key):
+                self.assertEqual(value, actual[key])
+
+    def test_examples(self):
+        """Test on the example graphs and a graph with list annotations."""
+        for graph in (sialic_acid_graph, egf_graph, make_provenance_graph()):
+            with self.subTest(graph=graph.name):
+                self.assert_index_matches(graph)
+                self.assert_index_matches(graph, 'Species')
+
+    def test_groups(self):
+        """Test grouping a small graph, where one edge has two values of the annotation."""
+        graph = make_provenance_graph()
+        s1, s2 = Entity(namespace='Subgraph', identifier='S1'), Entity(namespace='Subgraph', identifier='S2')
+        index = AnnotationIndex.from_graph(graph)
+
+        self.assertEqual({s1: {a, b, c}, s2: {a, b, c}}, index.group_nodes('Subgraph'))
+        self.assertEqual({s1: 3, s2: 2}, index.count_values('Subgraph'))
+        self.assertEqual({'Confidence', 'Subgraph'}, index.get_annotations())
+        self.assertEqual(index.get_edges('Subgraph', 'S1'), index.get_edges('Subgraph', s1))
+        self.assertEqual({a, b, c}, index.get_nodes('Subgraph', 'S2'))
+
+        _, intersection, _, tanimoto = calculate_subgraph_edge_overlap(graph)
+        self.assertEqual({(b, c)}, intersection[s1][s2])
+        self.assertAlmostEqual(1 / 3, tanimoto[s1][s2])
+
+    def test_edits(self):
+        """Test the index gives the same results as scanning the graph after adding and removing edges."""
+        graph = make_provenance_graph()
+        index = attach_annotation_index(graph)
+
+        key = graph.add_increases(
+            a, d, citation=make_citation('4', '2017-05-06', ['Author D']), evidence='e5',
+            annotations={'Subgraph': 'S3'},
+        )
+        index.add_edge(a, d, key, graph.edges[a, d, key])
+        self.assertIn(d, group_nodes_by_annotation(graph)[Entity(namespace='Subgraph', identifier='S3')])
+
+        removed = [
+            (u, v, key)
+            for u, v, key, data in graph.edges(keys=True, data=True)
+            if data.get('evidence') in {'e1', 'e5'}
+        ]
+        for u, v, key in removed:
+            graph.remove_edge(u, v, key)
+            index.remove_edge(u, v, key)
+
+        actual = _summarize(graph)
+        detach_annotation_index(graph)
+        self.assertEqual(_summarize(graph), actual)
+        self.assertEqual({'Confidence', 'Subgraph'}, index.get_annotations())
+        s1, s2 = Entity(namespace='Subgraph', identifier='S1'), Entity(namespace='Subgraph', identifier='S2')
+        self.assertEqual({s1: {a, b}, s2: {a, c}}, index.group_nodes('Subgraph'))
+
+        with self.assertRaises(KeyError):
+            index.remove_edge(*removed[0])
+
+    def test_attach(self):
+        """Test attaching and detaching an index, and scanning the graph if it was changed without the index."""
+        graph = make_provenance_graph()
+        self.assertIsNone(get_annotation_index(graph))
+        index = attach_annotation_index(graph)
+        self.assertIs(index, get_annotation_index(graph))
+
+        graph.add_increases(a, d, citation='4', evidence='e5', annotations={'Subgraph': 'S3'})
+        with self.assertLogs('pybel_tools.annotation_index', level='WARNING'):
+            self.assertEqual(3, len(count_annotation_values(graph, 'Subgraph')))
+
+        detach_annotation_index(graph)
+        self.assertIsNone(get_annotation_index(graph))
@@ -2,11 +2,20 @@
 
 """Tests for the HTML summary assembler."""
 
+import io
+import json
 import os
 import tempfile
 import unittest
 
-from pybel.examples import sialic_acid_graph
+import pybel
+from pybel.exceptions import NakedNameWarning
+from pybel.examples import egf_graph, sialic_acid_graph
+from pybel_tools.assembler.html import (
+    clear_summary_cache, get_summary, get_summary_key, precompute_summaries, to_html, to_html_file, to_html_path,
+)
+from pybel_tools.summary import BELGraphSummary
+from tests.constants import make_graph_with_warnings
 
 try:
     import bio2bel_hgnc
@@ -33,6 +42,49 @@ class TestSummaryAssembler(unittest.TestCase):
                 self.assertIn('<html', contents)
                 self.assertIn('PTPN6', contents)
 
+    def test_stream(self):
+        """Test streaming the page to a file gives the same HTML as rendering it as a string."""
+        file = io.StringIO()
+        to_html_file(sialic_acid_graph, file)
+        self.assertEqual(to_html(sialic_acid_graph) + '\n', file.getvalue())
+
+    def test_truncate(self):
+        """Test truncating the tables and writing all of their rows to the sidecar JSON file."""
+        graph = sialic_acid_graph.copy()
+        graph.warnings.extend(
+            (None, NakedNameWarning(i, f'line {i}', 0, f'name{i}'), {})
+            for i in range(5)
+        )
+        statements = [
+            (data['citation'].curie, graph.edge_to_bel(u, v, data))
+            for u, v, data in graph.edges(data=True)
+            if 'citation' in data
+        ]
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'summary.html')
+            to_html_path(graph, path, max_rows=3)
+
+            with open(path) as file:
+                contents = file.read()
+            with open(os.path.join(directory, 'summary.json')) as file:
+                sidecar = json.load(file)
+
+        self.assertIn(f'Showing the first 3 of {len(statements)} statements', contents)
+        self.assertIn('Showing the first 3 of 5 errors', contents)
+        self.assertIn('href="summary.json"', contents)
+        self.assertIn('name2', contents)
+        self.assertNotIn('name3', contents)
+
+        self.assertEqual([dict(citation=curie, bel=bel) for curie, bel in statements], sidecar['statements'])
+        self.assertEqual([f'line {i}' for i in range(5)], [row['line'] for row in sidecar['warnings']])
+
+    def test_not_truncated(self):
+        """Test no sidecar file is written if the tables fit."""
+        with tempfile.TemporaryDirectory() as directory:
+            to_html_path(sialic_acid_graph, os.path.join(directory, 'summary.html'))
+            self.assertEqual(['summary.html'], os.listdir(directory))
+
     @unittest.skip('Need to upgrade Bio2BEL to PyBEL 14')
     def test_ideogram_to_html_path(self):
         """Test to_html_path."""
@@ -47,3 +99,63 @@ class TestSummaryAssembler(unittest.TestCase):
                 contents = file.read()
                 self.assertIn('<html', contents)
                 self.assertIn('PTPN6', contents)
+
+
+class TestSummaryCache(unittest.TestCase):
+    """Tests for caching the summaries shown by the HTML assembler."""
+
+    def setUp(self):
+        """Start each test with an empty in-memory cache."""
+        clear_summary_cache()
+
+    def test_memory(self):
+        """Test summaries are reused for identical graphs and recalculated for modified ones."""
+        summary = get_summary(sialic_acid_graph)
+        self.assertIs(summary, get_summary(sialic_acid_graph.copy()))
+        self.assertIsNot(summary, get_summary(sialic_acid_graph, use_cache=False))
+
+        graph = sialic_acid_graph.copy()
+        graph.add_increases(pybel.dsl.Protein('HGNC', 'A'), pybel.dsl.Protein('HGNC', 'B'), citation='1', evidence='e')
+        self.assertIsNot(summary, get_summary(graph))
+
+    def test_metadata(self):
+        """Test graphs with the same edges but different warnings or definitions don't share summaries."""
+        graph = make_graph_with_warnings()
+        without_warnings = make_graph_with_warnings()
+        without_warnings.warnings.clear()
+        without_definitions = make_graph_with_warnings()
+        del without_definitions.namespace_url['UNUSED']
+        without_list_values = make_graph_with_warnings()
+        without_list_values.annotation_list['Subgraph'] = {'S1'}
+
+        summary = get_summary(graph)
+        self.assertEqual({'naked'}, summary.naked_names)
+        self.assertEqual({'UNUSED'}, summary.unused_namespaces)
+        self.assertIs(summary, get_summary(make_graph_with_warnings()))
+        for other in (without_warnings, without_definitions, without_list_values):
+            self.assertNotEqual(get_summary_key(graph), get_summary_key(other))
+            self.assertEqual(BELGraphSummary.from_graph(other, materialize_stability=False), get_summary(other))
+
+    def test_precompute(self):
+        """Test precomputing the summaries of a directory of graphs, then rendering from the cache directory."""
+        with tempfile.TemporaryDirectory() as directory, tempfile.TemporaryDirectory() as cache_directory:
+            pybel.to_pickle(sialic_acid_graph, os.path.join(directory, 'sialic_acid.bel.pickle'))
+            pybel.to_nodelink_file(egf_graph, os.path.join(directory, 'egf.bel.nodelink.json'))
+            with open(os.path.join(directory, 'README.md'), 'w') as file:
+                print('not a graph', file=file)
+
+            for n_jobs in (None, 2):
+                with self.subTest(n_jobs=n_jobs):
+                    keys = precompute_summaries(directory, cache_directory, n_jobs=n_jobs)
+                    self.assertEqual(
+                        {
+                            os.path.join(directory, 'sialic_acid.bel.pickle'): get_summary_key(sialic_acid_graph),
+                            os.path.join(directory, 'egf.bel.nodelink.json'): get_summary_key(egf_graph),
+                        },
+                        keys,
+                    )
+                    self.assertEqual(2, len(os.listdir(cache_directory)))
+
+            summary = get_summary(sialic_acid_graph, cache_directory=cache_directory)
+            self.assertEqual(BELGraphSummary.from_graph(sialic_acid_graph, materialize_stability=False), summary)
+            self.assertEqual(to_html(sialic_acid_graph, use_cache=False), to_html(sialic_acid_graph))
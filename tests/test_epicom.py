@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for EpiCom."""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from pybel import BELGraph
+from pybel.dsl import Gene
+from pybel.manager import Manager
+from pybel.manager.models import Edge, Namespace, NamespaceEntry, Network, Node
+from pybel_tools.analysis.epicom import iterate_chunked_epicom_scores, run_epicom_chunked
+from pybel_tools.analysis.epicom.algorithm import (
+    get_drug_scores, get_drug_target_interactions, get_preprocessed_drug_target_interactions, read_dti_snapshot,
+    write_dti_snapshot,
+)
+from pybel_tools.analysis.epicom.build import build_database, get_drug_model, get_networks_using_annotation
+from pybel_tools.analysis.epicom.models import Score
+
+HGNC = 'HGNC'
+ANNOTATION_URL = 'subgraph.belanno'
+
+a, b, c, d, e = (Gene(HGNC, name) for name in 'abcde')
+
+dtis = {
+    'drug1': [a, b],
+    'drug2': [c],
+    'drug3': [d, e],
+    'drug4': [Gene(HGNC, 'f')],
+}
+
+
+def make_graph() -> BELGraph:
+    """Make a graph with two sub-graphs."""
+    graph = BELGraph()
+    graph.annotation_list['Subgraph'] = {'S1', 'S2'}
+    for i, (u, v) in enumerate([(a, b), (b, c), (c, a), (a, d), (d, e)]):
+        graph.add_increases(u, v, citation=str(i), evidence=str(i), annotations={'Subgraph': 'S1' if i < 3 else 'S2'})
+    return graph
+
+
+class TestChunked(unittest.TestCase):
+    """Test the chunked EpiCom runner."""
+
+    def setUp(self):
+        self.graph = make_graph()
+        self.expected = {
+            (str(subgraph), drug, score)
+            for drug, subgraph, score in get_drug_scores(self.graph, dtis)
+        }
+        self.assertNotEqual(0, len(self.expected))
+
+    def test_run(self):
+        """Test the chunked runner gives the same results as :func:`get_drug_scores` and can be resumed."""
+        with tempfile.TemporaryDirectory() as directory:
+            run_epicom_chunked(self.graph, directory, dtis=dtis, chunk_size=3, use_tqdm=False)
+            self.assertEqual(self.expected, set(iterate_chunked_epicom_scores(directory)))
+
+            chunks_directory = os.path.join(directory, 'chunks')
+            self.assertEqual(3, len(os.listdir(chunks_directory)))
+
+            # simulate an interrupted run
+            os.remove(os.path.join(chunks_directory, 'chunk_000001.tsv.gz'))
+            with self.assertRaises(ValueError):
+                list(iterate_chunked_epicom_scores(directory))
+
+            run_epicom_chunked(self.graph, directory, dtis=dtis, chunk_size=3, use_tqdm=False)
+            self.assertEqual(self.expected, set(iterate_chunked_epicom_scores(directory)))
+
+            with self.assertRaises(ValueError):
+                run_epicom_chunked(self.graph, directory, dtis=dtis, chunk_size=2, use_tqdm=False)
+
+    def test_run_parallel(self):
+        """Test running the chunks in worker processes."""
+        with tempfile.TemporaryDirectory() as directory:
+            run_epicom_chunked(self.graph, directory, dtis=dtis, chunk_size=2, n_jobs=2, use_tqdm=False)
+            self.assertEqual(self.expected, set(iterate_chunked_epicom_scores(directory)))
+
+
+class TestBuildDatabase(unittest.TestCase):
+    """Test building the database of EpiCom scores."""
+
+    def setUp(self):
+        self.manager = Manager(connection='sqlite://')
+        self.manager.create_all()
+
+        annotation = Namespace(keyword='Subgraph', url=ANNOTATION_URL, is_annotation=True)
+        self.subgraph_entries = {
+            name: NamespaceEntry(name=name, namespace=annotation, is_annotation=True)
+            for name in ('S1', 'S2')
+        }
+        drug_namespace = Namespace(keyword='DRUGBANK', url='drugbank.belns')
+        self.drug_entries = {
+            name: NamespaceEntry(name=name, namespace=drug_namespace)
+            for name in ('drug1', 'drug2', 'drug3')
+        }
+
+        graph = make_graph()
+        source = Node._start_from_base_entity(a)
+        target = Node._start_from_base_entity(b)
+        edge = Edge(bel='g(HGNC:a) increases g(HGNC:b)', relation='increases', source=source, target=target, data={})
+        edge.annotations.append(self.subgraph_entries['S1'])
+        self.network = Network(name='test', version='1.0.0', edges=[edge])
+        self.network.store_bel(graph)
+
+        self.manager.session.add_all([annotation, drug_namespace, self.network])
+        self.manager.session.add_all(self.subgraph_entries.values())
+        self.manager.session.add_all(self.drug_entries.values())
+        self.manager.session.commit()
+
+        self.expected = {
+            (self.network.id, self.subgraph_entries[subgraph.identifier].id, self.drug_entries[drug].id, score)
+            for drug, subgraph, score in get_drug_scores(graph, dtis)
+            if drug in self.drug_entries
+        }
+        self.assertNotEqual(0, len(self.expected))
+
+    def test_lookups(self):
+        """Test looking up networks and drugs."""
+        annotation = self.manager.get_namespace_by_url(ANNOTATION_URL)
+        self.assertEqual([self.network], get_networks_using_annotation(self.manager, annotation))
+        self.assertEqual(self.drug_entries['drug1'], get_drug_model(self.manager, 'drug1'))
+        self.assertIsNone(get_drug_model(self.manager, 'drug4'))
+
+    def test_build(self):
+        """Test the scores are bulk inserted."""
+        build_database(self.manager, annotation_url=ANNOTATION_URL, dtis=dtis, batch_size=2, commit_interval=3)
+        self.assertEqual(
+            self.expected,
+            {
+                (score.network_id, score.annotation_id, score.drug_id, score.score)
+                for score in self.manager.session.query(Score)
+            },
+        )
+
+
+class TestSnapshot(unittest.TestCase):
+    """Test the drug-target interaction snapshot."""
+
+    def test_snapshot(self):
+        """Test writing, reading, and memoizing a snapshot."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'dtis.json.gz')
+            write_dti_snapshot({'drug1': ['b', 'a', 'a'], 'drug2': {'c'}}, path)
+
+            expected = {'drug1': ['a', 'b'], 'drug2': ['c']}
+            self.assertEqual(expected, read_dti_snapshot(path))
+
+            raw = get_drug_target_interactions(path=path)
+            self.assertEqual(expected, raw)
+            self.assertIs(raw, get_drug_target_interactions(path=path))
+
+            preprocessed = get_preprocessed_drug_target_interactions(path=path)
+            self.assertEqual({'drug1': [a, b], 'drug2': [c]}, preprocessed)
+            self.assertIs(preprocessed, get_preprocessed_drug_target_interactions(path=path))
+
+    def test_interrupted(self):
+        """Test an interrupted write leaves neither a truncated snapshot nor a temporary file."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'dtis.json.gz')
+            write_dti_snapshot({'drug1': ['a']}, path)
+
+            with mock.patch('json.dump', side_effect=KeyboardInterrupt), self.assertRaises(KeyboardInterrupt):
+                write_dti_snapshot({'drug2': ['b']}, path)
+
+            self.assertEqual(['dtis.json.gz'], os.listdir(directory))
+            self.assertEqual({'drug1': ['a']}, read_dti_snapshot(path))
+
+    def test_version_mismatch(self):
+        """Test a snapshot with an unknown version isn't read."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'dtis.json')
+            with open(path, 'w') as file:
+                json.dump({'version': -1, 'drugs': {}}, file)
+
+            with self.assertRaises(ValueError):
+                read_dti_snapshot(path)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the approximate and parallel counts of annotation values."""
+
+import random
+import unittest
+from collections import Counter
+
+from pybel.examples import sialic_acid_graph
+from pybel_tools.annotation_index import attach_annotation_index
+from pybel_tools.heavy_hitters import SpaceSaving
+from pybel_tools.summary import (
+    count_annotation_values, count_annotation_values_filtered, estimate_top_annotation_values,
+)
+from tests.constants import make_annotated_graph
+
+
+def has_even_length(_, node) -> bool:
+    """Keep nodes whose BEL has an even number of characters, as a picklable predicate."""
+    return len(node.as_bel()) % 2 == 0
+
+
+class TestSpaceSaving(unittest.TestCase):
+    """Test the bounds of the Space-Saving summary on a skewed stream."""
+
+    def test_bounds(self):
+        """Test the counts are upper bounds with bounded errors, and all frequent items are found."""
+        rng = random.Random(0)
+        stream = [int(rng.paretovariate(1.0)) for _ in range(20000)]
+        expected = Counter(stream)
+
+        summary = SpaceSaving(capacity=50)
+        summary.update(stream)
+        self.assertEqual(50, len(summary))
+        self.assertEqual(len(stream), summary.total)
+
+        for item, count in summary.most_common():
+            self.assertLessEqual(expected[item], count)
+            self.assertLessEqual(count - summary.get_error(item), expected[item])
+            self.assertLessEqual(summary.get_error(item), len(stream) / 50)
+
+        for item, count in expected.items():
+            if len(stream) / 50 < count:
+                self.assertIn(item, summary)
+
+        top = [item for item, _ in expected.most_common(5)]
+        self.assertEqual(top, [item for item, _ in summary.most_common(5)])
+
+    def test_small(self):
+        """Test a stream with fewer items than the capacity is counted exactly."""
+        summary = SpaceSaving(capacity=10)
+        summary.update('abracadabra')
+        self.assertEqual(Counter('abracadabra').most_common(), summary.most_common())
+        self.assertEqual(0, summary.get_count('z'))
+        with self.assertRaises(ValueError):
+            SpaceSaving(capacity=0)
+
+
+class TestCountAnnotationValues(unittest.TestCase):
+    """Test the parallel and approximate counts match the exact ones."""
+
+    def test_parallel(self):
+        """Test sharding the source nodes over processes gives the same counts."""
+        graph = make_annotated_graph(0)
+        self.assertEqual(
+            count_annotation_values(graph, 'Subgraph'),
+            count_annotation_values(graph, 'Subgraph', n_jobs=2),
+        )
+        for kwargs in ({'source_predicate': has_even_length}, {'target_predicate': has_even_length}):
+            with self.subTest(**kwargs):
+                self.assertEqual(
+                    count_annotation_values_filtered(graph, 'Subgraph', **kwargs),
+                    count_annotation_values_filtered(graph, 'Subgraph', n_jobs=2, **kwargs),
+                )
+
+    def test_estimate(self):
+        """Test the estimated top values, which are exact when the capacity covers all values."""
+        for graph, annotation in ((make_annotated_graph(1), 'Subgraph'), (sialic_acid_graph.copy(), 'Species')):
+            with self.subTest(annotation=annotation):
+                expected = count_annotation_values_filtered(graph, annotation, source_predicate=has_even_length)
+                estimate = estimate_top_annotation_values(graph, annotation, 3, source_predicate=has_even_length)
+                self.assertEqual(sorted(expected.values(), reverse=True)[:3], [count for _, count in estimate])
+                for value, count in estimate:
+                    self.assertEqual(expected[value], count)
+
+                counts = count_annotation_values(graph, annotation)
+                total = sum(counts.values())
+                for value, count in estimate_top_annotation_values(graph, annotation, 2, capacity=2):
+                    self.assertLessEqual(counts[value], count)
+                    self.assertLessEqual(count, counts[value] + total / 2)
+
+                attach_annotation_index(graph)
+                self.assertEqual(
+                    counts.most_common(2),
+                    estimate_top_annotation_values(graph, annotation, 2),
+                )
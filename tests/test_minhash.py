@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the approximate similarity searches with MinHash signatures."""
+
+import random
+import unittest
+
+import numpy as np
+
+from pybel.dsl import Protein
+from pybel_tools.analysis.mechanisms import compare_node_sets
+from pybel_tools.minhash import MinHashLSH, choose_number_bands
+from pybel_tools.utils import tanimoto_set_similarity
+
+
+def make_mechanisms(seed: int, number_canonical: int = 20, number_candidates: int = 200):
+    """Make random canonical node sets and candidates, some of which are perturbed copies of the canonical ones."""
+    rng = random.Random(seed)
+    nodes = [Protein('HGNC', f'P{i}') for i in range(1000)]
+    canonical = {
+        f'C{i}': set(rng.sample(nodes, rng.randint(20, 100)))
+        for i in range(number_canonical)
+    }
+    candidates = {}
+    for i in range(number_candidates):
+        if i % 4:
+            candidates[f'M{i}'] = set(rng.sample(nodes, rng.randint(20, 100)))
+        else:
+            base = sorted(canonical[rng.choice(sorted(canonical))], key=str)
+            candidates[f'M{i}'] = set(rng.sample(base, int(0.9 * len(base)))) | set(rng.sample(nodes, 3))
+    return canonical, candidates
+
+
+class TestMinHash(unittest.TestCase):
+    """Test finding similar sets with MinHash signatures and LSH."""
+
+    def test_compare(self):
+        """Test the approximate comparison finds the same similar pairs as comparing all of them."""
+        canonical, candidates = make_mechanisms(0)
+        exact = compare_node_sets(canonical, candidates)
+        for name, similarities in exact.items():
+            for candidate_name, similarity in similarities.items():
+                self.assertEqual(tanimoto_set_similarity(canonical[name], candidates[candidate_name]), similarity)
+
+        for threshold in (0.3, 0.6):
+            with self.subTest(threshold=threshold):
+                approximate = compare_node_sets(canonical, candidates, threshold=threshold, seed=0)
+                self.assertEqual(set(canonical), set(approximate))
+                expected = {
+                    (name, candidate_name): similarity
+                    for name, similarities in exact.items()
+                    for candidate_name, similarity in similarities.items()
+                    if threshold <= similarity
+                }
+                self.assertLess(0, len(expected))
+                self.assertEqual(expected, {
+                    (name, candidate_name): similarity
+                    for name, similarities in approximate.items()
+                    for candidate_name, similarity in similarities.items()
+                })
+
+    def test_index(self):
+        """Test adding and searching sets."""
+        index = MinHashLSH(threshold=0.5, number_bands=32, seed=0)
+        index.add('a', range(100))
+        index.add('b', range(100, 200))
+        index.add('empty', [])
+        self.assertEqual(3, len(index))
+        self.assertEqual({'a': 0.9}, index.search(range(90)))
+        self.assertEqual({}, index.search([]))
+        self.assertEqual({'a'}, index.get_candidates(range(100)))
+        with self.assertRaises(KeyError):
+            index.add('a', [1])
+
+    def test_cache(self):
+        """Test the cache of element hashes stays bounded and doesn't change the signatures."""
+        index = MinHashLSH(seed=0, cache_size=10)
+        uncached = MinHashLSH(seed=0)
+        for start in range(0, 500, 50):
+            elements = [str(i) for i in range(start, start + 100)]
+            np.testing.assert_array_equal(uncached.get_signature(elements), index.get_signature(elements))
+            self.assertGreaterEqual(10, len(index._hashes))
+
+    def test_parameters(self):
+        """Test checking the threshold and bands, and choosing the number of bands."""
+        with self.assertRaises(ValueError):
+            MinHashLSH(threshold=0.0)
+        with self.assertRaises(ValueError):
+            MinHashLSH(number_bands=3)
+
+        bands = [choose_number_bands(threshold) for threshold in (0.2, 0.5, 0.8)]
+        self.assertEqual(sorted(bands, reverse=True), bands)
+        for number_bands in bands:
+            self.assertEqual(0, 128 % number_bands)
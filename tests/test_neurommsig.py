@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the NeuroMMSig algorithm."""
+
+import itertools as itt
+import unittest
+
+from pybel import BELGraph
+from pybel.dsl import Gene
+from pybel_tools.analysis.neurommsig.algorithm import (
+    clear_preprocessed_neurommsig_graph_cache, get_neurommsig_scores, get_preprocessed_neurommsig_graph,
+    neurommsig_topology, neurommsig_topology_batch,
+)
+
+HGNC = 'HGNC'
+
+a, b, c, d, e = (Gene(HGNC, name) for name in 'abcde')
+
+
+def _naive_topology(graph, nodes):
+    nodes = list(nodes)
+    if len(nodes) <= 1:
+        return 0.0
+    unnormalized_sum = sum(
+        u in graph[v]
+        for u, v in itt.product(nodes, repeat=2)
+        if v in graph and u != v
+    )
+    return unnormalized_sum / (len(nodes) * (len(nodes) - 1.0))
+
+
+class TestTopology(unittest.TestCase):
+    """Test the NeuroMMSig topology score."""
+
+    def setUp(self):
+        self.graph = BELGraph()
+        self.graph.add_increases(a, b, citation='1', evidence='1')
+        self.graph.add_increases(a, b, citation='2', evidence='2')
+        self.graph.add_decreases(b, c, citation='1', evidence='3')
+        self.graph.add_association(c, a, citation='1', evidence='4')
+        self.graph.add_increases(d, d, citation='1', evidence='5')
+        self.graph.add_increases(d, a, citation='1', evidence='6')
+
+        self.node_lists = {
+            'empty': [],
+            'single': [a],
+            'missing': [a, e],
+            'triangle': [a, b, c],
+            'self-loop': [d, a],
+            'duplicates': [a, a, b, d],
+            'all': [a, b, c, d, e],
+        }
+
+    def test_topology(self):
+        """Test the topology score matches the quadratic definition."""
+        for key, nodes in self.node_lists.items():
+            with self.subTest(key=key):
+                self.assertAlmostEqual(_naive_topology(self.graph, nodes), neurommsig_topology(self.graph, nodes))
+
+    def test_topology_batch(self):
+        """Test the batched topology score matches the single score."""
+        results = neurommsig_topology_batch(self.graph, self.node_lists)
+        self.assertEqual(set(self.node_lists), set(results))
+        for key, nodes in self.node_lists.items():
+            with self.subTest(key=key):
+                self.assertAlmostEqual(neurommsig_topology(self.graph, nodes), results[key])
+
+    def test_topology_batch_empty(self):
+        """Test the batched topology score with no lists."""
+        self.assertEqual({}, neurommsig_topology_batch(self.graph, {}))
+
+
+class TestScores(unittest.TestCase):
+    """Test running NeuroMMSig over a stratified graph."""
+
+    def setUp(self):
+        self.graph = BELGraph()
+        self.graph.annotation_list['Subgraph'] = {'S1', 'S2'}
+        for i, (u, v) in enumerate([(a, b), (b, c), (c, a), (a, d), (d, e)]):
+            self.graph.add_increases(
+                u, v, citation=str(i), evidence=str(i),
+                annotations={'Subgraph': 'S1' if i < 3 else 'S2'},
+            )
+
+    def test_parallel(self):
+        """Test scoring the strata in worker processes gives the same results."""
+        genes = ['a', 'b', 'e']
+        sequential = get_neurommsig_scores(self.graph, genes)
+        self.assertIsNotNone(sequential)
+        self.assertEqual(2, len(sequential))
+
+        parallel = get_neurommsig_scores(self.graph, genes, n_jobs=2)
+        self.assertEqual(sequential, parallel)
+
+    def test_preprocess_cache(self):
+        """Test the preprocessed graph is reused for identical graphs."""
+        clear_preprocessed_neurommsig_graph_cache()
+        first = get_preprocessed_neurommsig_graph(self.graph)
+        self.assertIs(first, get_preprocessed_neurommsig_graph(self.graph))
+        self.assertIs(first, get_preprocessed_neurommsig_graph(self.graph.copy()))
+        self.assertIsNot(first, get_preprocessed_neurommsig_graph(self.graph, use_cache=False))
+
+        self.graph.add_increases(e, a, citation='5', evidence='5')
+        self.assertIsNot(first, get_preprocessed_neurommsig_graph(self.graph))
+        clear_preprocessed_neurommsig_graph_cache()
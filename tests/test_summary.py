@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the composite graph summary."""
+
+import collections
+import unittest
+
+from pybel import BELGraph, BaseAbundance
+from pybel.constants import IDENTIFIER, NAME
+from pybel.examples import ampk_graph, braf_graph, egf_graph, ras_tloc_graph, sialic_acid_graph, statin_graph
+from pybel.struct.summary import (
+    get_naked_names, get_syntax_errors, get_top_hubs, get_top_pathologies, get_unused_annotations,
+    get_unused_list_annotation_values, get_unused_namespaces,
+)
+from pybel_tools.summary import (
+    BELGraphSummary, count_confidences, get_most_common_errors, get_namespaces_with_incorrect_names,
+    get_undefined_annotations, get_undefined_namespaces,
+)
+from pybel_tools.summary.provenance import get_citation_years
+from tests.constants import make_graph_with_warnings
+
+
+def _get_expected_fields(graph: BELGraph):
+    """Get the fields of the summary by calling each summary function separately."""
+    return dict(
+        function_count=graph.count.functions(),
+        modifications_count=graph.count.modifications(),
+        relation_count=graph.count.relations(),
+        authors_count=graph.count.authors(),
+        variants_count=graph.count.variants(),
+        namespaces_count=graph.count.namespaces(),
+        undefined_namespaces=get_undefined_namespaces(graph),
+        undefined_annotations=get_undefined_annotations(graph),
+        namespaces_with_incorrect_names=get_namespaces_with_incorrect_names(graph),
+        unused_namespaces=get_unused_namespaces(graph),
+        unused_annotations=get_unused_annotations(graph),
+        unused_list_annotation_values=get_unused_list_annotation_values(graph),
+        naked_names=get_naked_names(graph),
+        error_count=graph.count.error_types(),
+        error_groups=get_most_common_errors(graph),
+        syntax_errors=get_syntax_errors(graph),
+        citation_years=get_citation_years(graph),
+        confidence_count=count_confidences(graph),
+        hub_data=_name_nodes(get_top_hubs(graph, n=15)),
+        disease_degrees=collections.Counter(dict(get_top_pathologies(graph, n=None))),
+    )
+
+
+def _name_nodes(pairs):
+    return collections.Counter({
+        node.name or node.identifier if NAME in node or IDENTIFIER in node else str(node): count
+        for node, count in pairs
+        if isinstance(node, BaseAbundance)
+    })
+
+
+class TestSummary(unittest.TestCase):
+    """Test the single-pass summary gives the same results as the separate summary functions."""
+
+    def assert_summary_matches(self, graph: BELGraph):
+        """Check the summary's fields against calling each function separately."""
+        expected = _get_expected_fields(graph)
+        summary = BELGraphSummary.from_graph(graph, materialize_stability=False)
+
+        disease_degrees = expected.pop('disease_degrees')
+        for key, value in expected.items():
+            with self.subTest(graph=graph.name, field=key):
+                self.assertEqual(value, getattr(summary, key))
+
+        # pathologies are counted over a set of edges, so ties are broken arbitrarily
+        self.assertEqual(len(disease_degrees), len(summary.disease_data))
+        self.assertEqual(sorted(disease_degrees.values()), sorted(summary.disease_data.values()))
+
+    def test_examples(self):
+        """Test summarizing the example graphs."""
+        for graph in (ampk_graph, braf_graph, egf_graph, ras_tloc_graph, sialic_acid_graph, statin_graph):
+            self.assert_summary_matches(graph)
+
+    def test_warnings(self):
+        """Test summarizing a graph with warnings."""
+        graph = make_graph_with_warnings()
+        self.assert_summary_matches(graph)
+
+        summary = BELGraphSummary.from_graph(graph, materialize_stability=False)
+        self.assertEqual({'naked'}, summary.naked_names)
+        self.assertEqual({'Subgraph': {'S2'}}, summary.unused_list_annotation_values)
+        self.assertEqual({'UNUSED'}, summary.unused_namespaces)
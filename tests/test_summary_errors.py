@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the error summaries and the index of warnings they answer from."""
+
+import unittest
+from collections import defaultdict
+from unittest import mock
+
+from pybel import BELGraph
+from pybel.constants import ANNOTATIONS
+from pybel.dsl import Protein
+from pybel.exceptions import (
+    MissingNamespaceNameWarning, MissingNamespaceRegexWarning, NakedNameWarning, UndefinedAnnotationWarning,
+    UndefinedNamespaceWarning,
+)
+from pybel.language import Entity
+from pybel_tools.summary import (
+    WarningsIndex, calculate_error_by_annotation, calculate_incorrect_name_dict, get_incorrect_names,
+    get_incorrect_names_by_namespace, get_most_common_errors, get_names_including_errors,
+    get_names_including_errors_by_namespace, get_namespaces_with_incorrect_names, get_undefined_annotations,
+    get_undefined_namespace_names, get_undefined_namespaces, get_warnings_index, group_errors,
+)
+from tests.constants import make_graph_with_warnings
+
+
+def make_context(*values) -> dict:
+    """Make the parser context for a warning with the given values of the Subgraph annotation."""
+    return {ANNOTATIONS: {'Subgraph': [Entity(namespace='Subgraph', identifier=value) for value in values]}}
+
+
+def add_warnings(graph):
+    """Add warnings of each kind, some with annotations in their contexts."""
+    graph.warnings.extend([
+        (None, MissingNamespaceNameWarning(5, 'line', 0, 'HGNC', 'other'), make_context('S1')),
+        (None, MissingNamespaceRegexWarning(6, 'line', 0, 'HGNC', 'regex'), make_context('S1', 'S2')),
+        (None, UndefinedNamespaceWarning(7, 'line', 0, 'UNDEFINED', 'y'), make_context('S2')),
+        (None, UndefinedAnnotationWarning(8, 'line', 0, 'Undefined'), {ANNOTATIONS: {'Subgraph': 'S3'}}),
+        (None, NakedNameWarning(8, 'line', 0, 'naked'), None),
+    ])
+
+
+class TestWarningsIndex(unittest.TestCase):
+    """Test the error summaries, including after warnings are added to the graph."""
+
+    def test_summaries(self):
+        """Test each summary on a graph with warnings of each kind."""
+        graph = make_graph_with_warnings()
+        self.assertEqual({'HGNC': ['missing']}, calculate_incorrect_name_dict(graph))
+
+        add_warnings(graph)
+        s1, s2 = Entity(namespace='Subgraph', identifier='S1'), Entity(namespace='Subgraph', identifier='S2')
+
+        self.assertEqual({'HGNC'}, get_namespaces_with_incorrect_names(graph))
+        self.assertEqual({'UNDEFINED'}, get_undefined_namespaces(graph))
+        self.assertEqual({'missing', 'other', 'regex'}, get_incorrect_names_by_namespace(graph, 'HGNC'))
+        self.assertEqual({'x', 'y'}, get_undefined_namespace_names(graph, 'UNDEFINED'))
+        self.assertEqual({'HGNC': {'missing', 'other', 'regex'}, 'MESH': set()}, get_incorrect_names(graph))
+        self.assertEqual({'Undefined'}, get_undefined_annotations(graph))
+        self.assertEqual({'HGNC': ['missing', 'other', 'regex']}, calculate_incorrect_name_dict(graph))
+        self.assertEqual(
+            {
+                s1: ['MissingNamespaceNameWarning', 'MissingNamespaceRegexWarning'],
+                s2: ['MissingNamespaceRegexWarning', 'UndefinedNamespaceWarning'],
+                'S3': ['UndefinedAnnotationWarning'],
+            },
+            calculate_error_by_annotation(graph, 'Subgraph'),
+        )
+
+        expected_groups = defaultdict(list)
+        for _, exc, _ in graph.warnings:
+            expected_groups[str(exc)].append(exc.line_number)
+        self.assertEqual(expected_groups, group_errors(graph))
+        self.assertEqual([1, 2, 8], group_errors(graph)[str(NakedNameWarning(1, 'line', 0, 'naked'))])
+        self.assertEqual((str(NakedNameWarning(1, 'line', 0, 'naked')), 3), get_most_common_errors(graph)[0])
+
+    def test_queries(self):
+        """Test combining conditions in queries."""
+        graph = make_graph_with_warnings()
+        add_warnings(graph)
+        index = get_warnings_index(graph)
+
+        def _lines(**kwargs):
+            return [exc.line_number for _, exc, _ in index.iterate_warnings(**kwargs)]
+
+        self.assertEqual(list(range(1, 9)) + [8], _lines())
+        self.assertEqual([4, 5, 6], _lines(classes=(MissingNamespaceNameWarning, MissingNamespaceRegexWarning)))
+        self.assertEqual([6], _lines(classes=MissingNamespaceRegexWarning, annotation='Subgraph'))
+        self.assertEqual([3, 7], _lines(namespace='UNDEFINED'))
+        self.assertEqual([8, 8], _lines(line_number=8))
+        self.assertEqual([8], _lines(line_number=8, annotation='Subgraph'))
+        self.assertEqual([], _lines(namespace='nope'))
+
+    def test_update(self):
+        """Test the index is extended with appended warnings and rebuilt when the warnings are replaced."""
+        graph = make_graph_with_warnings()
+        index = get_warnings_index(graph)
+        self.assertEqual(4, index.number_warnings)
+        self.assertEqual(2, len(group_errors(graph)[str(NakedNameWarning(1, 'line', 0, 'naked'))]))
+
+        add_warnings(graph)
+        self.assertIs(index, get_warnings_index(graph))
+        self.assertEqual(9, index.number_warnings)
+        self.assertEqual(3, len(group_errors(graph)[str(NakedNameWarning(1, 'line', 0, 'naked'))]))
+
+        del graph.warnings[1:]
+        self.assertEqual(set(), get_undefined_namespaces(graph))
+        self.assertIsNot(index, get_warnings_index(graph))
+
+    def test_grouped_by_namespace(self):
+        """Test the summaries grouped by namespace take one pass over the warnings for any number of namespaces."""
+        graph = BELGraph()
+        for i in range(30):
+            namespace = 'NS{}'.format(i)
+            graph.namespace_url[namespace] = '{}.belns'.format(namespace)
+            graph.add_increases(Protein(namespace, 'a'), Protein(namespace, 'b'), citation=str(i), evidence='e')
+            graph.warnings.extend([
+                (None, MissingNamespaceNameWarning(i, 'line', 0, namespace, 'missing'), {}),
+                (None, MissingNamespaceRegexWarning(i, 'line', 0, namespace, 'regex{}'.format(i)), {}),
+            ])
+        graph.warnings.append((None, MissingNamespaceNameWarning(30, 'line', 0, 'UNUSED', 'missing'), {}))
+
+        with mock.patch.object(
+            WarningsIndex, '_get_class_positions', autospec=True, side_effect=WarningsIndex._get_class_positions,
+        ) as get_class_positions:
+            incorrect_names = get_incorrect_names(graph)
+            self.assertEqual(1, get_class_positions.call_count)
+            names = get_names_including_errors(graph)
+            self.assertEqual(2, get_class_positions.call_count)
+
+            for namespace, expected in incorrect_names.items():
+                self.assertEqual(expected, get_incorrect_names_by_namespace(graph, namespace))
+                self.assertEqual(names[namespace], get_names_including_errors_by_namespace(graph, namespace))
+            # Queries narrowed to a namespace don't merge the positions of the classes
+            self.assertEqual(2, get_class_positions.call_count)
+
+        self.assertEqual(30, len(incorrect_names))
+        self.assertEqual({'missing', 'regex0'}, incorrect_names['NS0'])
+        self.assertEqual({'a', 'b', 'missing', 'regex0'}, names['NS0'])
+
+        with self.assertRaises(IndexError):
+            get_names_including_errors(make_graph_with_warnings())
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the node property summaries."""
+
+import collections
+import unittest
+
+import networkx as nx
+
+from pybel.examples import egf_graph, sialic_acid_graph
+from pybel_tools.summary import count_top_centrality, count_top_degrees
+from tests.constants import get_sampled_centrality, make_random_graph
+
+
+class TestTopNodes(unittest.TestCase):
+    """Test getting the nodes with the top degrees and centralities."""
+
+    def test_degrees(self):
+        """Test the top degrees are the same as the most common ones in a counter."""
+        for number in (1, 5, None):
+            with self.subTest(number=number):
+                self.assertEqual(
+                    list(collections.Counter(dict(egf_graph.degree())).most_common(number)),
+                    list(count_top_degrees(egf_graph, number=number).items()),
+                )
+
+    def assert_centrality_equal(self, expected, actual):
+        """Check the centralities are the same up to floating point error."""
+        self.assertEqual(set(expected), set(actual))
+        for node, value in expected.items():
+            self.assertAlmostEqual(value, actual[node], msg=str(node))
+
+    def test_exact(self):
+        """Test the exact betweenness centrality is the same as from networkx."""
+        for graph in (sialic_acid_graph, egf_graph, make_random_graph(seed=0, number_nodes=30, number_edges=90)):
+            expected = nx.betweenness_centrality(nx.DiGraph(graph))
+            with self.subTest(graph=graph.name):
+                self.assert_centrality_equal(expected, count_top_centrality(graph, number=None, number_samples=None))
+                self.assert_centrality_equal(expected, count_top_centrality(graph, number=None, n_jobs=2))
+
+    def test_sampled(self):
+        """Test the sampled betweenness centrality picks the same sources as networkx with the same seed."""
+        graph = make_random_graph(seed=1, number_nodes=30, number_edges=90)
+        expected = get_sampled_centrality(graph, number_samples=10, seed=5)
+        for n_jobs in (None, 2):
+            with self.subTest(n_jobs=n_jobs):
+                actual = count_top_centrality(graph, number=None, number_samples=10, seed=5, n_jobs=n_jobs)
+                self.assert_centrality_equal(expected, actual)
+
+        top = count_top_centrality(graph, number=3, number_samples=10, seed=5)
+        for expected_value, value in zip(sorted(expected.values(), reverse=True)[:3], top.values()):
+            self.assertAlmostEqual(expected_value, value)
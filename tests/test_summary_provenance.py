@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the provenance summaries and their index."""
+
+import unittest
+from datetime import datetime
+
+from pybel import BELGraph
+from pybel.dsl import Protein
+from pybel.examples import egf_graph, sialic_acid_graph
+from pybel_tools.summary import (
+    PrefixIndex, ProvenanceIndex, SubstringIndex, attach_provenance_index, clear_keyword_indexes,
+    count_author_publications, count_authors, count_citation_years, count_citations, count_citations_by_annotation,
+    count_confidences, count_pmids, detach_provenance_index, get_authors_by_keyword, get_evidences_by_pmid,
+    get_pmid_by_keyword, get_provenance_index,
+)
+from pybel_tools.summary.provenance import _ensure_datetime, _parse_date
+from tests.constants import make_citation, make_provenance_graph
+
+
+def _summarize(graph: BELGraph):
+    return dict(
+        pmids=count_pmids(graph),
+        citations=count_citations(graph),
+        citations_by_annotation=count_citations_by_annotation(graph, 'Subgraph'),
+        authors=count_authors(graph),
+        author_publications=count_author_publications(graph),
+        evidences=get_evidences_by_pmid(graph, ['1', '2', '3', '4']),
+        evidences_single=get_evidences_by_pmid(graph, '1'),
+        years=count_citation_years(graph),
+        confidences=count_confidences(graph),
+    )
+
+
+def _summarize_index(index: ProvenanceIndex):
+    return dict(
+        pmids=index.count_pmids(),
+        citations=index.count_citations(),
+        citations_by_annotation=index.count_citations_by_annotation('Subgraph'),
+        authors=index.count_authors(),
+        author_publications=index.count_author_publications(),
+        evidences=index.get_evidences_by_pmid(['1', '2', '3', '4']),
+        evidences_single=index.get_evidences_by_pmid('1'),
+        years=index.count_citation_years(),
+        confidences=index.count_confidences(),
+    )
+
+
+class TestProvenanceIndex(unittest.TestCase):
+    """Test the provenance functions give the same results with and without an attached index."""
+
+    def assert_index_matches(self, graph: BELGraph):
+        """Check the functions give the same results with and without an index attached to the graph."""
+        expected = _summarize(graph)
+        attach_provenance_index(graph)
+        try:
+            actual = _summarize(graph)
+        finally:
+            detach_provenance_index(graph)
+
+        for key, value in expected.items():
+            with self.subTest(key=key):
+                self.assertEqual(value, actual[key])
+
+    def test_examples(self):
+        """Test on the example graphs and a graph with authors and dates."""
+        for graph in (sialic_acid_graph, egf_graph, make_provenance_graph()):
+            with self.subTest(graph=graph.name):
+                self.assert_index_matches(graph)
+
+    def test_counts(self):
+        """Test the counts on a small graph."""
+        graph = make_provenance_graph()
+        index = ProvenanceIndex.from_graph(graph)
+
+        self.assertEqual({'1': 3, '2': 1}, index.count_pmids())
+        self.assertEqual({('pubmed', '1'): 2, ('pubmed', '2'): 1, ('doi', '3'): 2}, index.count_citations())
+        self.assertEqual({'Author A': 3, 'Author B': 4, 'Author C': 2}, index.count_authors())
+        self.assertEqual({'Author A': 1, 'Author B': 2, 'Author C': 1}, index.count_author_publications())
+        self.assertEqual({2015: 1, 2016: 1}, index.count_citation_years())
+        self.assertEqual({'1': {'e1', 'e2'}}, index.get_evidences_by_pmid('1'))
+        self.assertEqual({('pubmed', '1'), ('pubmed', '2')}, index.get_author_citations('Author B'))
+
+    def test_edits(self):
+        """Test the index gives the same results as scanning the graph after adding and removing edges."""
+        graph = make_provenance_graph()
+        index = ProvenanceIndex.from_graph(graph)
+
+        a, d = Protein('HGNC', 'A'), Protein('HGNC', 'D')
+        citation = make_citation('4', '2017-05-06', ['Author D'])
+        key = graph.add_increases(a, d, citation=citation, evidence='e5', annotations={'Subgraph': 'S2'})
+        index.add_edge(a, d, key, graph.edges[a, d, key])
+        self.assertEqual(_summarize(graph), _summarize_index(index))
+
+        removed = [
+            (u, v, key)
+            for u, v, key, data in graph.edges(keys=True, data=True)
+            if data.get('evidence') in {'e1', 'e4'}
+        ]
+        for u, v, key in removed:
+            graph.remove_edge(u, v, key)
+            index.remove_edge(u, v, key)
+        self.assertEqual(_summarize(graph), _summarize_index(index))
+
+        with self.assertRaises(KeyError):
+            index.remove_edge(*removed[0])
+
+    def test_attach(self):
+        """Test attaching and detaching an index."""
+        graph = make_provenance_graph()
+        self.assertIsNone(get_provenance_index(graph))
+        index = attach_provenance_index(graph)
+        self.assertIs(index, get_provenance_index(graph))
+        detach_provenance_index(graph)
+        self.assertIsNone(get_provenance_index(graph))
+
+    def test_out_of_date(self):
+        """Test the functions scan the graph if it was changed without updating its index."""
+        graph = make_provenance_graph()
+        attach_provenance_index(graph)
+        graph.add_increases(
+            Protein('HGNC', 'A'), Protein('HGNC', 'D'), citation=make_citation('4', '2017-05-06', ['Author D']),
+            evidence='e5',
+        )
+        with self.assertLogs('pybel_tools.summary.provenance', level='WARNING'):
+            self.assertEqual(3, len(count_citation_years(graph)))
+
+
+class TestCitationYears(unittest.TestCase):
+    """Test counting the citations from each year."""
+
+    def test_parse_date(self):
+        """Test the fast path for parsing dates agrees with :func:`datetime.datetime.strptime`."""
+        for date in ('2015-01-02', '2016-02-29', '2015-1-2', '2015-02-30', '2015/01/02', '15-01-02', 'not a date'):
+            with self.subTest(date=date):
+                try:
+                    expected = datetime.strptime(date, '%Y-%m-%d')
+                except ValueError:
+                    expected = None
+                self.assertEqual(expected, _parse_date(date))
+
+    def test_count(self):
+        """Test citations are counted once per year, however many edges they're on."""
+        graph = make_provenance_graph()
+        graph.add_increases(
+            Protein('HGNC', 'A'), Protein('HGNC', 'D'), citation=make_citation('4', '2015-1-2', ['Author D']),
+            evidence='e5',
+        )
+        graph.add_increases(
+            Protein('HGNC', 'B'), Protein('HGNC', 'D'), citation=make_citation('5', '2015-02-30', ['Author D']),
+            evidence='e6',
+        )
+        self.assertEqual({2015: 2, 2016: 1}, count_citation_years(graph))
+
+    def test_ensure_datetime(self):
+        """Test errors for invalid dates."""
+        self.assertEqual(datetime(2015, 1, 2), _ensure_datetime(datetime(2015, 1, 2)))
+        with self.assertRaises(ValueError):
+            _ensure_datetime('2015-02-30')
+        with self.assertRaises(TypeError):
+            _ensure_datetime(2015)
+
+
+class TestKeywordIndex(unittest.TestCase):
+    """Test the indexes for typeahead searches."""
+
+    def test_prefix(self):
+        """Test prefix searches give the same results as checking each string."""
+        strings = ['1', '12', '123', '124', '13', '2', '21', '9', '12']
+        index = PrefixIndex(strings)
+        self.assertEqual(8, len(index))
+        for prefix in ('', '1', '12', '123', '125', '2', '3', '99'):
+            with self.subTest(prefix=prefix):
+                self.assertEqual(sorted({s for s in strings if s.startswith(prefix)}), index.search(prefix))
+
+    def test_substring(self):
+        """Test substring searches give the same results as checking each string, ignoring case."""
+        strings = ['Smith J', 'Smithers W', 'Goldsmith A', 'Jones B', 'de Smet C', 'Sm']
+        index = SubstringIndex(strings)
+        for keyword in ('', 's', 'SM', 'smi', 'smith', 'SMITHERS W', 'mith', 'th j', 'x', 'smitx', 'jones b c'):
+            with self.subTest(keyword=keyword):
+                self.assertEqual({s for s in strings if keyword.lower() in s.lower()}, index.search(keyword))
+
+    def test_graph(self):
+        """Test searching the identifiers and authors in a graph, before and after it changes."""
+        graph = make_provenance_graph()
+        self.assertEqual({'1'}, get_pmid_by_keyword('1', graph))
+        self.assertEqual({'Author A', 'Author B', 'Author C'}, get_authors_by_keyword('author', graph))
+        self.assertEqual({'Author B'}, get_authors_by_keyword('or b', graph))
+
+        graph.add_increases(
+            Protein('HGNC', 'A'), Protein('HGNC', 'D'), citation=make_citation('10', '2017-05-06', ['Author D']),
+            evidence='e5',
+        )
+        self.assertEqual({'1', '10'}, get_pmid_by_keyword('1', graph))
+        self.assertEqual({'Author D'}, get_authors_by_keyword('r d', graph))
+
+        # replacing an edge keeps the number of edges the same, so the indexes have to be cleared
+        u, v, key = next(iter(graph.edges(keys=True)))
+        graph.remove_edge(u, v, key)
+        graph.add_increases(
+            Protein('HGNC', 'A'), Protein('HGNC', 'E'), citation=make_citation('11', '2017-05-06', ['Author E']),
+            evidence='e6',
+        )
+        clear_keyword_indexes(graph)
+        expected = {pmid for pmid in count_pmids(graph) if pmid.startswith('1')}
+        self.assertIn('11', expected)
+        self.assertEqual(expected, get_pmid_by_keyword('1', graph))
+        self.assertEqual({'Author E'}, get_authors_by_keyword('r e', graph))
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the index of the relations between each pair of nodes."""
+
+import unittest
+
+from pybel.constants import INCREASES, RELATION
+from pybel.dsl import Protein
+from pybel.examples import sialic_acid_graph
+from pybel_tools.mutation import collapse_consistent_edges, remove_inconsistent_edges
+from pybel_tools.summary import (
+    RelationIndex, attach_relation_index, detach_relation_index, get_consistent_edges, get_contradiction_summary,
+    get_contradictory_pairs, get_edge_relations, get_relation_index, pair_has_contradiction, pair_is_consistent,
+    relation_set_has_contradictions,
+)
+from tests.constants import make_random_graph
+
+
+def get_expected_relations(graph):
+    """Build the relations between each pair of nodes by looking at all of their edges."""
+    rv = {}
+    for u, v, relation in graph.edges(data=RELATION):
+        rv.setdefault((u, v), set()).add(relation)
+    return rv
+
+
+class TestRelationIndex(unittest.TestCase):
+    """Test the functions checking pairs of nodes give the same results with and without an index."""
+
+    def assert_queries_match(self, graph):
+        """Check each function against the relations built from the edges."""
+        expected = get_expected_relations(graph)
+        self.assertEqual(expected, get_edge_relations(graph))
+        self.assertEqual(
+            {pair for pair, relations in expected.items() if relation_set_has_contradictions(relations)},
+            set(get_contradictory_pairs(graph)),
+        )
+        self.assertEqual(
+            {pair for pair, relations in expected.items() if len(relations) == 1},
+            set(get_consistent_edges(graph)),
+        )
+        for (u, v), relations in expected.items():
+            self.assertEqual(relation_set_has_contradictions(relations), pair_has_contradiction(graph, u, v))
+            self.assertEqual(next(iter(relations)) if len(relations) == 1 else None, pair_is_consistent(graph, u, v))
+
+    def test_queries(self):
+        """Test random graphs and an example graph, with and without an attached index."""
+        for graph in [make_random_graph(seed) for seed in range(3)] + [sialic_acid_graph.copy()]:
+            with self.subTest(graph=graph):
+                expected_summary = get_contradiction_summary(graph)
+                self.assert_queries_match(graph)
+                attach_relation_index(graph)
+                self.assert_queries_match(graph)
+                self.assertEqual(expected_summary, get_contradiction_summary(graph))
+                detach_relation_index(graph)
+                self.assertIsNone(get_relation_index(graph))
+
+    def test_update(self):
+        """Test the masks are updated as edges are added and removed."""
+        graph = make_random_graph(0)
+        index = attach_relation_index(graph)
+        a, b = Protein('HGNC', 'A'), Protein('HGNC', 'B')
+
+        keys = [graph.add_increases(a, b, citation=str(i), evidence=str(i)) for i in range(2)]
+        for key in keys:
+            index.add_edge(a, b, key, graph[a][b][key])
+        key = graph.add_decreases(a, b, citation='2', evidence='2')
+        index.add_edge(a, b, key, graph[a][b][key])
+        self.assertTrue(pair_has_contradiction(graph, a, b))
+
+        graph.remove_edge(a, b, key)
+        index.remove_edge(a, b, key)
+        self.assertFalse(pair_has_contradiction(graph, a, b))
+        self.assertEqual(INCREASES, pair_is_consistent(graph, a, b))
+
+        graph.remove_edge(a, b, keys[0])
+        index.remove_edge(a, b, keys[0])
+        self.assertEqual(INCREASES, pair_is_consistent(graph, a, b))
+        self.assertEqual(1, index.count_edges(a, b))
+        self.assert_queries_match(graph)
+
+        with self.assertRaises(KeyError):
+            index.remove_edge(a, b, keys[0])
+
+    def test_stale(self):
+        """Test an index that's out of date isn't used."""
+        graph = make_random_graph(0)
+        attach_relation_index(graph)
+        a, b = Protein('HGNC', 'A'), Protein('HGNC', 'B')
+        graph.add_increases(a, b, citation='1', evidence='1')
+        graph.add_decreases(a, b, citation='2', evidence='2')
+
+        with self.assertLogs('pybel_tools.summary.relation_index', 'WARNING'):
+            self.assertTrue(pair_has_contradiction(graph, a, b))
+        with self.assertLogs('pybel_tools.summary.relation_index', 'WARNING'):
+            self.assertIn((a, b), set(get_contradictory_pairs(graph)))
+
+    def test_mutations(self):
+        """Test collapsing consistent edges and removing inconsistent ones, which keep the attached index updated."""
+        for attach in (False, True):
+            with self.subTest(attach=attach):
+                graph = make_random_graph(0)
+                expected = get_expected_relations(graph)
+                if attach:
+                    attach_relation_index(graph)
+
+                collapse_consistent_edges(graph)
+                remove_inconsistent_edges(graph)
+
+                self.assertEqual(
+                    {pair: relations for pair, relations in expected.items() if len(relations) == 1},
+                    get_expected_relations(graph),
+                )
+                for u, v in graph.edges():
+                    self.assertEqual(1, graph.number_of_edges(u, v))
+
+                if attach:
+                    index = get_relation_index(graph)
+                    self.assertEqual(graph.number_of_edges(), index.number_edges)
+                    self.assertEqual(
+                        RelationIndex.from_graph(graph).get_edge_relations(),
+                        index.get_edge_relations(),
+                    )
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the sub-graph summaries."""
+
+import unittest
+
+import numpy as np
+
+from pybel import BELGraph
+from pybel.examples import sialic_acid_graph
+from pybel_tools.summary import (
+    calculate_subgraph_edge_overlap, calculate_subgraph_edge_overlap_matrix, summarize_subgraph_edge_overlap,
+)
+from tests.constants import make_annotated_graph
+
+
+class TestSubgraphOverlap(unittest.TestCase):
+    """Test the sparse sub-graph overlap matrix gives the same results as building sets for every pair."""
+
+    def assert_overlap_matches(self, graph: BELGraph, annotation: str = 'Subgraph'):
+        """Check the overlap matrix against the sets of edges, intersections, unions, and similarities."""
+        sg2edge, intersections, unions, similarities = calculate_subgraph_edge_overlap(graph, annotation)
+        overlap = calculate_subgraph_edge_overlap_matrix(graph, annotation)
+
+        self.assertEqual(set(sg2edge), set(overlap.values))
+        for i, value in enumerate(overlap.values):
+            self.assertEqual(sg2edge[value], overlap.get_edges(value))
+            self.assertEqual(len(sg2edge[value]), overlap.sizes[i])
+            for j, other in enumerate(overlap.values):
+                self.assertEqual(len(intersections[value][other]), overlap.intersection_sizes[i, j])
+                self.assertEqual(len(unions[value][other]), overlap.union_sizes[i, j])
+                self.assertAlmostEqual(similarities[value][other], overlap.tanimoto[i, j])
+
+        self.assertEqual(similarities, summarize_subgraph_edge_overlap(graph, annotation))
+
+    def test_random(self):
+        """Test random graphs with several sub-graphs per edge and parallel edges."""
+        for seed in range(3):
+            with self.subTest(seed=seed):
+                self.assert_overlap_matches(make_annotated_graph(seed))
+
+    def test_example(self):
+        """Test an example graph with a single sub-graph."""
+        self.assert_overlap_matches(sialic_acid_graph, 'Species')
+
+    def test_pairs(self):
+        """Test building the intersection and union of a specific pair on demand."""
+        graph = make_annotated_graph(0)
+        _, intersections, unions, _ = calculate_subgraph_edge_overlap(graph)
+        overlap = calculate_subgraph_edge_overlap_matrix(graph)
+        first, second = overlap.values[:2]
+
+        self.assertEqual(intersections[first][second], overlap.get_intersection(first.identifier, second.identifier))
+        self.assertEqual(unions[first][second], overlap.get_union(first, second))
+        with self.assertRaises(KeyError):
+            overlap.get_edges('S9')
+
+        df = overlap.to_dataframe()
+        self.assertEqual(['S0', 'S1'], sorted(df.index)[:2])
+        np.testing.assert_allclose(np.diag(df.values), 1.0)
@@ -1,8 +1,18 @@
 # -*- coding: utf-8 -*-
 
+import itertools as itt
+import random
 import unittest
+from unittest import mock
 
-from pybel_tools.utils import min_tanimoto_set_similarity
+import networkx as nx
+
+from pybel_tools.utils import (
+    calculate_betweenness_centality, calculate_global_tanimoto_set_distances, calculate_tanimoto_set_distances,
+    calculate_tanimoto_set_matrix, clear_betweenness_centrality_cache, min_tanimoto_set_similarity,
+    tanimoto_set_similarity,
+)
+from tests.constants import get_sampled_centrality, make_random_graph
 
 
 class TestMinSimilarity(unittest.TestCase):
@@ -26,3 +36,104 @@ class TestMinSimilarity(unittest.TestCase):
         a = {1, 2}
         b = {1, 2}
         self.assertEqual(1.0, min_tanimoto_set_similarity(a, b))
+
+
+def make_random_sets(seed: int, number_sets: int = 40, number_elements: int = 30):
+    """Make random sets of various sizes, including an empty one."""
+    rng = random.Random(seed)
+    rv = {
+        f'S{i}': set(rng.sample(range(number_elements), rng.randint(0, number_elements // 2)))
+        for i in range(number_sets)
+    }
+    rv['empty'] = set()
+    return rv
+
+
+class TestTanimotoDistances(unittest.TestCase):
+    """Test the all-pairs tanimoto similarities are the same as comparing each pair of sets."""
+
+    def test_all_pairs(self):
+        """Test the similarities of all pairs, in each batch size."""
+        dict_of_sets = make_random_sets(0)
+        matrix = calculate_tanimoto_set_matrix(dict_of_sets)
+        for batch_size in (1, 7, 1024):
+            with self.subTest(batch_size=batch_size), mock.patch('pybel_tools.utils.TANIMOTO_BATCH_SIZE', batch_size):
+                result = calculate_tanimoto_set_distances(dict_of_sets)
+                self.assertEqual(set(dict_of_sets), set(result))
+                for x, y in itt.product(dict_of_sets, repeat=2):
+                    expected = 1.0 if x == y else tanimoto_set_similarity(dict_of_sets[x], dict_of_sets[y])
+                    self.assertAlmostEqual(expected, result[x][y])
+                    self.assertAlmostEqual(expected, matrix.loc[x, y])
+
+    def test_top_k(self):
+        """Test only the most similar sets are kept."""
+        dict_of_sets = make_random_sets(1)
+        full = calculate_tanimoto_set_distances(dict_of_sets)
+        for top_k in (0, 1, 5, 100):
+            result = calculate_tanimoto_set_distances(dict_of_sets, top_k=top_k)
+            for x, similarities in result.items():
+                with self.subTest(top_k=top_k, key=x):
+                    self.assertEqual(1.0, similarities[x])
+                    self.assertEqual(min(top_k, len(dict_of_sets) - 1) + 1, len(similarities))
+                    others = sorted((v for y, v in full[x].items() if y != x), reverse=True)
+                    self.assertEqual(
+                        others[:top_k],
+                        [v for y, v in similarities.items() if y != x],
+                    )
+
+    def test_global(self):
+        """Test the global distances, which divide by the size of the union of all sets."""
+        dict_of_sets = {'a': {1, 2}, 'b': {2, 3, 4}, 'c': set()}
+        result = calculate_global_tanimoto_set_distances(dict_of_sets)
+        self.assertAlmostEqual(0.0, result['a']['b'])
+        self.assertAlmostEqual(0.5, result['a']['a'])
+        self.assertAlmostEqual(0.25, result['b']['b'])
+        self.assertAlmostEqual(0.5, result['a']['c'])
+        self.assertAlmostEqual(1.0, result['c']['c'])
+
+
+class TestBetweennessCentrality(unittest.TestCase):
+    """Test calculating the betweenness centrality with sparse matrices."""
+
+    def setUp(self):
+        """Start each test with an empty cache."""
+        clear_betweenness_centrality_cache()
+
+    def assert_centrality_equal(self, expected, actual):
+        """Check the centralities are the same up to floating point error."""
+        self.assertEqual(set(expected), set(actual))
+        for node, value in expected.items():
+            self.assertAlmostEqual(value, actual[node], msg=str(node))
+
+    def test_exact(self):
+        """Test the betweenness centrality from every source, over several batches, is the same as from networkx."""
+        graph = make_random_graph(seed=2, number_nodes=80, number_edges=200)
+        expected = nx.betweenness_centrality(nx.DiGraph(graph))
+        for n_jobs in (None, 2):
+            with self.subTest(n_jobs=n_jobs):
+                actual = calculate_betweenness_centality(graph, number_samples=None, n_jobs=n_jobs, use_cache=False)
+                self.assert_centrality_equal(expected, actual)
+
+    def test_sampled(self):
+        """Test the sources sampled with a seed are the same as by networkx, and are rescaled like networkx 3.5+."""
+        graph = make_random_graph(seed=3, number_nodes=80, number_edges=200)
+        expected = get_sampled_centrality(graph, number_samples=40, seed=7)
+        for n_jobs in (None, 2):
+            with self.subTest(n_jobs=n_jobs):
+                actual = calculate_betweenness_centality(
+                    graph, number_samples=40, seed=7, n_jobs=n_jobs, use_cache=False,
+                )
+                self.assert_centrality_equal(expected, actual)
+
+    def test_cache(self):
+        """Test results are reused for identical graphs with the same sampling arguments."""
+        graph = make_random_graph(seed=4, number_nodes=30, number_edges=60)
+        rv = calculate_betweenness_centality(graph, number_samples=10, seed=1)
+        self.assertIs(rv, calculate_betweenness_centality(graph.copy(), number_samples=10, seed=1))
+        self.assertIsNot(rv, calculate_betweenness_centality(graph, number_samples=10, seed=2))
+        self.assertIsNot(rv, calculate_betweenness_centality(graph, number_samples=10, seed=1, use_cache=False))
+
+        unseeded = calculate_betweenness_centality(graph, number_samples=10)
+        self.assertIsNot(unseeded, calculate_betweenness_centality(graph, number_samples=10))
+        exact = calculate_betweenness_centality(graph, number_samples=None)
+        self.assertIs(exact, calculate_betweenness_centality(graph, number_samples=None))